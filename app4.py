@@ -4,10 +4,11 @@ import csv
 import io
 import pandas as pd
 import google.generativeai as genai
-from openai import OpenAI
 import re
 from typing import Dict, Any
 import time
+import clients
+from table_parser import compact_to_df, format_instructions, response_format
 
 # Configure page
 st.set_page_config(
@@ -99,7 +100,8 @@ class SyntheticDataGenerator:
     def setup_openai(self, api_key: str):
         """Setup OpenAI client"""
         try:
-            self.openai_client = OpenAI(api_key=api_key)
+            # shared per-key connection pool; this app relies on the SDK's own retries
+            self.openai_client = clients.get_client(api_key).with_options(max_retries=2)
             return True
         except Exception as e:
             st.error(f"Failed to setup OpenAI: {str(e)}")
@@ -149,8 +151,12 @@ class SyntheticDataGenerator:
         except Exception as e:
             raise Exception(f"Error generating attributes: {str(e)}")
     
-    def generate_dataset(self, attributes: Dict[str, Any]) -> str:
-        """Agent 2: Generate dataset using OpenAI GPT-4o-mini"""
+    def generate_dataset(self, attributes: Dict[str, Any], output_format: str = "markdown") -> str:
+        """Agent 2: Generate dataset using OpenAI GPT-4o-mini
+
+        output_format "markdown" returns the model's markdown table; "csv" and
+        "json" ask for the compact formats and return validated CSV with a header.
+        """
         if not self.openai_client:
             raise Exception("OpenAI client not configured")
         
@@ -173,25 +179,30 @@ class SyntheticDataGenerator:
         Requirements:
         1. Generate realistic, diverse data that makes sense for each column type
         2. Ensure data consistency and logical relationships between columns
-        3. Return the data in markdown table format
-        4. Include proper headers
-        5. Make sure all data is appropriate and follows the specified data types
-        
-        Return ONLY the markdown table, no additional text or explanation.
+        3. Make sure all data is appropriate and follows the specified data types
+        4. {format_instructions(output_format, columns)}
         """
         
         try:
+            extra = {"response_format": response_format(output_format)} if output_format == "json" else {}
             response = self.openai_client.chat.completions.create(
                 model="gpt-4o-mini",
                 messages=[
-                    {"role": "system", "content": "You are a synthetic data generator. Generate realistic, diverse datasets in markdown table format."},
+                    {"role": "system", "content": "You are a synthetic data generator. Generate realistic, diverse datasets in the requested format."},
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.7,
-                max_tokens=2000
+                max_tokens=2000,
+                **extra
             )
             
-            return response.choices[0].message.content
+            content = response.choices[0].message.content
+            if output_format == "markdown":
+                return content
+            
+            # Compact formats: validate rows against the column list, re-add the header
+            df = compact_to_df(content, columns, output_format)
+            return df.to_csv(index=False, quoting=csv.QUOTE_ALL).strip()
             
         except Exception as e:
             raise Exception(f"Error generating dataset: {str(e)}")
@@ -301,6 +312,13 @@ def main():
             height=150
         )
         
+        output_format = st.selectbox(
+            "Model output format",
+            ["markdown", "csv", "json"],
+            format_func={"markdown": "Markdown table", "csv": "Headerless CSV (compact)", "json": "JSON rows (compact)"}.get,
+            help="Compact formats use fewer output tokens per row."
+        )
+        
         # Generate button
         if st.button("🚀 Generate Dataset", disabled=not hasattr(st.session_state, 'apis_configured') or not st.session_state.apis_configured):
             if not user_prompt:
@@ -332,22 +350,29 @@ def main():
                 progress_bar.progress(50)
                 
                 with st.spinner("Creating synthetic data..."):
-                    markdown_table = st.session_state.generator.generate_dataset(attributes)
+                    markdown_table = st.session_state.generator.generate_dataset(attributes, output_format)
                 
                 progress_bar.progress(66)
                 
                 # Display dataset
                 st.markdown('<div class="agent-card">', unsafe_allow_html=True)
                 st.subheader("📊 Agent 2 Output - Generated Dataset")
-                st.markdown(markdown_table)
+                if output_format == "markdown":
+                    st.markdown(markdown_table)
+                else:
+                    st.dataframe(pd.read_csv(io.StringIO(markdown_table), dtype=str), use_container_width=True)
                 st.markdown('</div>', unsafe_allow_html=True)
                 
                 # Agent 3: Convert to CSV
                 status_text.text("🤖 Agent 3: Converting to CSV format...")
                 progress_bar.progress(80)
                 
-                with st.spinner("Converting to CSV..."):
-                    csv_data = st.session_state.generator.markdown_to_csv(markdown_table)
+                if output_format == "markdown":
+                    with st.spinner("Converting to CSV..."):
+                        csv_data = st.session_state.generator.markdown_to_csv(markdown_table)
+                else:
+                    # Compact output was already validated and converted by Agent 2
+                    csv_data = markdown_table
                 
                 progress_bar.progress(100)
                 status_text.text("✅ Dataset generation completed!")
@@ -1,13 +1,27 @@
 import streamlit as st
 import json
+import os
+import shutil
 import pandas as pd
-import io
-import re
-from typing import Dict, Any, List
-from openai import OpenAI
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils import get_column_letter
+import threading
+import uuid
+from collections import deque
+from typing import Callable, Deque, Dict, List, Tuple
+import clients
+from generator import MODE_RELATIONAL, MODE_SIMPLE, SyntheticDataGenerator, dataset_fingerprint
+from llm_cache import ResponseCache
+from fk_assign import ForeignKeyAssigner
+from integrity import IntegrityEngine, parse_fan_out
+from jobs import DONE, FAILED, FINISHED, Job, JobRunner
+from local_engine import LocalRowEngine
+from row_plan import parse_row_spec
+from schema_store import SchemaStore
+from sharding import DEFAULT_SHARD_WORKERS
+from streaming import DEFAULT_STREAM_DIR, stream_synthesis
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STREAM_DOWNLOAD_MAX_BYTES = 200 * 1024 * 1024  # larger files are linked or named, not read into the session
+PREVIEW_ROWS = 50  # rows per table shown while a job streams them in
 
 # ── Page config ────────────────────────────────────────────────────────────────
 st.set_page_config(
@@ -94,295 +108,223 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# ── Generator class ────────────────────────────────────────────────────────────
-class SyntheticDataGenerator:
-    def __init__(self):
-        self.client: OpenAI | None = None
-
-    def setup(self, api_key: str) -> bool:
-        try:
-            self.client = OpenAI(api_key=api_key)
-            # quick connectivity check
-            self.client.models.list()
-            return True
-        except Exception as e:
-            st.error(f"OpenAI setup failed: {e}")
-            return False
-
-    # ── Agent 1 ── schema ──────────────────────────────────────────────────────
-    def generate_schema(self, brief: str, mode: str, num_rows: int) -> Dict[str, Any]:
-        if not self.client:
-            raise RuntimeError("OpenAI client not configured")
-
-        if mode == "Simple (Single Table)":
-            system = "You are a data schema designer. Return ONLY valid JSON, no markdown fences."
-            user = f"""
-From the user request below, build a single-table schema JSON:
-{{
-  "tables": [
-    {{
-      "name": "<TableName>",
-      "primary_key": "<pk_column>",
-      "foreign_keys": [],
-      "columns": {{ "<col>": "<type>", ... }}
-    }}
-  ],
-  "num_rows": {num_rows},
-  "dataset_description": "<short description>"
-}}
-Supported types: string, integer, float, boolean, date, email, phone, address, url
-Request: {brief}
-"""
-        else:  # Relational
-            system = "You are a relational database schema designer. Return ONLY valid JSON, no markdown fences."
-            user = f"""
-Analyse the project brief and produce a multi-table relational schema JSON.
-Rules:
-- Identify ALL tables mentioned (or implied) in the brief.
-- Identify all primary keys and foreign key relationships.
-- Order tables so parent tables (no foreign keys) come first.
-- Use {num_rows} as the base row count for the root/parent table; child tables get {num_rows} rows too unless the brief specifies otherwise.
-- Supported column types: string, integer, float, boolean, date, email, phone, address, url
-
-Output EXACTLY this structure:
-{{
-  "tables": [
-    {{
-      "name": "<TableName>",
-      "primary_key": "<pk_column>",
-      "foreign_keys": [
-        {{ "column": "<fk_col>", "references_table": "<ParentTable>", "references_column": "<pk_col>" }}
-      ],
-      "columns": {{ "<col>": "<type>", ... }}
-    }}
-  ],
-  "num_rows": {num_rows},
-  "dataset_description": "<short description>"
-}}
-
-Project brief:
-{brief}
-"""
-        resp = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "system", "content": system}, {"role": "user", "content": user}],
-            temperature=0.2,
-            max_tokens=1200,
-        )
-        raw = resp.choices[0].message.content.strip()
-        raw = self._strip_fences(raw)
-        return json.loads(raw)
-
-    # ── Agent 2 ── data rows ───────────────────────────────────────────────────
-    def generate_table_data(
-        self,
-        table: Dict[str, Any],
-        num_rows: int,
-        parent_ids: Dict[str, List[Any]] | None = None,
-    ) -> pd.DataFrame:
-        if not self.client:
-            raise RuntimeError("OpenAI client not configured")
-
-        fk_context = ""
-        if parent_ids:
-            lines = []
-            for fk in table.get("foreign_keys", []):
-                col = fk["column"]
-                ref_table = fk["references_table"]
-                ref_col = fk["references_column"]
-                ids = parent_ids.get(f"{ref_table}.{ref_col}", [])
-                # Show first 60 IDs so the prompt doesn't blow up for large sets
-                sample = ids[:60]
-                lines.append(
-                    f'- Column "{col}" must contain only values from this list '
-                    f'(the existing {ref_table}.{ref_col} values): {sample}'
-                )
-            fk_context = "\nForeign-key constraints (STRICTLY enforce):\n" + "\n".join(lines)
-
-        prompt = f"""
-Generate a realistic synthetic dataset for the table "{table['name']}".
-
-Columns and types:
-{json.dumps(table['columns'], indent=2)}
-
-Primary key column: {table.get('primary_key', 'N/A')} — values must be unique.
-Number of rows: {num_rows}
-{fk_context}
-
-Requirements:
-1. Produce realistic, diverse, internally-consistent data.
-2. Primary key values must be unique across all rows.
-3. Honour every foreign-key constraint exactly — use ONLY the provided IDs.
-4. Return a markdown table (pipe-delimited) with a header row. Nothing else.
-"""
-        resp = self.client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[
-                {"role": "system", "content": "You are a synthetic data generator. Output only a markdown table."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.75,
-            max_tokens=3500,
-        )
-        md = resp.choices[0].message.content
-        return self._markdown_to_df(md)
-
-    # ── Agent 3 ── validation + repair ────────────────────────────────────────
-    def validate_and_repair(
-        self,
-        tables: Dict[str, pd.DataFrame],
-        schema: Dict[str, Any],
-    ) -> Dict[str, pd.DataFrame]:
-        """Enforce FK integrity in-process (no LLM call needed)."""
-        repaired = dict(tables)
-        for tbl in schema["tables"]:
-            name = tbl["name"]
-            if name not in repaired:
-                continue
-            df = repaired[name].copy()
-            for fk in tbl.get("foreign_keys", []):
-                col = fk["column"]
-                ref_t = fk["references_table"]
-                ref_c = fk["references_column"]
-                if ref_t not in repaired or col not in df.columns:
-                    continue
-                valid_ids = repaired[ref_t][ref_c].tolist()
-                # Replace invalid FK values by cycling through valid ones
-                mask = ~df[col].astype(str).isin([str(v) for v in valid_ids])
-                if mask.any():
-                    cycle = [valid_ids[i % len(valid_ids)] for i in range(mask.sum())]
-                    df.loc[mask, col] = cycle
-            repaired[name] = df
-        return repaired
-
-    # ── helpers ────────────────────────────────────────────────────────────────
-    @staticmethod
-    def _strip_fences(text: str) -> str:
-        if "```json" in text:
-            text = text.split("```json")[1].split("```")[0]
-        elif "```" in text:
-            text = text.split("```")[1].split("```")[0]
-        return text.strip()
-
-    @staticmethod
-    def _markdown_to_df(md: str) -> pd.DataFrame:
-        lines = [l for l in md.strip().split("\n") if "|" in l]
-        # remove separator rows
-        lines = [l for l in lines if not re.match(r"^[\|\-\:\s]+$", l)]
-        if len(lines) < 2:
-            raise ValueError("Model returned no usable table rows.")
-        rows = []
-        for l in lines:
-            cells = [c.strip() for c in l.split("|")]
-            cells = [c for c in cells if c != ""]
-            rows.append(cells)
-        headers = rows[0]
-        data = rows[1:]
-        # Pad / trim so every row matches header length
-        n = len(headers)
-        data = [r[:n] + [""] * (n - len(r)) for r in data]
-        return pd.DataFrame(data, columns=headers)
-
-    # ── Excel builder ──────────────────────────────────────────────────────────
-    @staticmethod
-    def build_excel(tables: Dict[str, pd.DataFrame], schema: Dict[str, Any]) -> bytes:
-        wb = Workbook()
-        # Remove default sheet
-        wb.remove(wb.active)
-
-        HDR_FILL   = PatternFill("solid", fgColor="0D2244")
-        HDR_FONT   = Font(name="Calibri", bold=True, color="00D4FF", size=11)
-        CELL_FONT  = Font(name="Calibri", size=10, color="C8D8E8")
-        ALT_FILL   = PatternFill("solid", fgColor="0A1628")
-        BORDER_SIDE = Side(style="thin", color="1E3A5F")
-        CELL_BORDER = Border(left=BORDER_SIDE, right=BORDER_SIDE, top=BORDER_SIDE, bottom=BORDER_SIDE)
-
-        for tbl_def in schema["tables"]:
-            name = tbl_def["name"]
-            if name not in tables:
-                continue
-            df = tables[name]
-            ws = wb.create_sheet(title=name[:31])  # sheet name max 31 chars
-
-            ws.sheet_view.showGridLines = False
-            ws.sheet_properties.tabColor = "00D4FF"
-
-            # Header row
-            for ci, col in enumerate(df.columns, start=1):
-                cell = ws.cell(row=1, column=ci, value=col)
-                cell.font = HDR_FONT
-                cell.fill = HDR_FILL
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-                cell.border = CELL_BORDER
-
-            # Data rows
-            for ri, row in df.iterrows():
-                excel_row = ri + 2
-                fill = ALT_FILL if ri % 2 == 1 else None
-                for ci, val in enumerate(row, start=1):
-                    cell = ws.cell(row=excel_row, column=ci, value=val)
-                    cell.font = CELL_FONT
-                    cell.border = CELL_BORDER
-                    cell.alignment = Alignment(vertical="center")
-                    if fill:
-                        cell.fill = fill
-
-            # Auto column width
-            for ci, col in enumerate(df.columns, start=1):
-                max_len = max(
-                    len(str(col)),
-                    *[len(str(v)) for v in df.iloc[:, ci - 1]],
-                )
-                ws.column_dimensions[get_column_letter(ci)].width = min(max_len + 4, 40)
-
-            ws.row_dimensions[1].height = 22
-            ws.freeze_panes = "A2"
-
-        # ── Relationships info sheet ──────────────────────────────────────────
-        ws_rel = wb.create_sheet(title="📊 Schema Info")
-        ws_rel.sheet_properties.tabColor = "FF8800"
-        ws_rel.sheet_view.showGridLines = False
-
-        ws_rel["A1"] = "FauxFoundry v2 — Schema & Relationships"
-        ws_rel["A1"].font = Font(name="Calibri", bold=True, color="00D4FF", size=14)
-        ws_rel["A1"].fill = PatternFill("solid", fgColor="0D1117")
-
-        ws_rel["A3"] = "Dataset Description"
-        ws_rel["A3"].font = Font(bold=True, color="7090B0")
-        ws_rel["B3"] = schema.get("dataset_description", "")
-        ws_rel["B3"].font = Font(color="C8D8E8")
-
-        ws_rel["A5"] = "Table"
-        ws_rel["B5"] = "Primary Key"
-        ws_rel["C5"] = "Foreign Keys"
-        ws_rel["D5"] = "Row Count"
-        for col in "ABCD":
-            c = ws_rel[f"{col}5"]
-            c.font = Font(bold=True, color="00D4FF")
-            c.fill = PatternFill("solid", fgColor="0D2244")
-            c.border = CELL_BORDER
-
-        for ri, tbl_def in enumerate(schema["tables"], start=6):
-            name = tbl_def["name"]
-            pk   = tbl_def.get("primary_key", "")
-            fks  = "; ".join(
-                f"{fk['column']} → {fk['references_table']}.{fk['references_column']}"
-                for fk in tbl_def.get("foreign_keys", [])
-            ) or "—"
-            row_count = len(tables.get(name, pd.DataFrame()))
-            for ci, val in enumerate([name, pk, fks, row_count], start=1):
-                cell = ws_rel.cell(row=ri, column=ci, value=val)
-                cell.font = Font(name="Calibri", size=10, color="C8D8E8")
-                cell.border = CELL_BORDER
-                if ri % 2 == 0:
-                    cell.fill = PatternFill("solid", fgColor="0A1628")
-
-        for col, width in zip("ABCD", [22, 18, 48, 12]):
-            ws_rel.column_dimensions[col].width = width
-
-        buf = io.BytesIO()
-        wb.save(buf)
-        return buf.getvalue()
+# ── Download artifacts ────────────────────────────────────────────────────────
+def artifact(kind: str, build: Callable[[], bytes]) -> bytes:
+    """Build a download payload once per dataset and reuse it on every rerun.
+
+    Entries are keyed by the dataset's content hash, so a new synthesis
+    never serves stale bytes; the store is cleared when synthesis starts.
+    """
+    key = f"{st.session_state.dataset_hash}:{kind}"
+    store = st.session_state.artifacts
+    if key not in store:
+        store[key] = build()
+    return store[key]
+
+
+# ── Shared client ─────────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def shared_client(key_fp: str, _api_key: str):
+    """One OpenAI client (and connection pool) per API key across all sessions.
+
+    Cached on the key's fingerprint; the leading underscore keeps the raw key
+    out of Streamlit's cache hashing.
+    """
+    return clients.get_client(_api_key)
+
+
+# ── Background jobs ───────────────────────────────────────────────────────────
+@st.cache_resource(show_spinner=False)
+def job_runner() -> JobRunner:
+    """One bounded worker pool per server; jobs outlive reruns and page refreshes."""
+    return JobRunner()
+
+
+def run_synthesis(
+    job: Job,
+    run: SyntheticDataGenerator,
+    brief: str,
+    mode: str,
+    num_rows: int,
+    regenerate_schema: bool,
+    previous: Tuple[Dict, Dict[str, pd.DataFrame]] | None,
+) -> Tuple[Dict, Dict[str, pd.DataFrame], SyntheticDataGenerator, None]:
+    """All three agents on a job worker thread; no Streamlit calls in here.
+
+    Returns ``(schema, tables, run, None)``; ``run`` carries the run's reports.
+    The last slot is the manifest of a streamed run (see ``run_stream``) and
+    is always empty here. Rows are published with ``job.show`` while the
+    tables generate.
+    """
+    run.should_stop = lambda: job.cancelled
+
+    job.update(0.05, "🤖 AGENT 01 — Parsing schema…")
+    schema = run.generate_schema(brief, mode, num_rows, regenerate=regenerate_schema)
+
+    tables_def: List[Dict] = schema["tables"]
+    levels = run.dependency_levels(tables_def)
+    total = len(tables_def)
+    finished: List[str] = []
+    # the last rows streamed in from worker threads, per table, for the live preview
+    live_headers: Dict[str, List[str]] = {}
+    live_tails: Dict[str, Deque[List[str]]] = {}
+    live_counts: Dict[str, int] = {}
+    streamed = {"rows": 0}
+    lock = threading.Lock()
+
+    def on_table_done(tname: str, df: pd.DataFrame):
+        finished.append(tname)
+        job.update(0.2 + 0.6 * len(finished) / total,
+                   f"🤖 AGENT 02 — Generated table {len(finished)}/{total}: {tname} ({len(df)} rows)")
+
+    def on_rows(tname: str, header: List[str], rows: List[List[str]]):
+        with lock:
+            n = len(live_headers.setdefault(tname, header))
+            tail = live_tails.setdefault(tname, deque(maxlen=PREVIEW_ROWS))
+            tail.extend(r[:n] + [""] * (n - len(r)) for r in rows)
+            live_counts[tname] = live_counts.get(tname, 0) + len(rows)
+            streamed["rows"] += len(rows)
+            count = streamed["rows"]
+            job.show(tname, (live_headers[tname], live_counts[tname], list(tail)))
+        if not finished:
+            job.update(message=f"🤖 AGENT 02 — {count} rows streamed…")
+
+    job.update(0.2, f"🤖 AGENT 02 — Generating {total} table(s) across {len(levels)} dependency level(s)…")
+    prev_schema, prev_tables = previous or (None, None)
+    generated = run.generate_tables(
+        tables_def, num_rows, on_table_done, on_rows,
+        previous_schema=prev_schema, previous_tables=prev_tables,
+    )
+    job.clear_partial()
+
+    job.update(0.85, "🤖 AGENT 03 — Validating referential integrity…")
+    generated = run.validate_and_repair(generated, schema, only=run.affected_tables())
+    return schema, generated, run, None
+
+
+def run_stream(
+    job: Job,
+    run: SyntheticDataGenerator,
+    brief: str,
+    mode: str,
+    num_rows: int,
+    regenerate_schema: bool,
+    out_dir: str,
+    formats: List[str],
+) -> Tuple[Dict, Dict[str, pd.DataFrame], SyntheticDataGenerator, Dict]:
+    """``run_synthesis`` for streamed runs: tables go to ``out_dir`` chunk by chunk.
+
+    Returns ``(schema, samples, run, manifest)``; only the head samples are
+    kept in memory.
+    """
+    run.should_stop = lambda: job.cancelled
+    job.update(0.05, "🤖 AGENT 01 — Parsing schema…")
+    written: Dict[str, int] = {}
+
+    def on_progress(tname: str, done: int, total: int):
+        written[tname] = done
+        planned = sum(run.row_counts.values()) or 1
+        job.update(0.1 + 0.85 * sum(written.values()) / planned,
+                   f"💾 Streaming {tname}: {done:,} / {total:,} rows on disk")
+
+    schema, manifest, samples = stream_synthesis(
+        run, brief, mode, num_rows, out_dir, formats,
+        regenerate_schema=regenerate_schema, on_progress=on_progress,
+    )
+    return schema, samples, run, {**manifest, "dir": out_dir}
+
+
+def load_result(gen: SyntheticDataGenerator, job: Job) -> None:
+    """Make a finished job's dataset (and its reports) the session's current one.
+
+    For a streamed run, ``tables`` holds only the head samples and
+    ``stream_manifest`` points at the files.
+    """
+    schema, tables, run, manifest = job.result
+    st.session_state.schema = schema
+    st.session_state.tables = tables
+    st.session_state.stream_manifest = manifest
+    st.session_state.artifacts = {}
+    st.session_state.dataset_hash = dataset_fingerprint(tables, schema)
+    for attr in ("telemetry", "integrity_report", "coercion_report", "row_report", "row_counts", "refresh_plan"):
+        setattr(gen, attr, getattr(run, attr))
+    st.session_state.loaded_job = job.id
+
+
+def jobs_panel(gen: SyntheticDataGenerator):
+    runner = job_runner()
+    owner = st.session_state.owner
+    jobs = runner.jobs_for(owner)
+    stats = runner.stats()
+    st.markdown("## 🛰️ SYNTHESIS JOBS")
+    st.caption(f"{stats['running']}/{stats['workers']} workers busy · {stats['queued']} queued on this server")
+
+    # The newest finished job is loaded once, automatically
+    newest_done = next((j for j in jobs if j.status == DONE), None)
+    if newest_done and newest_done.id not in st.session_state.seen_jobs:
+        st.session_state.seen_jobs.add(newest_done.id)
+        load_result(gen, newest_done)
+        st.rerun()
+
+    for job in jobs:
+        info = job.snapshot()
+        head = f"`{info['id']}` · {info['label'] or 'brief'} · **{info['status'].upper()}**"
+        if info["elapsed_s"]:
+            head += f" · {info['elapsed_s']:.0f}s"
+        st.markdown(head)
+        if info["status"] not in FINISHED:
+            st.progress(info["progress"], text=info["message"])
+            for tname, (header, n_rows, tail) in info["partial"].items():
+                st.caption(f"▸ {tname} — {n_rows} rows streamed")
+                st.dataframe(pd.DataFrame(tail, columns=header), use_container_width=True, height=180)
+            if st.button("✖ Cancel", key=f"cancel-{info['id']}"):
+                runner.cancel(info["id"], owner)
+                st.rerun(scope="fragment")
+        elif info["status"] == FAILED:
+            st.markdown(f'<p class="status-err">❌ SYNTHESIS ERROR: {info["error"]}</p>', unsafe_allow_html=True)
+        elif info["status"] == DONE:
+            if st.session_state.get("loaded_job") == info["id"]:
+                st.markdown('<p class="status-ok">✅ DATA SYNTHESIS COMPLETE — shown below</p>', unsafe_allow_html=True)
+            elif st.button("📂 Load", key=f"load-{info['id']}"):
+                load_result(gen, job)
+                st.rerun()
+        if info["status"] in FINISHED and st.button("🗑 Dismiss", key=f"forget-{info['id']}"):
+            manifest = job.result[3] if job.result else None
+            if manifest and st.session_state.get("loaded_job") != info["id"]:
+                shutil.rmtree(manifest["dir"], ignore_errors=True)  # streamed files nobody can load any more
+            runner.forget(info["id"], owner)
+            st.rerun(scope="fragment")
+
+
+def stream_downloads(manifest: Dict) -> None:
+    """Serve a streamed run's files from disk.
+
+    Files up to ``STREAM_DOWNLOAD_MAX_BYTES`` get a download button. Larger
+    ones get a link when Streamlit's static serving covers the output folder
+    (``server.enableStaticServing`` and a folder under ``./static``), and
+    otherwise their path on the server.
+    """
+    root = manifest["dir"]
+    static = st.get_option("server.enableStaticServing") and os.path.abspath(root).startswith(STATIC_DIR + os.sep)
+    files = [(t["name"], fmt, f) for t in manifest["tables"] for fmt, f in t["files"].items()]
+    files += [(None, "json", "manifest.json"), (None, "json", "schema.json")]
+    st.markdown("**Streamed files:**")
+    for table, fmt, fname in files:
+        path = os.path.join(root, fname)
+        if not os.path.exists(path):
+            st.caption(f"⚠️ {fname} is no longer on disk")
+            continue
+        size = os.path.getsize(path)
+        label = f"📥 {fname} ({size / 1e6:,.1f} MB)"
+        if size <= STREAM_DOWNLOAD_MAX_BYTES:
+            with open(path, "rb") as fh:
+                st.download_button(label, fh, file_name=f"fauxfoundry_{fname}", use_container_width=True,
+                                   key=f"stream_{root}_{fname}")
+        elif static:
+            url = "app/static/" + os.path.relpath(os.path.abspath(path), STATIC_DIR).replace(os.sep, "/")
+            st.markdown(f"[{label}]({url})")
+        else:
+            st.caption(f"{label} — too large to serve here; on the server at `{os.path.abspath(path)}`")
 
 
 # ── Streamlit UI ───────────────────────────────────────────────────────────────
@@ -401,6 +343,16 @@ def main():
         st.session_state.schema = None
     if "tables" not in st.session_state:
         st.session_state.tables = {}
+    if "stream_manifest" not in st.session_state:
+        st.session_state.stream_manifest = None
+    if "artifacts" not in st.session_state:
+        st.session_state.artifacts = {}
+        st.session_state.dataset_hash = None
+    if "owner" not in st.session_state:
+        # Kept in the URL so a page refresh finds its jobs again
+        st.session_state.owner = st.query_params.get("session") or uuid.uuid4().hex[:16]
+        st.query_params["session"] = st.session_state.owner
+        st.session_state.seen_jobs = set()
 
     gen: SyntheticDataGenerator = st.session_state.generator
 
@@ -411,8 +363,12 @@ def main():
         api_key = st.text_input("🧠 OpenAI API Key", type="password")
         if api_key and st.button("🔧 INITIALIZE"):
             with st.spinner("Connecting…"):
-                ok = gen.setup(api_key)
+                key_fp = clients.key_fingerprint(api_key)
+                ok = gen.setup(api_key, client=shared_client(key_fp, api_key))
+                st.session_state.key_fp = key_fp
                 st.session_state.api_ok = ok
+            if not ok:
+                st.error(f"OpenAI setup failed: {gen.setup_error}")
             if ok:
                 st.markdown('<p class="status-ok">⚡ Neural link active</p>', unsafe_allow_html=True)
             else:
@@ -429,14 +385,145 @@ def main():
 
         mode = st.selectbox(
             "Mode",
-            ["Simple (Single Table)", "Advanced (Relational / Multi-Table)"],
+            [MODE_SIMPLE, MODE_RELATIONAL],
             help="Choose Simple for a single table, Advanced for multi-table relational datasets",
         )
-        num_rows = st.slider("Base row count", min_value=10, max_value=500, value=50, step=10)
+        output_format = st.selectbox(
+            "LLM output format",
+            ["Markdown table", "Headerless CSV", "JSON rows"],
+            help="Compact formats spend fewer output tokens per row, so each call returns more rows.",
+        )
+        gen.output_format = {"Markdown table": "markdown", "Headerless CSV": "csv", "JSON rows": "json"}[output_format]
+        engine = st.radio(
+            "Row engine",
+            ["LLM (all columns)", "Local (typed columns) + LLM text"],
+            help="Local mode fills numeric, date, email, phone, address and url columns in-process; "
+                 "the LLM only writes a small pool of free-text values per table.",
+        )
+        seed = int(st.number_input(
+            "Random seed", min_value=0, value=42, step=1,
+            help="Seeds foreign-key assignment and the local row engine (also used for large tables in LLM mode).",
+        ))
+        if gen.bulk_engine.seed != seed:
+            gen.bulk_engine = LocalRowEngine(seed=seed)
+        if engine == "LLM (all columns)":
+            num_rows = st.slider("Base row count", min_value=10, max_value=5000, value=50, step=10)
+            gen.local_engine = None
+        else:
+            num_rows = int(st.number_input("Base row count", min_value=10, max_value=5_000_000, value=10_000, step=1000))
+            if gen.local_engine is None or gen.local_engine.seed != seed:
+                gen.local_engine = LocalRowEngine(seed=seed)
+            gen.shard_workers = int(st.number_input(
+                "CPU workers", min_value=1, max_value=os.cpu_count() or 1,
+                value=min(DEFAULT_SHARD_WORKERS, os.cpu_count() or 1), step=1,
+                help="Processes that build large tables in parallel row shards. "
+                     "Output depends on the seed only, not on the number of workers.",
+            ))
+
+        table_sizes = st.text_input(
+            "Table sizes (optional)",
+            placeholder="Customers=500, Orders=20x",
+            help="Per-table row counts: Table=N for a fixed count, Table=Nx for N rows per parent row. "
+                 f"Tables over {SyntheticDataGenerator.LLM_MAX_ROWS:,} rows are built by the local engine.",
+        )
+        try:
+            gen.row_overrides, gen.fan_out_ratios = parse_row_spec(table_sizes)
+        except ValueError as e:
+            st.error(str(e))
+            gen.row_overrides, gen.fan_out_ratios = {}, {}
+
+        fk_labels = {
+            "Uniform": "uniform",
+            "Skewed (Zipf)": "zipf",
+            "Fixed children per parent": "fixed",
+            "Every parent at least once": "cover",
+        }
+        fk_dist = st.selectbox(
+            "FK distribution",
+            list(fk_labels),
+            help="How child rows are spread over parent rows. FK values are assigned locally "
+                 "from the parent's keys, never generated by the LLM.",
+        )
+        fk_rule = {"kind": fk_labels[fk_dist]}
+        if fk_rule["kind"] == "zipf":
+            fk_rule["s"] = st.slider("Skew (Zipf s)", min_value=0.5, max_value=3.0, value=1.2, step=0.1)
+        elif fk_rule["kind"] == "fixed":
+            fk_rule["per_parent"] = int(st.number_input("Children per parent", min_value=1, value=3, step=1))
+        gen.fk_assigner = ForeignKeyAssigner(seed=seed, default=fk_rule)
+        fan_out = st.text_input(
+            "Fan-out bounds (optional)",
+            placeholder="Orders.customer_id=1-50",
+            help="Children each parent row may have, per relationship (Child.fk_column=MIN-MAX; "
+                 "either bound may be left out). Parents outside the bounds are reported after the run.",
+        )
+        try:
+            gen.integrity = IntegrityEngine(fan_out=parse_fan_out(fan_out))
+        except ValueError as e:
+            st.error(str(e))
+            gen.integrity = IntegrityEngine()
+
+        stream_to_disk = st.checkbox(
+            "Stream to disk", value=False,
+            help="Write tables straight to CSV (and Parquet) files in chunks instead of holding them in memory, "
+                 "for datasets larger than RAM. Only a sample is previewed; files are served for download.",
+        )
+        stream_formats = ["csv"]
+        if stream_to_disk and st.checkbox("Also write Parquet", value=False, help="Typed Parquet files; needs pyarrow."):
+            stream_formats.append("parquet")
+
+        incremental = st.checkbox(
+            "Update previous dataset", value=True,
+            help="Re-running keeps tables whose schema is unchanged and only generates added rows. "
+                 "Untick to rebuild everything (e.g. after changing the row engine or FK distribution).",
+        )
+
+        st.markdown("---")
+        st.markdown("### 🗄️ RESPONSE CACHE")
+        use_cache = st.checkbox(
+            "Cache LLM responses", value=True,
+            help="Identical requests (same prompt, model, temperature and token cap) are served from disk.",
+        )
+        replay_only = st.checkbox(
+            "Replay only (offline)", value=False, disabled=not use_cache,
+            help="Never call the API; fail if a response is not already cached.",
+        )
+        if use_cache:
+            if gen.cache is None:
+                gen.cache = ResponseCache()
+            gen.cache.replay_only = replay_only
+            stats = gen.cache.stats()
+            st.caption(
+                f"{stats['entries']} entries · {stats['bytes'] / 1e6:.1f} MB · "
+                f"hits {stats['hits']} / misses {stats['misses']}"
+            )
+            if st.button("🧹 CLEAR CACHE"):
+                gen.cache.clear()
+        else:
+            gen.cache = None
+
+        reuse_schemas = st.checkbox(
+            "Reuse schemas for repeated briefs", value=True,
+            help="Briefs that match a previous one (ignoring case, spacing and numbers) skip the schema call.",
+        )
+        regenerate_schema = False
+        if reuse_schemas:
+            if gen.schema_store is None:
+                gen.schema_store = SchemaStore()
+            regenerate_schema = st.checkbox("Force new schema", value=False,
+                                            help="Design the schema again and replace the stored one.")
+            stored = gen.schema_store.stats()
+            st.caption(
+                f"{stored['entries']} schemas · reused {stored['hits'] + stored['near_hits']} "
+                f"({stored['near_hits']} near-duplicate)"
+            )
+            if st.button("🧹 FORGET SCHEMAS"):
+                gen.schema_store.clear()
+        else:
+            gen.schema_store = None
 
         st.markdown("---")
         st.markdown("### 📖 QUICK GUIDE")
-        if mode == "Simple (Single Table)":
+        if mode == MODE_SIMPLE:
             st.caption("Describe your table in plain English. E.g.: *Create a dataset of 50 employees with name, age, department, salary, and hire date.*")
         else:
             st.caption("Paste your full project brief or table requirements. The engine will extract all tables, columns, and relationships automatically.")
@@ -449,84 +536,49 @@ def main():
 
         placeholder = (
             "Describe your single table here.\n\nExample: Create a dataset about employees with columns for name, age, department, salary, and hire date."
-            if mode == "Simple (Single Table)"
+            if mode == MODE_SIMPLE
             else
             "Paste your full project brief here.\n\nExample:\n\nCustomer Churn Analysis\nTable: Customers — CustomerID, Name, Age, Gender, Region, Tenure, Churn\nTable: Usage — CustomerID, CallMinutes, DataUsage, MessagesSent\nTable: Feedback — CustomerID, SatisfactionScore, Complaints\nRelationships: Usage.CustomerID → Customers.CustomerID; Feedback.CustomerID → Customers.CustomerID"
         )
         brief = st.text_area("Transmit your requirements:", placeholder=placeholder, height=180)
 
-        ready = linked and bool(brief.strip())
+        ready = (linked or gen.offline) and bool(brief.strip())
 
         if st.button("⚡ INITIATE DATA SYNTHESIS", disabled=not ready):
-            st.session_state.schema  = None
-            st.session_state.tables  = {}
-
-            prog = st.progress(0)
-            status = st.empty()
-
-            try:
-                # ── Agent 1 ── schema ──────────────────────────────────────────
-                status.markdown('<p class="agent-label">🤖 AGENT 01 — Parsing schema…</p>', unsafe_allow_html=True)
-                prog.progress(5)
-                with st.spinner("Generating schema…"):
-                    schema = gen.generate_schema(brief, mode, num_rows)
-                st.session_state.schema = schema
-                prog.progress(20)
-
-                st.markdown('<div class="panel"><div class="agent-label">AGENT 01 OUTPUT — SCHEMA MATRIX</div></div>', unsafe_allow_html=True)
-                st.json(schema)
-
-                tables_def: List[Dict] = schema["tables"]
-                generated: Dict[str, pd.DataFrame] = {}
-                parent_ids: Dict[str, List] = {}
-
-                total = len(tables_def)
-                for idx, tbl in enumerate(tables_def):
-                    tname = tbl["name"]
-                    pct_start = 20 + int(60 * idx / total)
-                    pct_end   = 20 + int(60 * (idx + 1) / total)
-
-                    status.markdown(
-                        f'<p class="agent-label">🤖 AGENT 02 — Generating table {idx+1}/{total}: <strong>{tname}</strong>…</p>',
-                        unsafe_allow_html=True,
-                    )
-                    prog.progress(pct_start)
-
-                    with st.spinner(f"Fabricating {tname}…"):
-                        df = gen.generate_table_data(tbl, num_rows, parent_ids if tbl.get("foreign_keys") else None)
-                    generated[tname] = df
-
-                    # Register this table's PK values for child FK constraints
-                    pk = tbl.get("primary_key")
-                    if pk and pk in df.columns:
-                        parent_ids[f"{tname}.{pk}"] = df[pk].tolist()
-
-                    prog.progress(pct_end)
-
-                # ── Agent 3 ── validate & repair ───────────────────────────────
-                status.markdown('<p class="agent-label">🤖 AGENT 03 — Validating referential integrity…</p>', unsafe_allow_html=True)
-                prog.progress(85)
-                with st.spinner("Running integrity checks…"):
-                    generated = gen.validate_and_repair(generated, schema)
-
-                st.session_state.tables = generated
-                prog.progress(100)
-                status.markdown('<p class="status-ok">✅ DATA SYNTHESIS COMPLETE</p>', unsafe_allow_html=True)
-                st.markdown('<p class="status-ok">⚡ All tables generated and verified.</p>', unsafe_allow_html=True)
-
-            except Exception as e:
-                st.markdown(f'<p class="status-err">❌ SYNTHESIS ERROR: {e}</p>', unsafe_allow_html=True)
-                prog.empty()
-                status.empty()
+            previous = None
+            if (incremental and st.session_state.schema and st.session_state.tables
+                    and not st.session_state.stream_manifest):  # a streamed run only has samples in memory
+                previous = (st.session_state.schema, st.session_state.tables)
+            run = gen.fork()  # settings as of now; the session's generator stays free
+            if stream_to_disk:
+                out_dir = os.path.join(DEFAULT_STREAM_DIR, st.session_state.owner, uuid.uuid4().hex[:12])
+                work = lambda job: run_stream(job, run, brief, mode, num_rows, regenerate_schema, out_dir, stream_formats)
+            else:
+                work = lambda job: run_synthesis(job, run, brief, mode, num_rows, regenerate_schema, previous)
+            job = job_runner().submit(st.session_state.owner, " ".join(brief.split())[:60], work)
+            st.toast(f"Job {job.id} queued")
+
+        jobs = job_runner().jobs_for(st.session_state.owner)
+        if jobs:
+            active = any(j.status not in FINISHED for j in jobs)
+            # poll only while something is queued or running
+            st.fragment(run_every=1.0 if active else None)(jobs_panel)(gen)
 
         # ── Table preview tabs ─────────────────────────────────────────────────
         if st.session_state.tables:
+            if st.session_state.schema:
+                with st.expander("AGENT 01 OUTPUT — SCHEMA MATRIX"):
+                    st.json(st.session_state.schema)
             st.markdown("## 📊 GENERATED DATA MATRICES")
+            manifest = st.session_state.stream_manifest
+            streamed_rows = {t["name"]: t["rows"] for t in manifest["tables"]} if manifest else {}
             tab_names = list(st.session_state.tables.keys())
             tabs = st.tabs([f"📋 {n}" for n in tab_names])
             for tab, name in zip(tabs, tab_names):
                 with tab:
                     df = st.session_state.tables[name]
+                    if manifest:
+                        st.caption(f"Preview — first {len(df):,} of {streamed_rows.get(name, len(df)):,} rows on disk")
                     st.dataframe(df, use_container_width=True, height=300)
 
             # Relationship summary
@@ -548,46 +600,156 @@ def main():
         if st.session_state.schema and st.session_state.tables:
             schema  = st.session_state.schema
             tables  = st.session_state.tables
+            manifest = st.session_state.stream_manifest
+            # streamed runs keep only samples in memory; their sizes come from the manifest
+            row_totals = {t["name"]: t["rows"] for t in manifest["tables"]} if manifest else {n: len(df) for n, df in tables.items()}
 
             st.metric("Tables Generated", len(tables))
             total_cols = sum(len(df.columns) for df in tables.values())
             st.metric("Total Columns",    total_cols)
-            total_rows = sum(len(df) for df in tables.values())
+            total_rows = sum(row_totals.values())
             st.metric("Total Rows",       total_rows)
+            if manifest:
+                on_disk = sum(sum(t["bytes"].values()) for t in manifest["tables"])
+                st.caption(f"💾 Streamed to disk — {on_disk / 1e6:,.1f} MB in `{manifest['dir']}`")
+
+            report = gen.integrity_report
+            if report:
+                caption = (
+                    f"🛡️ Integrity — {report['fk_repairs']} FK repairs · "
+                    f"{report['pk_duplicates_dropped']} duplicate PKs dropped"
+                )
+                if report.get("fan_out_rules"):
+                    caption += f" · {report['fan_out_violations']} fan-out violations"
+                st.caption(caption)
+            api = gen.caller.stats()
+            if api["calls"]:
+                st.caption(
+                    f"🚦 API — {api['calls']} calls · {api['retries']} retries · "
+                    f"{api['throttled_s']:.1f}s throttled · circuit {api['circuit'].replace('_', '-')}"
+                )
+            pool = clients.pool_stats().get(st.session_state.get("key_fp"))
+            if pool and pool["requests"]:
+                st.caption(
+                    f"🔌 Connection pool — {pool['connections']}/{pool['max_connections']} open · "
+                    f"peak {pool['peak_in_flight']} in flight · {pool['queued']} queued now · "
+                    f"shared by every session on this key"
+                )
+            coercion = gen.coercion_report
+            if coercion:
+                st.caption(
+                    f"🗜️ Typed columns — {coercion['bytes_before'] / 1024:,.0f} KB → "
+                    f"{coercion['bytes_after'] / 1024:,.0f} KB in memory · "
+                    f"{coercion['failed_values']} values failed to parse"
+                )
+                failed = {
+                    f"{t}.{c}": e for t, entry in coercion["tables"].items()
+                    for c, e in entry["columns"].items() if e["failed"]
+                }
+                if failed:
+                    with st.expander("Coercion failures"):
+                        st.json(failed)
+
+            perf = gen.telemetry.summary()
+            if perf["stages"]:
+                st.markdown("### ⏱️ PERFORMANCE")
+                llm = perf["llm"]
+                c1, c2 = st.columns(2)
+                c1.metric("Rows / sec", f"{perf['rows_per_s']:,.0f}")
+                c2.metric("Est. cost", f"${llm['cost_usd']:.4f}")
+                st.caption(
+                    f"{llm['calls']} LLM calls ({llm['cached']} cached) · "
+                    f"{llm['prompt_tokens']:,} prompt / {llm['completion_tokens']:,} completion tokens · "
+                    f"{llm['queue_wait_s']:.1f}s queued · {perf['parse']['rejected']} rows rejected · "
+                    f"{perf['parse']['failed']} failed parses · "
+                    f"{perf['parse']['truncated']} truncated calls"
+                )
+                st.dataframe(
+                    pd.DataFrame(
+                        [{"stage": k, "runs": v["count"], "wall s": round(v["wall_s"], 3)} for k, v in perf["stages"].items()]
+                    ),
+                    use_container_width=True,
+                    hide_index=True,
+                )
+                d1, d2 = st.columns(2)
+                d1.download_button("📥 METRICS .jsonl", gen.telemetry.to_jsonl(), "fauxfoundry_metrics.jsonl",
+                                   mime="application/x-ndjson", use_container_width=True)
+                d2.download_button("📥 METRICS .prom", gen.telemetry.to_prometheus(), "fauxfoundry_metrics.prom",
+                                   mime="text/plain", use_container_width=True)
 
             st.markdown("---")
             st.markdown("### TABLE BREAKDOWN")
             for name, df in tables.items():
+                rows_info = gen.row_report.get(name, {})
+                n_rows = row_totals.get(name, len(df))
+                rows_label = f"{n_rows} rows"
+                if rows_info.get("requested", n_rows) != n_rows:
+                    rows_label = f"{n_rows} / {rows_info['requested']} rows"
+                if rows_info.get("engine") == "local" and gen.local_engine is None:
+                    rows_label += " &nbsp;·&nbsp; bulk local engine"
+                if rows_info.get("refresh") in ("keep", "truncate"):
+                    rows_label += " &nbsp;·&nbsp; reused from last run"
+                elif rows_info.get("refresh") == "extend":
+                    rows_label += " &nbsp;·&nbsp; extended from last run"
+                if rows_info.get("truncated_calls"):
+                    rows_label += f" &nbsp;·&nbsp; {rows_info['truncated_calls']} truncated calls continued"
                 st.markdown(
                     f'<div class="panel"><span style="color:#00d4ff;font-size:0.75rem;">'
                     f'▸ {name}</span><br/>'
-                    f'<span style="color:#4080b0;font-size:0.7rem;">{len(df.columns)} cols &nbsp;·&nbsp; {len(df)} rows</span></div>',
+                    f'<span style="color:#4080b0;font-size:0.7rem;">{len(df.columns)} cols &nbsp;·&nbsp; {rows_label}</span></div>',
                     unsafe_allow_html=True,
                 )
 
         st.markdown("---")
         st.markdown("## 💾 DATA EXTRACTION")
 
-        if st.session_state.tables and st.session_state.schema:
-            # Excel multi-sheet
-            with st.spinner("Building Excel workbook…"):
-                excel_bytes = gen.build_excel(st.session_state.tables, st.session_state.schema)
+        if st.session_state.stream_manifest:
+            stream_downloads(st.session_state.stream_manifest)
+        elif st.session_state.tables and st.session_state.schema:
+            tables = st.session_state.tables
+            schema = st.session_state.schema
+            xlsx_key = f"{st.session_state.dataset_hash}:xlsx"
+
+            # Excel multi-sheet — only built when asked for, then kept
+            if xlsx_key not in st.session_state.artifacts:
+                if st.button("⚙️ BUILD EXCEL WORKBOOK", use_container_width=True):
+                    with st.spinner("Building Excel workbook…"):
+                        artifact("xlsx", lambda: gen.build_excel(tables, schema))
+            if xlsx_key in st.session_state.artifacts:
+                st.download_button(
+                    label="📥 DOWNLOAD EXCEL (.xlsx)",
+                    data=st.session_state.artifacts[xlsx_key],
+                    file_name="fauxfoundry_dataset.xlsx",
+                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                    use_container_width=True,
+                )
 
-            st.download_button(
-                label="📥 DOWNLOAD EXCEL (.xlsx)",
-                data=excel_bytes,
-                file_name="fauxfoundry_dataset.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                use_container_width=True,
-            )
+            # Typed columnar bundle — Parquet files + manifest, built on request
+            parquet_key = f"{st.session_state.dataset_hash}:parquet"
+            if parquet_key not in st.session_state.artifacts:
+                if st.button("⚙️ BUILD PARQUET BUNDLE", use_container_width=True):
+                    try:
+                        import parquet_export  # export-only; kept off the cold-start path
+
+                        with st.spinner("Writing typed Parquet files…"):
+                            artifact("parquet", lambda: parquet_export.build_bundle(tables, schema))
+                    except ImportError as e:
+                        st.caption(f"⚠️ {e}")
+            if parquet_key in st.session_state.artifacts:
+                st.download_button(
+                    label="📥 DOWNLOAD PARQUET (.zip)",
+                    data=st.session_state.artifacts[parquet_key],
+                    file_name="fauxfoundry_parquet.zip",
+                    mime="application/zip",
+                    use_container_width=True,
+                )
 
             # Individual CSV per table
             st.markdown("**Per-table CSV downloads:**")
-            for name, df in st.session_state.tables.items():
-                csv_bytes = df.to_csv(index=False).encode()
+            for name, df in tables.items():
                 st.download_button(
                     label=f"📥 {name}.csv",
-                    data=csv_bytes,
+                    data=artifact(f"csv:{name}", lambda df=df: df.to_csv(index=False).encode()),
                     file_name=f"fauxfoundry_{name.lower()}.csv",
                     mime="text/csv",
                     use_container_width=True,
@@ -597,7 +759,7 @@ def main():
             # Schema JSON
             st.download_button(
                 label="📥 SCHEMA JSON",
-                data=json.dumps(st.session_state.schema, indent=2),
+                data=artifact("schema", lambda: json.dumps(schema, indent=2).encode()),
                 file_name="fauxfoundry_schema.json",
                 mime="application/json",
                 use_container_width=True,
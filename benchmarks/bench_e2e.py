@@ -0,0 +1,161 @@
+"""End-to-end pipeline benchmark against the offline stub LLM server.
+
+For every combination of ``--rows`` and ``--tables`` this times:
+
+* ``pipeline``   — ``synthesize`` through a real OpenAI client pointed at
+  ``stub_llm_server`` (tables over ``LLM_MAX_ROWS`` take the local path, as
+  they would in production)
+* ``schema_parse`` — fence stripping + ``json.loads`` of the schema reply
+* ``markdown_parse`` — ``_markdown_to_df`` on a markdown table of ``rows`` rows
+* ``validate``   — ``validate_and_repair`` (coercion + integrity)
+* ``excel``      — ``build_excel`` (skipped above ``--excel-cells``)
+* ``csv``        — ``DataFrame.to_csv`` of every table
+
+Results are appended to ``benchmarks/results/e2e.jsonl`` together with the git
+commit and library versions, and each timing is compared with the previous
+stored run of the same size; anything more than ``--threshold`` slower is
+flagged. Runs fully offline.
+
+    python benchmarks/bench_e2e.py --rows 10 1000 100000 --tables 1 5 20
+    python benchmarks/bench_e2e.py --rows 1000000 --tables 1 --excel-cells 0
+"""
+import argparse
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from openai import OpenAI  # noqa: E402
+
+from generator import MODE_RELATIONAL, SyntheticDataGenerator  # noqa: E402
+from resilience import RateLimiter, ResilientCaller  # noqa: E402
+from stub_llm_server import StubLLMServer, stub_rows, stub_schema  # noqa: E402
+
+RESULTS = os.path.join(os.path.dirname(__file__), "results", "e2e.jsonl")
+
+
+def timed(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return time.perf_counter() - t0, out
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(__file__), check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def run_case(server: StubLLMServer, rows: int, n_tables: int, excel_cells: int) -> dict:
+    server.tables = n_tables
+    gen = SyntheticDataGenerator(
+        caller=ResilientCaller(RateLimiter(1e9, 1e12)),  # measure the pipeline, not the throttle
+    )
+    gen.client = OpenAI(api_key="stub", base_url=server.base_url, max_retries=0)
+    timings = {}
+
+    timings["pipeline"], (schema, tables) = timed(gen.synthesize, "benchmark", MODE_RELATIONAL, rows)
+
+    raw = "```json\n" + json.dumps(stub_schema(n_tables)) + "\n```"
+    timings["schema_parse"], _ = timed(lambda: json.loads(gen._strip_fences(raw)))
+
+    md = stub_rows(schema["tables"][0]["columns"], rows, 1, "markdown", random.Random(0))
+    timings["markdown_parse"], _ = timed(gen._markdown_to_df, md)
+
+    # validate on the raw (string) form the parsers hand over
+    raw_tables = {name: df.astype(str) for name, df in tables.items()}
+    timings["validate"], typed = timed(gen.validate_and_repair, raw_tables, schema)
+
+    cells = sum(df.size for df in typed.values())
+    if cells <= excel_cells:
+        timings["excel"], _ = timed(gen.build_excel, typed, schema)
+
+    def to_csv():
+        for df in typed.values():
+            df.to_csv(io.StringIO(), index=False)
+    timings["csv"], _ = timed(to_csv)
+
+    return {
+        "rows": rows,
+        "tables": n_tables,
+        "cells": int(cells),
+        "llm_calls": gen.telemetry.summary()["llm"]["calls"],
+        "timings": {k: round(v, 6) for k, v in timings.items()},
+    }
+
+
+def previous_results(path: str) -> dict:
+    last = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as fh:
+            for line in fh:
+                rec = json.loads(line)
+                last[(rec["rows"], rec["tables"], rec.get("latency_ms", 0))] = rec
+    return last
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="+", default=[10, 1_000, 100_000])
+    ap.add_argument("--tables", type=int, nargs="+", default=[1, 5, 20])
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="stub latency per response")
+    ap.add_argument("--excel-cells", type=int, default=2_000_000, help="skip Excel above this many cells")
+    ap.add_argument("--threshold", type=float, default=0.2, help="flag timings this much slower than last run")
+    ap.add_argument("--results", default=RESULTS, help="JSON-lines file results are appended to")
+    ap.add_argument("--no-save", action="store_true")
+    args = ap.parse_args()
+
+    # The stub has no HTTP proxy in front of it
+    os.environ.setdefault("NO_PROXY", "127.0.0.1,localhost")
+    server = StubLLMServer(latency_s=args.latency_ms / 1000).start()
+    previous = previous_results(args.results)
+    meta = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "latency_ms": args.latency_ms,
+    }
+
+    stages = ["pipeline", "schema_parse", "markdown_parse", "validate", "excel", "csv"]
+    print(f"{'rows':>9} {'tables':>6} " + " ".join(f"{s:>14}" for s in stages))
+    records = []
+    try:
+        for n_tables in args.tables:
+            for rows in args.rows:
+                rec = {**run_case(server, rows, n_tables, args.excel_cells), **meta, "ts": time.time()}
+                records.append(rec)
+                prev = previous.get((rows, n_tables, args.latency_ms), {}).get("timings", {})
+                cols = []
+                for s in stages:
+                    t = rec["timings"].get(s)
+                    if t is None:
+                        cols.append(f"{'-':>14}")
+                        continue
+                    flag = " !" if s in prev and prev[s] > 0.001 and t > prev[s] * (1 + args.threshold) else ""
+                    cols.append(f"{t:>12.3f}{flag:<2}")
+                print(f"{rows:>9} {n_tables:>6} " + " ".join(cols))
+    finally:
+        server.shutdown()
+
+    if records and not args.no_save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.results)), exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as fh:
+            for rec in records:
+                fh.write(json.dumps(rec) + "\n")
+        print(f"\nSaved {len(records)} results to {args.results} ('!' = over {args.threshold:.0%} slower than last run)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Excel export benchmark: per-cell styled builder vs. write-only streaming builder.
+
+Builds a dataset of the requested cell counts (10 columns of mixed types,
+split across two tables) and times both builders. With ``--memory`` the peak
+Python allocation is tracked with tracemalloc, which slows both runs down.
+
+    python benchmarks/bench_excel.py --cells 10000 100000 1000000 --memory
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from excel_export import build_excel_fast, build_excel_styled  # noqa: E402
+from local_engine import LocalRowEngine  # noqa: E402
+
+COLUMNS = {
+    "id": "integer", "email": "email", "phone": "phone", "address": "address", "joined": "date",
+    "active": "boolean", "score": "integer", "balance": "float", "site": "url", "note": "string",
+}
+
+
+def make_dataset(cells: int):
+    rows = max(1, cells // len(COLUMNS))
+    engine = LocalRowEngine(seed=1)
+    parent = {"name": "Accounts", "primary_key": "id", "foreign_keys": [], "columns": COLUMNS}
+    child = {"name": "Events", "primary_key": "id", "foreign_keys": [], "columns": COLUMNS}
+    tables = {
+        "Accounts": engine.generate(parent, rows // 2),
+        "Events": engine.generate(child, rows - rows // 2),
+    }
+    schema = {"tables": [parent, child], "dataset_description": "benchmark"}
+    return tables, schema
+
+
+def measure(fn, tables, schema, memory: bool):
+    if memory:
+        tracemalloc.start()
+    t0 = time.perf_counter()
+    data = fn(tables, schema)
+    elapsed = time.perf_counter() - t0
+    peak = None
+    if memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return elapsed, peak, len(data)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--cells", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--styled-limit", type=int, default=1_000_000,
+                    help="skip the styled builder above this many cells")
+    ap.add_argument("--memory", action="store_true", help="track peak allocations (slower)")
+    args = ap.parse_args()
+
+    print(f"{'cells':>9} {'builder':<9} {'seconds':>8} {'cells/s':>11} {'peak MB':>8} {'xlsx MB':>8}")
+    for cells in args.cells:
+        tables, schema = make_dataset(cells)
+        builders = [("fast", build_excel_fast)]
+        if cells <= args.styled_limit:
+            builders.insert(0, ("styled", build_excel_styled))
+        for label, fn in builders:
+            secs, peak, size = measure(fn, tables, schema, args.memory)
+            peak_mb = f"{peak / 1e6:8.1f}" if peak is not None else f"{'-':>8}"
+            print(f"{cells:>9} {label:<9} {secs:>8.2f} {cells / secs:>11,.0f} {peak_mb} {size / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
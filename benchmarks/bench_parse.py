@@ -0,0 +1,93 @@
+"""Parse-speed benchmark for the markdown table parser.
+
+Compares the original regex/filter parser with the single-pass
+``MarkdownTableParser``, both on a whole completion and fed in small
+stream-sized chunks, and reports time to first row for the streamed case.
+
+    python benchmarks/bench_parse.py --rows 100 1000 10000 --cols 8
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from table_parser import MarkdownTableParser, markdown_to_df  # noqa: E402
+
+
+def legacy_markdown_to_df(md: str) -> pd.DataFrame:
+    """The pre-streaming parser, kept here as the baseline."""
+    lines = [l for l in md.strip().split("\n") if "|" in l]
+    lines = [l for l in lines if not re.match(r"^[\|\-\:\s]+$", l)]
+    rows = []
+    for l in lines:
+        cells = [c.strip() for c in l.split("|")]
+        cells = [c for c in cells if c != ""]
+        rows.append(cells)
+    headers, data = rows[0], rows[1:]
+    n = len(headers)
+    data = [r[:n] + [""] * (n - len(r)) for r in data]
+    return pd.DataFrame(data, columns=headers)
+
+
+def make_table(rows: int, cols: int) -> str:
+    header = "| " + " | ".join(f"col_{c}" for c in range(cols)) + " |"
+    sep = "|" + "---|" * cols
+    body = [
+        "| " + " | ".join(f"value {r}-{c}" if (r + c) % 7 else "" for c in range(cols)) + " |"
+        for r in range(rows)
+    ]
+    return "\n".join([header, sep, *body])
+
+
+def chunks(text: str, size: int):
+    for i in range(0, len(text), size):
+        yield text[i:i + size]
+
+
+def best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench_stream(md: str, chunk_size: int):
+    parser = MarkdownTableParser()
+    t0 = time.perf_counter()
+    first = None
+    for piece in chunks(md, chunk_size):
+        if parser.feed(piece) and first is None:
+            first = time.perf_counter() - t0
+    parser.close()
+    parser.to_frame()
+    return time.perf_counter() - t0, first
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    ap.add_argument("--cols", type=int, default=8)
+    ap.add_argument("--chunk", type=int, default=16, help="characters per simulated stream delta")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'rows':>8} {'legacy ms':>10} {'one-pass ms':>12} {'stream ms':>10} {'1st row ms':>11} {'rows/s':>12}")
+    for n in args.rows:
+        md = make_table(n, args.cols)
+        legacy = best_of(lambda: legacy_markdown_to_df(md), args.repeat)
+        onepass = best_of(lambda: markdown_to_df(md), args.repeat)
+        stream, first = bench_stream(md, args.chunk)
+        print(
+            f"{n:>8} {legacy * 1e3:>10.1f} {onepass * 1e3:>12.1f} {stream * 1e3:>10.1f} "
+            f"{(first or 0) * 1e3:>11.3f} {n / onepass:>12,.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Output-token comparison of the table formats the model can be asked for.
+
+Renders the same rows as a markdown table (plain and column-padded, as models
+often emit it), headerless CSV and a JSON array-of-arrays, then counts tokens
+per row and how many rows fit in one data call's completion budget.
+
+Uses tiktoken's o200k_base encoding (gpt-4o family) when installed, otherwise
+falls back to a ~4 characters/token estimate.
+
+    python benchmarks/bench_tokens.py --rows 200
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from local_engine import LocalRowEngine  # noqa: E402
+
+SAMPLE_TABLE = {
+    "name": "Customers",
+    "primary_key": "customer_id",
+    "foreign_keys": [],
+    "columns": {
+        "customer_id": "integer",
+        "email": "email",
+        "phone": "phone",
+        "address": "address",
+        "signup_date": "date",
+        "is_active": "boolean",
+        "lifetime_value": "float",
+        "website": "url",
+    },
+}
+
+
+def token_counter():
+    try:
+        import tiktoken
+        enc = tiktoken.get_encoding("o200k_base")
+        return (lambda text: len(enc.encode(text))), "tiktoken o200k_base"
+    except Exception:
+        return (lambda text: max(1, round(len(text) / 4))), "estimate (chars / 4)"
+
+
+def as_markdown(header, rows, pad=False):
+    widths = [max(len(h), *(len(r[i]) for r in rows)) for i, h in enumerate(header)] if pad else None
+
+    def line(cells):
+        if pad:
+            cells = [c.ljust(w) for c, w in zip(cells, widths)]
+        return "| " + " | ".join(cells) + " |"
+
+    sep = "|" + "|".join("-" * ((w + 2) if pad else 3) for w in (widths or header)) + "|"
+    return "\n".join([line(header), sep, *(line(r) for r in rows)])
+
+
+def as_csv(header, rows):
+    buf = io.StringIO()
+    csv.writer(buf, lineterminator="\n").writerows(rows)
+    return buf.getvalue()
+
+
+def as_json(header, rows):
+    return json.dumps({"rows": rows}, separators=(",", ":"))
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200)
+    ap.add_argument("--budget", type=int, default=3500, help="completion tokens per call")
+    args = ap.parse_args()
+
+    df = LocalRowEngine(seed=7).generate(SAMPLE_TABLE, args.rows)
+    header = list(df.columns)
+    rows = df.astype(str).values.tolist()
+    count, method = token_counter()
+
+    renderings = {
+        "markdown": as_markdown(header, rows),
+        "markdown (padded)": as_markdown(header, rows, pad=True),
+        "csv (headerless)": as_csv(header, rows),
+        "json (array of arrays)": as_json(header, rows),
+    }
+    base = count(renderings["markdown (padded)"])
+    print(f"{args.rows} rows x {len(header)} cols — token counter: {method}\n")
+    print(f"{'format':<24} {'tokens':>8} {'tok/row':>8} {'rows/call':>10} {'vs padded md':>13}")
+    for name, text in renderings.items():
+        n = count(text)
+        per_row = n / args.rows
+        print(f"{name:<24} {n:>8} {per_row:>8.1f} {int(args.budget // per_row):>10} {n / base:>12.0%}")
+
+
+if __name__ == "__main__":
+    main()
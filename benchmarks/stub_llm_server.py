@@ -0,0 +1,183 @@
+"""Offline stand-in for the OpenAI chat completions API.
+
+Serves ``POST /v1/chat/completions`` (plain and SSE-streamed) and
+``GET /v1/models`` on localhost. Schema requests get a synthetic chain of
+``tables`` tables; data requests get rows for the columns and row count named
+in the prompt, in the format the system prompt asks for (markdown, headerless
+CSV or JSON rows). ``latency_s`` is added to every response, and
+``per_row_s`` per generated row, to mimic provider timing.
+
+    python benchmarks/stub_llm_server.py --port 8765 --tables 5 --latency-ms 200
+
+    client = OpenAI(api_key="stub", base_url="http://127.0.0.1:8765/v1")
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_ROWS = re.compile(r"Number of rows: (\d+)")
+_START = re.compile(r"numeric IDs start at (\d+)")
+_COLUMNS = re.compile(r"Columns and types:\s*(\{.*?\n\})", re.S)
+
+STUB_COLUMNS = {
+    "name": "string", "email": "email", "amount": "float", "created": "date", "active": "boolean",
+}
+
+
+def stub_schema(n_tables: int) -> dict:
+    """A chain of tables, each child referencing the one before it."""
+    tables = []
+    for i in range(1, n_tables + 1):
+        name = f"T{i:02d}"
+        columns = {"id": "integer", **STUB_COLUMNS}
+        fks = []
+        if i > 1:
+            columns["parent_id"] = "integer"
+            fks.append({"column": "parent_id", "references_table": f"T{i - 1:02d}", "references_column": "id"})
+        tables.append({"name": name, "primary_key": "id", "foreign_keys": fks, "columns": columns})
+    return {"tables": tables, "num_rows": 0, "dataset_description": "stub benchmark schema"}
+
+
+def _value(col: str, ctype: str, i: int, rng: random.Random) -> str:
+    if col == "id":
+        return str(i)
+    if ctype == "integer":
+        return str(rng.randint(1, 1000))
+    if ctype == "float":
+        return f"{rng.uniform(1, 5000):.2f}"
+    if ctype == "boolean":
+        return rng.choice(("true", "false"))
+    if ctype == "date":
+        return f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+    if ctype == "email":
+        return f"user{i}@example.com"
+    return f"{col} {i}"
+
+
+def stub_rows(columns: dict, n: int, start: int, fmt: str, rng: random.Random) -> str:
+    rows = [[_value(c, t, start + k, rng) for c, t in columns.items()] for k in range(n)]
+    if fmt == "csv":
+        return "\n".join(",".join(r) for r in rows)
+    if fmt == "json":
+        return json.dumps({"rows": rows})
+    header = list(columns)
+    lines = ["| " + " | ".join(header) + " |", "|" + "---|" * len(header)]
+    lines += ["| " + " | ".join(r) + " |" for r in rows]
+    return "\n".join(lines)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "StubLLMServer"
+
+    def log_message(self, *args):  # keep benchmark output clean
+        pass
+
+    def _json(self, body: dict, status: int = 200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._json({"object": "list", "data": [{"id": "gpt-4o-mini", "object": "model", "owned_by": "stub"}]})
+        else:
+            self._json({"error": {"message": "not found"}}, 404)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._json({"error": {"message": "not found"}}, 404)
+            return
+        req = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        content, rows = self.server.respond(req["messages"])
+        time.sleep(self.server.latency_s + rows * self.server.per_row_s)
+        usage = {
+            "prompt_tokens": sum(len(m["content"]) for m in req["messages"]) // 4,
+            "completion_tokens": len(content) // 4,
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        base = {"id": "stub", "created": int(time.time()), "model": req.get("model", "gpt-4o-mini")}
+        if not req.get("stream"):
+            self._json({
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+
+        def send(obj):
+            self.wfile.write(f"data: {json.dumps(obj)}\n\n".encode())
+
+        chunk = {**base, "object": "chat.completion.chunk"}
+        step = self.server.chunk_chars
+        for i in range(0, len(content), step):
+            send({**chunk, "choices": [{"index": 0, "delta": {"content": content[i:i + step]}, "finish_reason": None}]})
+        send({**chunk, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]})
+        send({**chunk, "choices": [], "usage": usage})
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+class StubLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, tables: int = 3, latency_s: float = 0.0, per_row_s: float = 0.0,
+                 chunk_chars: int = 256, seed: int = 0):
+        super().__init__(("127.0.0.1", port), _Handler)
+        self.tables = tables
+        self.latency_s = latency_s
+        self.per_row_s = per_row_s
+        self.chunk_chars = chunk_chars
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def respond(self, messages) -> tuple:
+        """``(content, rows generated)`` for one request."""
+        system, prompt = messages[0]["content"], messages[-1]["content"]
+        if "schema designer" in system:
+            return json.dumps(stub_schema(self.tables)), 0
+        fmt = "csv" if "CSV" in system else "json" if "JSON" in system else "markdown"
+        m = _COLUMNS.search(prompt)
+        columns = json.loads(m.group(1)) if m else {"id": "integer"}
+        n = int(_ROWS.search(prompt).group(1)) if _ROWS.search(prompt) else 10
+        start = int(_START.search(prompt).group(1)) if _START.search(prompt) else 1
+        with self._lock:
+            rng = random.Random(self._rng.random())
+        return stub_rows(columns, n, start, fmt, rng), n
+
+    def start(self) -> "StubLLMServer":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--tables", type=int, default=3, help="tables in the stub schema")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="added to every response")
+    ap.add_argument("--per-row-ms", type=float, default=0.0, help="added per generated row")
+    args = ap.parse_args()
+    server = StubLLMServer(args.port, args.tables, args.latency_ms / 1000, args.per_row_ms / 1000)
+    print(f"stub LLM server on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Headless batch runner for FauxFoundry v2.
+
+Reads a JSON or YAML file of briefs, synthesizes them concurrently with a
+bounded worker pool and writes each dataset to its own output directory.
+
+Brief file: a list (or ``{"briefs": [...]}``) of objects such as::
+
+    - name: churn
+      mode: relational          # or "simple"
+      num_rows: 200
+      table_rows: "Orders=20x"  # optional per-table sizes
+      brief: |
+        Customers, Usage and Feedback tables ...
+
+Usage::
+
+    OPENAI_API_KEY=... python cli.py briefs.yaml -o out/ --workers 8 --excel
+
+With ``--stream`` the tables are written to disk chunk by chunk as they are
+generated (see ``streaming``), so datasets far larger than memory can be built;
+``--excel`` is not available then.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+import clients
+import parquet_export
+import sharding
+import streaming
+from fk_assign import FK_DISTRIBUTIONS, ForeignKeyAssigner
+from generator import MODE_RELATIONAL, MODE_SIMPLE, SyntheticDataGenerator
+from integrity import IntegrityEngine, parse_fan_out
+from llm_cache import DEFAULT_CACHE_DIR, ResponseCache
+from local_engine import LocalRowEngine
+from resilience import DEFAULT_RPM, DEFAULT_TPM, shared_caller
+from row_plan import parse_row_spec
+from schema_store import DEFAULT_SCHEMA_DIR, SchemaStore
+
+MODES = {"simple": MODE_SIMPLE, "relational": MODE_RELATIONAL}
+
+
+def load_briefs(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as fh:
+        text = fh.read()
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml
+        except ImportError:
+            sys.exit("PyYAML is required for YAML brief files: pip install pyyaml")
+        doc = yaml.safe_load(text)
+    else:
+        doc = json.loads(text)
+    briefs = doc.get("briefs", []) if isinstance(doc, dict) else doc
+    if not isinstance(briefs, list) or not briefs:
+        sys.exit(f"No briefs found in {path}")
+    for i, b in enumerate(briefs):
+        if not b.get("brief"):
+            sys.exit(f"Brief #{i + 1} in {path} has no 'brief' text")
+        b.setdefault("name", f"brief_{i + 1:03d}")
+    return briefs
+
+
+def _json_arg(value: str) -> Dict[str, Any]:
+    """Inline JSON, or the path of a JSON file."""
+    if os.path.isfile(value):
+        with open(value, encoding="utf-8") as fh:
+            return json.load(fh)
+    try:
+        return json.loads(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(f"not valid JSON or a JSON file: {e}") from e
+
+
+def _row_spec_arg(value: str):
+    try:
+        return parse_row_spec(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _fan_out_arg(value: str):
+    try:
+        return parse_fan_out(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_") or "dataset"
+
+
+def build_generator(args, client) -> SyntheticDataGenerator:
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(args.cache_dir, replay_only=args.replay_only)
+    engine = LocalRowEngine(seed=args.seed) if args.engine == "local" else None
+    gen = SyntheticDataGenerator(
+        max_workers=args.batch_workers,
+        cache=cache,
+        local_engine=engine,
+        output_format=args.format,
+        fk_assigner=ForeignKeyAssigner(seed=args.seed, rules=args.fk_rules, default=args.fk_dist),
+        caller=shared_caller(args.rpm, args.tpm),
+        schema_store=args.schema_store,
+    )
+    gen.row_overrides, gen.fan_out_ratios = args.table_rows
+    gen.bulk_engine = LocalRowEngine(seed=args.seed)
+    gen.integrity = IntegrityEngine(fan_out=args.fan_out)
+    gen.shard_workers = args.shard_workers
+    gen.client = client
+    return gen
+
+
+def run_brief(spec: Dict[str, Any], args, client) -> Dict[str, Any]:
+    name = _slug(spec["name"])
+    mode = MODES.get(str(spec.get("mode", args.mode)).lower(), MODE_RELATIONAL)
+    num_rows = int(spec.get("num_rows", args.rows))
+    out_dir = os.path.join(args.output, name)
+    t0 = time.perf_counter()
+    try:
+        gen = build_generator(args, client)
+        if spec.get("table_rows"):
+            gen.row_overrides, gen.fan_out_ratios = parse_row_spec(spec["table_rows"])
+        if args.stream:
+            return _stream_brief(gen, spec, args, name, mode, num_rows, out_dir, t0)
+        schema, tables = gen.synthesize(spec["brief"], mode, num_rows, regenerate_schema=args.regenerate_schema)
+        os.makedirs(out_dir, exist_ok=True)
+        with open(os.path.join(out_dir, "schema.json"), "w", encoding="utf-8") as fh:
+            json.dump(schema, fh, indent=2)
+        for tname, df in tables.items():
+            df.to_csv(os.path.join(out_dir, f"{_slug(tname).lower()}.csv"), index=False)
+        if args.excel:
+            with open(os.path.join(out_dir, "dataset.xlsx"), "wb") as fh:
+                fh.write(gen.build_excel(tables, schema))
+        _write_metrics(gen, out_dir)
+        if args.parquet:
+            parquet_export.write_dataset(tables, schema, os.path.join(out_dir, "parquet"), fmt=args.parquet)
+        return {
+            "name": name,
+            "ok": True,
+            "seconds": time.perf_counter() - t0,
+            "tables": len(tables),
+            "rows": sum(len(df) for df in tables.values()),
+            "integrity": {k: v for k, v in gen.integrity_report.items() if k != "tables"},
+            "coercion": {k: v for k, v in gen.coercion_report.items() if k != "tables"},
+            "row_report": gen.row_report,
+            "performance": {k: v for k, v in gen.telemetry.summary().items() if k != "tables"},
+        }
+    except Exception as e:
+        return {"name": name, "ok": False, "seconds": time.perf_counter() - t0, "error": str(e)}
+
+
+def _write_metrics(gen: SyntheticDataGenerator, out_dir: str) -> None:
+    with open(os.path.join(out_dir, "metrics.jsonl"), "w", encoding="utf-8") as fh:
+        fh.write(gen.telemetry.to_jsonl())
+    with open(os.path.join(out_dir, "metrics.prom"), "w", encoding="utf-8") as fh:
+        fh.write(gen.telemetry.to_prometheus())
+
+
+def _stream_brief(gen, spec, args, name, mode, num_rows, out_dir, t0) -> Dict[str, Any]:
+    """``run_brief`` for ``--stream``: tables go straight to ``out_dir`` in chunks."""
+    formats = ["csv"] + (["parquet"] if args.parquet else [])
+    _, manifest, _ = streaming.stream_synthesis(
+        gen, spec["brief"], mode, num_rows, out_dir, formats,
+        chunk_rows=args.chunk_rows, regenerate_schema=args.regenerate_schema,
+    )
+    _write_metrics(gen, out_dir)
+    return {
+        "name": name,
+        "ok": True,
+        "seconds": time.perf_counter() - t0,
+        "tables": len(manifest["tables"]),
+        "rows": sum(t["rows"] for t in manifest["tables"]),
+        "bytes": sum(sum(t["bytes"].values()) for t in manifest["tables"]),
+        "row_report": gen.row_report,
+        "performance": {k: v for k, v in gen.telemetry.summary().items() if k != "tables"},
+    }
+
+
+def main(argv: List[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Batch-generate synthetic datasets from a file of briefs.")
+    ap.add_argument("briefs", help="JSON or YAML file with a list of briefs")
+    ap.add_argument("-o", "--output", default="fauxfoundry_out", help="output directory")
+    ap.add_argument("-w", "--workers", type=int, default=4, help="briefs processed concurrently")
+    ap.add_argument("--batch-workers", type=int, default=4, help="concurrent LLM batches per table")
+    ap.add_argument("--mode", choices=sorted(MODES), default="relational", help="default mode for briefs")
+    ap.add_argument("--rows", type=int, default=50, help="default base row count")
+    ap.add_argument("--engine", choices=["llm", "local"], default="llm", help="row engine")
+    ap.add_argument("--seed", type=int, default=42, help="seed for the local engines and FK assignment")
+    ap.add_argument("--format", choices=["markdown", "csv", "json"], default="markdown", help="LLM output format")
+    ap.add_argument("--table-rows", type=_row_spec_arg, default=({}, {}),
+                    help='per-table sizes, e.g. "Customers=500,Orders=20x" (20 rows per parent row)')
+    ap.add_argument("--fk-dist", choices=FK_DISTRIBUTIONS, default="uniform",
+                    help="how child rows spread over parent keys (default for every relationship)")
+    ap.add_argument("--fk-rules", type=_json_arg, default=None,
+                    help='per-relationship rules as JSON or a JSON file, e.g. \'{"Orders.customer_id": {"kind": "zipf", "s": 1.5}}\'')
+    ap.add_argument("--fan-out", type=_fan_out_arg, default={},
+                    help='children-per-parent bounds checked after generation, e.g. "Orders.customer_id=1-50"')
+    ap.add_argument("--excel", action="store_true", help="also write dataset.xlsx per brief")
+    ap.add_argument("--parquet", nargs="?", const="parquet", choices=["parquet", "arrow"],
+                    help="also write typed Parquet (or Arrow IPC) files + manifest.json (needs pyarrow)")
+    ap.add_argument("--stream", action="store_true",
+                    help="write tables to disk in chunks as they are generated (CSV, plus Parquet with --parquet)")
+    ap.add_argument("--chunk-rows", type=int, default=streaming.DEFAULT_CHUNK_ROWS,
+                    help="rows generated and written per chunk with --stream")
+    ap.add_argument("--shard-workers", type=int, default=sharding.DEFAULT_SHARD_WORKERS,
+                    help="processes that build large local-engine tables in parallel row shards")
+    ap.add_argument("--rpm", type=float, default=DEFAULT_RPM, help="API requests per minute, shared by all workers")
+    ap.add_argument("--tpm", type=float, default=DEFAULT_TPM, help="API tokens per minute, shared by all workers")
+    ap.add_argument("--api-key", default=os.environ.get("OPENAI_API_KEY"), help="defaults to $OPENAI_API_KEY")
+    ap.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    ap.add_argument("--no-cache", action="store_true", help="disable the response cache")
+    ap.add_argument("--replay-only", action="store_true", help="serve every call from the cache; never hit the API")
+    ap.add_argument("--schema-dir", default=DEFAULT_SCHEMA_DIR, help="store of schemas reused across runs")
+    ap.add_argument("--no-schema-cache", action="store_true", help="always design a new schema")
+    ap.add_argument("--regenerate-schema", action="store_true", help="design new schemas and replace the stored ones")
+    args = ap.parse_args(argv)
+
+    if args.stream and (args.excel or args.parquet == "arrow"):
+        ap.error("--stream writes CSV and Parquet only; drop --excel / --parquet arrow")
+
+    briefs = load_briefs(args.briefs)
+    args.schema_store = None if args.no_schema_cache else SchemaStore(args.schema_dir)  # shared by every brief
+    client = None
+    if not args.replay_only:
+        if not args.api_key:
+            ap.error("an OpenAI API key is required (--api-key or $OPENAI_API_KEY) unless --replay-only")
+        probe = SyntheticDataGenerator()
+        if not probe.setup(args.api_key, check=False):
+            ap.error(f"OpenAI setup failed: {probe.setup_error}")
+        client = probe.client  # one client (and connection pool) shared by every brief
+
+    os.makedirs(args.output, exist_ok=True)
+    t0 = time.perf_counter()
+    results = []
+    with ThreadPoolExecutor(max_workers=max(1, args.workers)) as pool:
+        futures = [pool.submit(run_brief, spec, args, client) for spec in briefs]
+        for fut in as_completed(futures):
+            r = fut.result()
+            results.append(r)
+            if r["ok"]:
+                print(f"✔ {r['name']:<32} {r['seconds']:7.2f}s  {r['tables']:>3} tables  {r['rows']:>9} rows", flush=True)
+            else:
+                print(f"✘ {r['name']:<32} {r['seconds']:7.2f}s  {r['error']}", flush=True)
+
+    failed = sum(not r["ok"] for r in results)
+    wall = time.perf_counter() - t0
+    print(f"\n{len(results) - failed}/{len(results)} briefs succeeded in {wall:.2f}s wall time")
+    with open(os.path.join(args.output, "summary.json"), "w", encoding="utf-8") as fh:
+        json.dump({
+            "wall_seconds": wall,
+            "http_pool": clients.pool_stats(),
+            "results": sorted(results, key=lambda r: r["name"]),
+        }, fh, indent=2)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+"""OpenAI client construction, shared per API key, and a TTL-cached connectivity check.
+
+The SDK is imported on first use, so importing the pipeline stays cheap until
+a client is actually needed. Clients are cached process-wide by a hash of the
+API key (the key itself is never used as a cache key), which lets every
+session with the same key share one client and its bounded, metered
+connection pool (see ``http_pool``).
+"""
+import hashlib
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Tuple
+
+if TYPE_CHECKING:
+    from http_pool import PoolConfig
+
+CONNECTIVITY_TTL_S = 300.0
+
+_clients: Dict[str, Any] = {}
+_transports: Dict[str, Any] = {}  # key fingerprint -> http_pool.MeteredTransport
+_verified: Dict[str, float] = {}  # key fingerprint -> monotonic time of last good check
+_lock = threading.Lock()
+
+
+def key_fingerprint(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+def make_client(api_key: str, **kwargs: Any):
+    """A new OpenAI client. Retries are left to ``resilience.ResilientCaller``."""
+    from openai import OpenAI
+
+    kwargs.setdefault("max_retries", 0)
+    return OpenAI(api_key=api_key, **kwargs)
+
+
+def get_client(api_key: str, pool: "PoolConfig | None" = None):
+    """The process-wide client for ``api_key``, created on first use.
+
+    Each key gets its own pool, so one key's traffic cannot starve another's;
+    ``pool`` only applies when the client is first created.
+    """
+    fp = key_fingerprint(api_key)
+    with _lock:
+        if fp not in _clients:
+            from openai import DefaultHttpxClient
+
+            from http_pool import MeteredTransport, PoolConfig
+
+            transport = MeteredTransport(pool or PoolConfig())
+            _clients[fp] = make_client(api_key, http_client=DefaultHttpxClient(transport=transport))
+            _transports[fp] = transport
+        return _clients[fp]
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Connection pool metrics per key fingerprint."""
+    with _lock:
+        transports = dict(_transports)
+    return {fp: t.stats() for fp, t in transports.items()}
+
+
+def check_connectivity(client: Any, api_key: str, ttl_s: float = CONNECTIVITY_TTL_S) -> Tuple[bool, bool]:
+    """Verify the key with a ``models.list()`` round-trip, at most once per ``ttl_s``.
+
+    Returns ``(ok, from_cache)``; failures raise and are never cached.
+    """
+    fp = key_fingerprint(api_key)
+    with _lock:
+        stamp = _verified.get(fp)
+    if stamp is not None and time.monotonic() - stamp < ttl_s:
+        return True, True
+    client.models.list()
+    with _lock:
+        _verified[fp] = time.monotonic()
+    return True, False
+
+
+def forget(api_key: str) -> None:
+    """Drop the cached client and check for a key (e.g. after it was revoked)."""
+    fp = key_fingerprint(api_key)
+    with _lock:
+        _clients.pop(fp, None)
+        _transports.pop(fp, None)
+        _verified.pop(fp, None)
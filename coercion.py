@@ -0,0 +1,195 @@
+"""Schema-driven dtype coercion for generated tables.
+
+Parsed tables arrive as object columns of Python strings, even for IDs,
+booleans and dates. ``TypeCoercer`` maps each column's schema type to a
+compact pandas dtype:
+
+    integer → Int32 / Int64 (nullable, narrowest that fits)
+    float   → float32 when lossless, else float64
+    boolean → boolean (nullable)
+    date    → datetime64[ns]
+    text    → category when low-cardinality, else left as-is
+
+Values that fail to parse become nulls and are counted per column. A column
+where too many values fail is left untouched, so a mistyped schema never
+wipes out data.
+"""
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+TRUE_WORDS = {"true", "t", "yes", "y", "1"}
+FALSE_WORDS = {"false", "f", "no", "n", "0"}
+
+_TYPE_ALIASES = {
+    "int": "integer", "integer": "integer", "bigint": "integer", "smallint": "integer",
+    "float": "float", "double": "float", "decimal": "float", "number": "float", "numeric": "float",
+    "bool": "boolean", "boolean": "boolean",
+    "date": "date", "datetime": "date", "timestamp": "date",
+}
+
+_INT32 = np.iinfo(np.int32)
+
+
+def _cols(spec: Any) -> List[str]:
+    if not spec:
+        return []
+    return [spec] if isinstance(spec, str) else list(spec)
+
+
+def schema_kind(ctype: Any) -> str:
+    """Normalise a schema column type to integer / float / boolean / date / text."""
+    return _TYPE_ALIASES.get(str(ctype).strip().lower(), "text")
+
+
+def _is_text(series: pd.Series) -> bool:
+    return series.dtype == object or pd.api.types.is_string_dtype(series)
+
+
+def _blank(series: pd.Series) -> pd.Series:
+    """Mask of values that count as missing before coercion (NaN or empty text)."""
+    if not _is_text(series):
+        return series.isna()
+    return series.isna() | series.astype(str).str.strip().eq("")
+
+
+def to_integer(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_extension_array_dtype(series):
+        values = series
+    else:
+        values = pd.to_numeric(series, errors="coerce")
+        values = values.where(values.isna() | values.mod(1).eq(0))  # 2.5 is not an integer
+    lo, hi = values.min(), values.max()
+    fits = pd.isna(lo) or (_INT32.min <= lo and hi <= _INT32.max)
+    return values.astype("Int32" if fits else "Int64")
+
+
+def to_float(series: pd.Series) -> pd.Series:
+    values = pd.to_numeric(series, errors="coerce").astype("float64")
+    narrow = values.astype("float32")
+    # float32 only when every value survives the round trip, so exports don't change
+    if np.array_equal(narrow.to_numpy(np.float64), values.to_numpy(), equal_nan=True):
+        return narrow
+    return values
+
+
+def to_boolean(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_bool_dtype(series):
+        return series.astype("boolean")
+    text = series.astype(str).str.strip().str.lower()
+    values = pd.Series(pd.NA, index=series.index, dtype="boolean")
+    values[text.isin(TRUE_WORDS)] = True
+    values[text.isin(FALSE_WORDS)] = False
+    return values
+
+
+def to_datetime(series: pd.Series) -> pd.Series:
+    if pd.api.types.is_datetime64_any_dtype(series):
+        return series
+    # ISO dates are the norm; only the leftovers pay for format inference
+    values = pd.to_datetime(series, format="%Y-%m-%d", errors="coerce")
+    retry = values.isna() & ~_blank(series)
+    if retry.any():
+        values[retry] = pd.to_datetime(series[retry], errors="coerce")
+    return values
+
+
+_CONVERTERS = {"integer": to_integer, "float": to_float, "boolean": to_boolean, "date": to_datetime}
+
+
+def coerce_series(series: pd.Series, ctype: Any) -> pd.Series:
+    """Convert one column to its schema type; unparseable values become nulls."""
+    convert = _CONVERTERS.get(schema_kind(ctype))
+    return convert(series) if convert else series
+
+
+class TypeCoercer:
+    def __init__(
+        self,
+        max_failure_ratio: float = 0.2,
+        category_max_ratio: float = 0.5,
+        category_min_rows: int = 50,
+    ):
+        """A column is kept as text when more than ``max_failure_ratio`` of its
+        non-blank values fail to parse. Text columns become ``category`` when
+        they have at least ``category_min_rows`` rows and at most
+        ``category_max_ratio`` distinct values per row."""
+        self.max_failure_ratio = max_failure_ratio
+        self.category_max_ratio = category_max_ratio
+        self.category_min_rows = category_min_rows
+
+    def run(
+        self,
+        tables: Dict[str, pd.DataFrame],
+        schema: Dict[str, Any],
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Any]]:
+        """Coerce every table; returns ``(tables, report)``."""
+        coerced = dict(tables)
+        report: Dict[str, Any] = {"tables": {}, "failed_values": 0, "bytes_before": 0, "bytes_after": 0}
+        referenced: Dict[str, set] = {}
+        for tbl in schema["tables"]:
+            for fk in tbl.get("foreign_keys", []):
+                referenced.setdefault(fk["references_table"], set()).update(_cols(fk.get("references_column")))
+        for tbl in schema["tables"]:
+            name = tbl["name"]
+            if name not in coerced:
+                continue
+            df, entry = self.coerce_table(coerced[name], tbl, referenced.get(name, set()))
+            coerced[name] = df
+            report["tables"][name] = entry
+            report["failed_values"] += sum(c["failed"] for c in entry["columns"].values())
+            report["bytes_before"] += entry["bytes_before"]
+            report["bytes_after"] += entry["bytes_after"]
+        report["bytes_saved"] = report["bytes_before"] - report["bytes_after"]
+        return coerced, report
+
+    def coerce_table(
+        self,
+        df: pd.DataFrame,
+        table: Dict[str, Any],
+        referenced: Iterable[str] = (),
+    ) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """Coerce one table. Key columns (its PK, FKs and the ``referenced``
+        columns other tables point at) are never made ``category``, so key
+        lookups compare plain values."""
+        types = table.get("columns", {})
+        keys = set(_cols(table.get("primary_key"))) | set(referenced)
+        for fk in table.get("foreign_keys", []):
+            keys.update(_cols(fk.get("column")))
+        before = int(df.memory_usage(index=False, deep=True).sum())
+        out: Dict[str, pd.Series] = {}
+        columns: Dict[str, Dict[str, Any]] = {}
+        for col in df.columns:
+            series = df[col]
+            kind = schema_kind(types.get(col, "string"))
+            if kind == "text":
+                out[col] = self._maybe_category(series) if col not in keys else series
+                columns[col] = {"dtype": str(out[col].dtype), "failed": 0}
+                continue
+
+            values = coerce_series(series, kind)
+            filled = ~_blank(series)
+            failed_mask = values.isna() & filled
+            failed = int(failed_mask.sum())
+            present = int(filled.sum())
+            entry: Dict[str, Any] = {"dtype": str(values.dtype), "failed": failed}
+            if failed:
+                entry["examples"] = series[failed_mask].astype(str).unique()[:3].tolist()
+            if present and failed / present > self.max_failure_ratio:
+                values = series
+                entry["dtype"] = str(series.dtype)
+                entry["kept_as_text"] = True
+            out[col] = values
+            columns[col] = entry
+
+        result = pd.DataFrame(out, index=df.index)
+        after = int(result.memory_usage(index=False, deep=True).sum())
+        return result, {"columns": columns, "bytes_before": before, "bytes_after": after}
+
+    def _maybe_category(self, series: pd.Series) -> pd.Series:
+        if not _is_text(series) or len(series) < self.category_min_rows:
+            return series
+        if series.nunique(dropna=True) > self.category_max_ratio * len(series):
+            return series
+        return series.astype("category")
@@ -0,0 +1,185 @@
+"""Local foreign-key assignment under configurable cardinality distributions.
+
+FK columns are not generated by the LLM. Once a child table's other columns
+exist, each FK column is filled by sampling the parent's keys, so the prompt
+never carries ID lists and every parent can be referenced however large it is.
+
+Distributions (``kind``), set per relationship keyed by ``"Child.fk_column"``::
+
+    uniform  every parent equally likely
+    zipf     skewed popularity; ``s`` (default 1.2) sets the skew
+    fixed    ``per_parent`` children for each parent (default: rows / parents)
+    cover    every parent referenced at least once, the rest uniform
+
+    {"Orders.customer_id": {"kind": "zipf", "s": 1.5}}
+
+FK columns that make up the child's whole primary key (a 1:1 extension table,
+or a link table keyed by both parents) ignore the distribution: each row gets
+a distinct parent key (or key combination), drawn without replacement, and a
+table has at most as many rows as there are combinations.
+"""
+import math
+import zlib
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+FK_DISTRIBUTIONS = ("uniform", "zipf", "fixed", "cover")
+
+
+def key_columns(spec: Any) -> List[str]:
+    """A schema ``primary_key`` (string, list or missing) as a list of columns."""
+    if spec is None or spec == "":
+        return []
+    return [spec] if isinstance(spec, str) else list(spec)
+
+
+def unique_fk_columns(table: Dict[str, Any], fk_columns: Sequence[str]) -> List[str]:
+    """The primary-key columns, when every one of them is among ``fk_columns``."""
+    pk = key_columns(table.get("primary_key"))
+    return pk if pk and all(c in fk_columns for c in pk) else []
+
+
+class ForeignKeyAssigner:
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        rules: Optional[Dict[str, Dict[str, Any]]] = None,
+        default: Union[str, Dict[str, Any]] = "uniform",
+    ):
+        """``default`` (a kind, or a full rule) covers relationships without an
+        entry in ``rules``."""
+        self.seed = seed
+        self.rules = rules or {}
+        self.default = {"kind": default} if isinstance(default, str) else dict(default)
+        self._check(self.default, "the default rule")
+        for label, rule in self.rules.items():
+            self._check({**self.default, **rule}, label)
+        self._entropy = np.random.SeedSequence(seed).entropy
+
+    @staticmethod
+    def _check(rule: Dict[str, Any], where: str) -> None:
+        if rule.get("kind") not in FK_DISTRIBUTIONS:
+            raise ValueError(
+                f"Unknown FK distribution {rule.get('kind')!r} for {where}; "
+                f"expected one of {', '.join(FK_DISTRIBUTIONS)}"
+            )
+
+    def rule_for(self, label: str) -> Dict[str, Any]:
+        return {**self.default, **self.rules.get(label, {})}
+
+    def rng_for(self, label: str, stream: int = 0) -> np.random.Generator:
+        """Independent, reproducible generator per relationship (and stream)."""
+        ss = np.random.SeedSequence(self._entropy, spawn_key=(zlib.crc32(label.encode()), stream))
+        return np.random.default_rng(ss)
+
+    def assign(
+        self,
+        label: str,
+        parent_keys: Sequence[Any],
+        n: int,
+        stream: int = 0,
+        start: int = 0,
+        total: Optional[int] = None,
+    ) -> np.ndarray:
+        """``n`` FK values drawn from ``parent_keys`` for relationship ``label``.
+
+        A table built in chunks passes each chunk's first row as ``start``
+        (and ``stream``) plus the table's ``total`` rows. Parent popularity
+        (zipf), the ``fixed`` slots and the ``cover`` order then come from one
+        per-relationship order, so the chunks add up to the distribution a
+        single call would give.
+        """
+        keys = np.asarray(parent_keys)
+        if len(keys) == 0:
+            raise ValueError(f"No parent keys available for {label}")
+        rng = self.rng_for(label, stream)
+        order_rng = self.rng_for(label, 0) if stream else rng
+        positions = self.positions(self.rule_for(label), len(keys), n, rng, order_rng, start, total or n)
+        return keys[positions]
+
+    def assign_unique(
+        self,
+        label: str,
+        parent_keys: Sequence[Sequence[Any]],
+        n: int,
+        start: int = 0,
+        total: Optional[int] = None,
+    ) -> List[np.ndarray]:
+        """Distinct parent key combinations for rows ``start .. start+n-1``, one
+        array per column of ``parent_keys``.
+
+        Combinations come without replacement from one per-relationship order,
+        so the chunks of a table built in parts never repeat one. Once the
+        combinations run out, fewer than ``n`` values are returned.
+        """
+        keys = [np.asarray(k) for k in parent_keys]
+        sizes = [len(k) for k in keys]
+        if not all(sizes):
+            raise ValueError(f"No parent keys available for {label}")
+        capacity = math.prod(sizes)
+        total = min(total or n, capacity)
+        picks = self.rng_for(label, 0).choice(capacity, size=total, replace=False)[start:start + n]
+        return [k[p] for k, p in zip(keys, np.unravel_index(picks, sizes))]
+
+    def fill(
+        self,
+        table: Dict[str, Any],
+        df: pd.DataFrame,
+        fk_keys: Dict[str, Sequence[Any]],
+        stream: int = 0,
+        start: int = 0,
+        total: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """``df`` with its FK columns filled from ``fk_keys`` (column -> parent
+        keys) and the schema's column order restored.
+
+        Rows past the last distinct combination of a primary key made of FK
+        columns are dropped.
+        """
+        df = df.copy()
+        unique = unique_fk_columns(table, list(fk_keys))
+        if unique:
+            label = f"{table['name']}.{'+'.join(unique)}"
+            values = self.assign_unique(label, [fk_keys[c] for c in unique], len(df), start, total)
+            df = df.iloc[:len(values[0])].copy()
+            for col, col_values in zip(unique, values):
+                df[col] = col_values
+        for col, keys in fk_keys.items():
+            if col not in unique:
+                df[col] = self.assign(f"{table['name']}.{col}", keys, len(df), stream, start, total)
+        return df[[c for c in table["columns"] if c in df.columns]].reset_index(drop=True)
+
+    @staticmethod
+    def positions(
+        rule: Dict[str, Any],
+        n_parents: int,
+        n: int,
+        rng: np.random.Generator,
+        order_rng: Optional[np.random.Generator] = None,
+        start: int = 0,
+        total: Optional[int] = None,
+    ) -> np.ndarray:
+        """Parent positions (0 .. n_parents-1) for child rows ``start .. start+n-1``."""
+        kind = rule["kind"]
+        order_rng = order_rng or rng
+        total = total or n
+        if kind == "zipf":
+            ranks = np.arange(1, n_parents + 1, dtype=np.float64)
+            weights = ranks ** -float(rule.get("s", 1.2))
+            # popularity is tied to a random parent order, not to key order
+            order = order_rng.permutation(n_parents)
+            return order[rng.choice(n_parents, size=n, p=weights / weights.sum())]
+        if kind == "fixed":
+            per_parent = int(rule.get("per_parent") or max(1, math.ceil(total / n_parents)))
+            order = order_rng.permutation(n_parents)
+            # slot i of the table goes to order[i // per_parent]; past the last slot, go round again
+            slots = np.arange(start, start + n) % (n_parents * per_parent)
+            return rng.permutation(order[slots // per_parent])
+        if kind == "cover":
+            order = order_rng.permutation(n_parents)
+            first = order[start:min(start + n, n_parents)]
+            rest = rng.integers(0, n_parents, n - len(first))
+            return rng.permutation(np.concatenate([first, rest]))
+        return rng.integers(0, n_parents, n)
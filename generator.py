@@ -0,0 +1,903 @@
+"""Streamlit-free core of FauxFoundry v2: the three-agent synthesis pipeline.
+
+``app5.py`` drives this from the browser and ``cli.py`` from the command line.
+"""
+import copy
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Sequence, Tuple
+
+import pandas as pd
+
+import clients
+import sharding
+from coercion import TypeCoercer, schema_kind
+from fk_assign import ForeignKeyAssigner, key_columns
+from integrity import IntegrityEngine
+from llm_cache import ResponseCache
+from local_engine import LocalRowEngine
+from resilience import ResilientCaller, shared_caller
+from row_plan import plan_row_counts
+from schema_diff import EXTEND, REGENERATE, TRUNCATE, plan_refresh
+from schema_store import SchemaStore
+from table_parser import format_instructions, make_parser, markdown_to_df, response_format
+from telemetry import Telemetry, estimate_cost
+from token_budget import TokenPlanner
+
+if TYPE_CHECKING:  # the SDK is imported on first client creation (see clients.py)
+    from openai import OpenAI
+
+MODE_SIMPLE = "Simple (Single Table)"
+MODE_RELATIONAL = "Advanced (Relational / Multi-Table)"
+
+# on_rows(table_name, header, new_rows) — called from worker threads while a table streams in
+RowsCallback = Callable[[str, List[str], List[List[str]]], None]
+
+
+def dataset_fingerprint(tables: Dict[str, pd.DataFrame], schema: Dict[str, Any]) -> str:
+    """Content hash of a generated dataset (schema, table names, columns and values)."""
+    h = hashlib.sha256(json.dumps(schema, sort_keys=True, default=str).encode("utf-8"))
+    for name, df in tables.items():
+        h.update(name.encode("utf-8"))
+        h.update("\x1f".join(map(str, df.columns)).encode("utf-8"))
+        h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class SynthesisCancelled(RuntimeError):
+    """Raised inside a run once ``should_stop`` reports that it was cancelled."""
+
+
+# ── Generator class ────────────────────────────────────────────────────────────
+class SyntheticDataGenerator:
+    MAX_OUTPUT_TOKENS = 3500   # completion cap per data call
+    MAX_BATCH_ROWS    = 100    # keep batches small enough to stay diverse
+    LLM_MAX_ROWS      = 5000   # larger tables are built by the local engine
+    MAX_CONTINUATIONS = 3      # follow-up calls for rows a truncated completion missed
+    MAX_SCHEMA_RETRIES = 2     # re-asks with a doubled budget when the schema JSON is cut off
+    MAX_TOPUP_ROUNDS  = 2      # extra passes to replace rows lost to truncation / PK dupes
+    TEXT_POOL_ROWS    = 200    # free-text values requested per table in local mode
+    TICK_S            = 0.25   # UI refresh interval while tables are generating
+
+    SYSTEM_PROMPTS = {
+        "markdown": "You are a synthetic data generator. Output only a markdown table.",
+        "csv":      "You are a synthetic data generator. Output only headerless CSV rows.",
+        "json":     "You are a synthetic data generator. Output only a JSON object of row arrays.",
+    }
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        cache: ResponseCache | None = None,
+        local_engine: LocalRowEngine | None = None,
+        output_format: str = "markdown",
+        fk_assigner: ForeignKeyAssigner | None = None,
+        caller: ResilientCaller | None = None,
+        schema_store: SchemaStore | None = None,
+    ):
+        self.client: "OpenAI | None" = None
+        self.max_workers = max_workers
+        self.cache = cache
+        self.caller = caller or shared_caller()  # rate limits shared by every generator in the process
+        self.local_engine = local_engine
+        self.schema_store = schema_store  # reuses schemas for repeated / near-identical briefs
+        self.output_format = output_format  # "markdown", "csv" or "json"
+        self.fk_assigner = fk_assigner or ForeignKeyAssigner()
+        # processes that build large local tables in parallel row shards (see sharding)
+        self.shard_workers = sharding.DEFAULT_SHARD_WORKERS
+        # stands in for local_engine on tables too large for the LLM; callers seed it with the run seed
+        self.bulk_engine = LocalRowEngine()
+        # per-table sizes: absolute overrides and rows-per-parent ratios (see row_plan)
+        self.row_overrides: Dict[str, int] = {}
+        self.fan_out_ratios: Dict[str, float] = {}
+        self.row_counts: Dict[str, int] = {}
+        self.telemetry = Telemetry()
+        self.integrity = IntegrityEngine()
+        self.integrity_report: Dict[str, Any] = {}
+        self.coercer = TypeCoercer()
+        self.coercion_report: Dict[str, Any] = {}
+        self.planner = TokenPlanner(self.MAX_OUTPUT_TOKENS, self.MAX_BATCH_ROWS)
+        # per table: rows requested / delivered and how many calls were truncated
+        self.row_report: Dict[str, Dict[str, int]] = {}
+        self.refresh_plan: Dict[str, Dict[str, Any]] = {}  # table -> schema_diff action, for incremental runs
+        self._report_lock = threading.Lock()
+        self.setup_error: str | None = None
+        # polled before every API call and between tables; True aborts the run
+        self.should_stop: Callable[[], bool] | None = None
+
+    def fork(self) -> "SyntheticDataGenerator":
+        """A generator for one independent run (e.g. a background job).
+
+        Client, caches, rate limiter, engines and settings are shared; the
+        per-run reports and telemetry are fresh, so concurrent runs do not
+        overwrite each other's results.
+        """
+        other = copy.copy(self)
+        other.row_overrides = dict(self.row_overrides)
+        other.fan_out_ratios = dict(self.fan_out_ratios)
+        other.row_counts = {}
+        other.telemetry = Telemetry()
+        other.integrity_report = {}
+        other.coercion_report = {}
+        other.row_report = {}
+        other.refresh_plan = {}
+        other._report_lock = threading.Lock()
+        other.should_stop = None
+        return other
+
+    def _check_stop(self) -> None:
+        if self.should_stop is not None and self.should_stop():
+            raise SynthesisCancelled("Synthesis cancelled")
+
+    @property
+    def offline(self) -> bool:
+        """True when every response must come from the replay cache."""
+        return self.cache is not None and self.cache.replay_only
+
+    @property
+    def _learn_batch_size(self) -> bool:
+        # The batch size is part of the prompt, which keys cached calls, so
+        # sizing it from usage seen earlier in the process would miss on every
+        # replay. max_tokens is learned either way (see _request_rows).
+        return self.cache is None
+
+    def setup(self, api_key: str, check: bool = True, client: "OpenAI | None" = None) -> bool:
+        """Attach the shared client for ``api_key`` and (optionally) check connectivity.
+
+        A successful check is remembered per key for ``clients.CONNECTIVITY_TTL_S``,
+        so reconnecting with the same key skips the round-trip. Returns False on
+        failure and keeps the reason on ``self.setup_error``.
+        """
+        self.setup_error = None
+        try:
+            # retries are handled by self.caller, which also sees the rate limits
+            self.client = client or clients.get_client(api_key)
+            if check:
+                clients.check_connectivity(self.client, api_key)
+            return True
+        except Exception as e:
+            self.setup_error = str(e)
+            return False
+
+    # ── Agent 1 ── schema ──────────────────────────────────────────────────────
+    def generate_schema(self, brief: str, mode: str, num_rows: int, regenerate: bool = False) -> Dict[str, Any]:
+        """Design the schema for ``brief``.
+
+        With a ``schema_store`` attached, a stored schema for the same (or a
+        near-identical) brief is reused and only ``num_rows`` is updated.
+        ``regenerate`` skips the store and the response cache and replaces the
+        stored schema with a new one.
+        """
+        if mode == MODE_SIMPLE:
+            system = "You are a data schema designer. Return ONLY valid JSON, no markdown fences."
+            user = f"""
+From the user request below, build a single-table schema JSON:
+{{
+  "tables": [
+    {{
+      "name": "<TableName>",
+      "primary_key": "<pk_column>",
+      "foreign_keys": [],
+      "columns": {{ "<col>": "<type>", ... }},
+      "num_rows": <row count, only if the request states one>
+    }}
+  ],
+  "num_rows": {num_rows},
+  "dataset_description": "<short description>"
+}}
+Supported types: string, integer, float, boolean, date, email, phone, address, url
+Request: {brief}
+"""
+        else:  # Relational
+            system = "You are a relational database schema designer. Return ONLY valid JSON, no markdown fences."
+            user = f"""
+Analyse the project brief and produce a multi-table relational schema JSON.
+Rules:
+- Identify ALL tables mentioned (or implied) in the brief.
+- Identify all primary keys and foreign key relationships.
+- Order tables so parent tables (no foreign keys) come first.
+- Use {num_rows} as the base row count. Give a table its own "num_rows" only when the brief states a count for it (or a ratio such as "20 orders per customer", applied to the parent's count); otherwise omit the key.
+- Supported column types: string, integer, float, boolean, date, email, phone, address, url
+
+Output EXACTLY this structure:
+{{
+  "tables": [
+    {{
+      "name": "<TableName>",
+      "primary_key": "<pk_column>",
+      "foreign_keys": [
+        {{ "column": "<fk_col>", "references_table": "<ParentTable>", "references_column": "<pk_col>" }}
+      ],
+      "columns": {{ "<col>": "<type>", ... }},
+      "num_rows": <optional row count for this table>
+    }}
+  ],
+  "num_rows": {num_rows},
+  "dataset_description": "<short description>"
+}}
+
+Project brief:
+{brief}
+"""
+        with self.telemetry.stage("schema") as stage:
+            if self.schema_store is not None and not regenerate:
+                hit = self.schema_store.lookup(brief, mode)
+                if hit is not None:
+                    schema, stage["similarity"] = hit
+                    stage["reused"] = True
+                    schema["num_rows"] = num_rows
+                    return schema
+            if not self.client and not self.offline:
+                raise RuntimeError("OpenAI client not configured")
+
+            for attempt in range(self.MAX_SCHEMA_RETRIES + 1):
+                max_tokens = self.planner.schema_max_tokens(brief, attempt)
+                resp = self._chat(
+                    [{"role": "system", "content": system}, {"role": "user", "content": user}],
+                    temperature=0.2,
+                    max_tokens=max_tokens,
+                    label="schema",
+                    fresh=regenerate,
+                )
+                if resp["finish_reason"] != "length":
+                    break
+            else:
+                raise RuntimeError(f"Schema response was cut off at {max_tokens} tokens; try a shorter brief.")
+            raw = resp["content"].strip()
+            raw = self._strip_fences(raw)
+            schema = json.loads(raw)
+        if self.schema_store is not None:
+            self.schema_store.put(brief, mode, schema)
+        return schema
+
+    # ── Agent 2 ── data rows ───────────────────────────────────────────────────
+    def generate_table_data(
+        self,
+        table: Dict[str, Any],
+        num_rows: int,
+        parent_ids: Dict[str, Sequence[Any]] | None = None,
+        on_rows: RowsCallback | None = None,
+        row_offset: int = 0,
+    ) -> pd.DataFrame:
+        """Generate ``num_rows`` rows for ``table``.
+
+        With a local engine attached, typed columns are synthesised in-process
+        and the LLM only supplies a pool of free-text values. Otherwise the
+        whole table comes from the LLM in token-sized batches run concurrently;
+        completions are streamed and ``on_rows`` receives each parsed row as
+        soon as its line is complete. Tables over ``LLM_MAX_ROWS`` always take
+        the local path (``bulk_engine`` when no engine is attached). Local
+        tables over ``sharding.DEFAULT_SHARD_ROWS`` rows are built in row
+        shards, on a pool of ``shard_workers`` processes when that is above 1.
+
+        FK columns whose parent keys are in ``parent_ids`` are left out of
+        generation and filled afterwards by ``self.fk_assigner``.
+
+        ``row_offset`` is the number of rows that already exist when appending:
+        primary keys continue after it and local random streams differ from
+        the first batch's.
+        """
+        fk_keys = self._assignable_fks(table, parent_ids)
+        body = self._without_columns(table, fk_keys) if fk_keys else table
+        engine = self.local_engine
+        if engine is None and num_rows > self.LLM_MAX_ROWS:
+            engine = self.bulk_engine
+        with self.telemetry.stage("table", table=table["name"], engine="local" if engine else "llm") as ev:
+            if not body["columns"]:
+                df = pd.DataFrame(index=pd.RangeIndex(num_rows))
+            elif engine is not None:
+                df = self._generate_local(body, num_rows, engine, row_offset)
+            else:
+                df = self._generate_llm(body, num_rows, on_rows, row_offset)
+            if fk_keys:
+                df = self._assign_foreign_keys(
+                    table, df, fk_keys, stream=row_offset, start=row_offset, total=row_offset + num_rows,
+                )
+            ev["rows"] = len(df)
+        self._record(table["name"], requested=num_rows, delivered=len(df), engine="local" if engine else "llm")
+        return df
+
+    @staticmethod
+    def _assignable_fks(
+        table: Dict[str, Any],
+        parent_ids: Dict[str, Sequence[Any]] | None,
+    ) -> Dict[str, Sequence[Any]]:
+        """FK column -> parent keys, for single-column FKs whose parent is ready."""
+        out = {}
+        for fk in table.get("foreign_keys", []):
+            col, ref = fk["column"], f"{fk['references_table']}.{fk['references_column']}"
+            if isinstance(col, str) and col in table["columns"] and len((parent_ids or {}).get(ref, [])):
+                out[col] = parent_ids[ref]
+        return out
+
+    @staticmethod
+    def _without_columns(table: Dict[str, Any], columns) -> Dict[str, Any]:
+        body = dict(table)
+        body["columns"] = {c: t for c, t in table["columns"].items() if c not in columns}
+        body["foreign_keys"] = [fk for fk in table.get("foreign_keys", []) if fk["column"] not in columns]
+        # key columns left in the body must be unique on their own
+        pk = [c for c in key_columns(table.get("primary_key")) if c not in columns]
+        if pk:
+            body["primary_key"] = pk[0] if len(pk) == 1 else pk
+        else:
+            body.pop("primary_key", None)
+        return body
+
+    def _assign_foreign_keys(
+        self,
+        table: Dict[str, Any],
+        df: pd.DataFrame,
+        fk_keys: Dict[str, Sequence[Any]],
+        stream: int = 0,
+        start: int = 0,
+        total: int | None = None,
+    ) -> pd.DataFrame:
+        """Fill FK columns from parent keys. ``start``/``total`` place ``df`` inside
+        a table built in parts (see ``ForeignKeyAssigner.assign``)."""
+        return self.fk_assigner.fill(table, df, fk_keys, stream, start, total)
+
+    def _record(self, table_name: str, **counts: Any) -> None:
+        """Add call counts to (or set requested/delivered/engine on) ``row_report``."""
+        with self._report_lock:
+            entry = self.row_report.setdefault(
+                table_name,
+                {"requested": 0, "delivered": 0, "calls": 0, "truncated_calls": 0, "continuation_calls": 0},
+            )
+            for k, v in counts.items():
+                entry[k] = v if k in ("requested", "delivered", "engine", "refresh") else entry[k] + v
+
+    def _generate_local(
+        self,
+        table: Dict[str, Any],
+        num_rows: int,
+        engine: LocalRowEngine,
+        row_offset: int = 0,
+    ) -> pd.DataFrame:
+        pools = self._text_pools(table, num_rows, engine)
+        if num_rows > sharding.DEFAULT_SHARD_ROWS:
+            pool = sharding.shared_pool(self.shard_workers) if self.shard_workers > 1 else None
+            return sharding.generate_frame(pool, table, num_rows, engine, pools, row_offset, check_stop=self._check_stop)
+        return engine.generate(table, num_rows, text_pools=pools, pk_start=row_offset + 1, stream=row_offset)
+
+    def _text_pools(self, table: Dict[str, Any], num_rows: int, engine: LocalRowEngine) -> Dict[str, List[Any]]:
+        """Free-text values for the engine's semantic columns, from one LLM batch."""
+        text_cols = engine.semantic_columns(table)
+        if not text_cols or not (self.client or self.offline):
+            return {}
+        text_table = {"name": table["name"], "columns": {c: table["columns"][c] for c in text_cols}}
+        pool_df = self._generate_llm(text_table, min(num_rows, self.TEXT_POOL_ROWS))
+        return {c: pool_df[c].tolist() for c in text_cols if c in pool_df.columns}
+
+    def _generate_llm(
+        self,
+        table: Dict[str, Any],
+        num_rows: int,
+        on_rows: RowsCallback | None = None,
+        row_offset: int = 0,
+    ) -> pd.DataFrame:
+        if not self.client and not self.offline:
+            raise RuntimeError("OpenAI client not configured")
+
+        columns = list(table["columns"].keys())
+        pk = table.get("primary_key")
+        batch_rows = self._rows_per_batch(table)
+
+        df = pd.DataFrame(columns=columns)
+        collected: List[pd.DataFrame] = []
+        for _ in range(self.MAX_TOPUP_ROUNDS + 1):
+            missing = num_rows - len(df)
+            if missing <= 0:
+                break
+            sizes = [batch_rows] * (missing // batch_rows)
+            if missing % batch_rows:
+                sizes.append(missing % batch_rows)
+            offsets = [row_offset + len(df) + sum(sizes[:i]) for i in range(len(sizes))]
+
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(sizes))) as pool:
+                futures = [
+                    pool.submit(self._generate_batch, table, n, offset, on_rows)
+                    for n, offset in zip(sizes, offsets)
+                ]
+                frames = [f.result() for f in futures]
+
+            collected.extend(self._align_columns(f, columns) for f in frames)
+            df = pd.concat(collected, ignore_index=True)
+            if pk and pk in df.columns:
+                df = df.drop_duplicates(subset=pk, keep="first").reset_index(drop=True)
+            collected = [df]
+
+        return df.head(num_rows).reset_index(drop=True)
+
+    def _generate_batch(
+        self,
+        table: Dict[str, Any],
+        num_rows: int,
+        row_offset: int,
+        on_rows: RowsCallback | None = None,
+    ) -> pd.DataFrame:
+        """One batch of rows, continued with follow-up calls while completions
+        are cut off by the token limit."""
+        columns = list(table["columns"].keys())
+        frames: List[pd.DataFrame] = []
+        remaining, offset = num_rows, row_offset
+        for attempt in range(self.MAX_CONTINUATIONS + 1):
+            df, truncated = self._request_rows(table, remaining, offset, on_rows)
+            self._record(table["name"], calls=1, truncated_calls=int(truncated), continuation_calls=int(attempt > 0))
+            if len(df):
+                frames.append(self._align_columns(df, columns))
+            remaining -= len(df)
+            offset += len(df)
+            if not truncated or remaining <= 0 or df.empty:
+                break
+        if not frames:
+            raise ValueError("Model returned no usable table rows.")
+        return frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+
+    def _request_rows(
+        self,
+        table: Dict[str, Any],
+        num_rows: int,
+        row_offset: int,
+        on_rows: RowsCallback | None = None,
+    ) -> Tuple[pd.DataFrame, bool]:
+        """A single data call; returns ``(rows, truncated)``.
+
+        A truncated completion keeps its complete rows and drops the unfinished
+        last one, so the frame may be short (or empty).
+        """
+        batch_note = ""
+        if row_offset:
+            batch_note = (
+                f"\nThis is a continuation batch: {row_offset} rows already exist. "
+                f"Continue primary key values from row {row_offset + 1} so they do not "
+                f"collide with earlier rows (e.g. numeric IDs start at {row_offset + 1}).\n"
+            )
+
+        prompt = f"""
+Generate a realistic synthetic dataset for the table "{table['name']}".
+
+Columns and types:
+{json.dumps(table['columns'], indent=2)}
+
+Primary key column: {table.get('primary_key', 'N/A')} — values must be unique.
+Number of rows: {num_rows}
+{batch_note}
+Requirements:
+1. Produce realistic, diverse, internally-consistent data.
+2. Primary key values must be unique across all rows.
+3. {format_instructions(self.output_format, list(table['columns'].keys()))}
+"""
+        parser = make_parser(self.output_format, list(table["columns"].keys()))
+
+        def on_delta(text: str):
+            rows = parser.feed(text)
+            if rows:
+                on_rows(table["name"], parser.header, rows)
+
+        resp = self._chat(
+            [
+                {"role": "system", "content": self.SYSTEM_PROMPTS[self.output_format]},
+                {"role": "user", "content": prompt},
+            ],
+            temperature=0.75,
+            max_tokens=self.planner.max_tokens_for(table, num_rows, self.output_format),
+            # the cache key keeps the schema-only limit, so a replay does not
+            # depend on the usage this process happened to observe
+            cache_tokens=self.planner.max_tokens_for(table, num_rows, self.output_format, learned=False),
+            on_delta=on_delta if on_rows else parser.feed,
+            response_format=response_format(self.output_format),
+            label=f"data:{table['name']}",
+        )
+        truncated = resp["finish_reason"] == "length"
+        parsed = {"table": table["name"], "requested": num_rows, "truncated": truncated}
+        try:
+            rows = parser.close(truncated=truncated)
+            if truncated and not parser.rows:
+                df = pd.DataFrame(columns=list(table["columns"].keys()))
+            else:
+                df = parser.to_frame()
+        except ValueError as e:
+            # the call returned nothing usable; it still counts in the parse totals
+            self.telemetry.emit("parse", **parsed, rows=0, rejected=parser.rejected, failed=True, error=str(e))
+            raise
+        self.telemetry.emit("parse", **parsed, rows=len(parser.rows), rejected=parser.rejected)
+        if rows and on_rows:
+            on_rows(table["name"], parser.header, rows)
+        if not resp.get("cached"):
+            # a replayed response says nothing about the current model's output
+            self.planner.observe(table, self.output_format, len(parser.rows), resp["usage"]["completion_tokens"])
+        return df, truncated
+
+    def _rows_per_batch(self, table: Dict[str, Any]) -> int:
+        """How many rows of this table fit comfortably in one completion."""
+        return self.planner.rows_per_call(table, self.output_format, self._learn_batch_size)
+
+    @staticmethod
+    def _align_columns(df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        # Batches can echo slightly different header spellings; the schema wins.
+        if len(df.columns) == len(columns):
+            df.columns = columns
+        return df
+
+    # ── Scheduler ── FK-aware table orchestration ─────────────────────────────
+    @staticmethod
+    def dependency_levels(tables_def: List[Dict[str, Any]]) -> List[List[str]]:
+        """Group table names into FK dependency levels (parents first).
+
+        Self-references and FKs to tables outside the schema are ignored for
+        ordering. Raises ``ValueError`` if the FK graph contains a cycle.
+        """
+        names = [t["name"] for t in tables_def]
+        parents = SyntheticDataGenerator._parent_tables(tables_def)
+        levels: List[List[str]] = []
+        placed: set = set()
+        while len(placed) < len(names):
+            level = [n for n in names if n not in placed and parents[n] <= placed]
+            if not level:
+                stuck = ", ".join(n for n in names if n not in placed)
+                raise ValueError(f"Foreign-key cycle detected between tables: {stuck}")
+            levels.append(level)
+            placed.update(level)
+        return levels
+
+    @staticmethod
+    def _parent_tables(tables_def: List[Dict[str, Any]]) -> Dict[str, set]:
+        names = {t["name"] for t in tables_def}
+        return {
+            t["name"]: {
+                fk["references_table"] for fk in t.get("foreign_keys", [])
+                if fk["references_table"] in names and fk["references_table"] != t["name"]
+            }
+            for t in tables_def
+        }
+
+    def generate_tables(
+        self,
+        tables_def: List[Dict[str, Any]],
+        num_rows: int,
+        on_table_done: Callable[[str, pd.DataFrame], None] | None = None,
+        on_rows: RowsCallback | None = None,
+        on_tick: Callable[[], None] | None = None,
+        previous_schema: Dict[str, Any] | None = None,
+        previous_tables: Dict[str, pd.DataFrame] | None = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Generate every table, running independent tables concurrently.
+
+        A child table is submitted as soon as all of its parent tables have
+        finished, so total latency tracks the depth of the FK graph rather than
+        the number of tables. ``on_table_done`` and ``on_tick`` (roughly every
+        ``TICK_S`` seconds) are invoked from the calling thread, which keeps
+        them safe for Streamlit updates; ``on_rows`` runs on worker threads.
+
+        ``num_rows`` is the base count; per-table sizes come from
+        ``plan_row_counts`` and are kept on ``self.row_counts``.
+
+        Given the previous run's schema and (validated) tables, only what the
+        schema diff requires is generated: unchanged tables are reused, grown
+        tables get just their extra rows, and FKs into regenerated parents are
+        reassigned. The per-table actions are kept on ``self.refresh_plan``.
+        """
+        levels = self.dependency_levels(tables_def)  # fails fast on cycles
+        self.row_counts = plan_row_counts(tables_def, num_rows, levels, self.row_overrides, self.fan_out_ratios)
+        self.row_report = {}
+        self.refresh_plan = {}
+        if previous_schema and previous_tables:
+            self.refresh_plan = plan_refresh(previous_schema["tables"], previous_tables, tables_def, self.row_counts)
+        by_name = {t["name"]: t for t in tables_def}
+        waiting_on = self._parent_tables(tables_def)
+        generated: Dict[str, pd.DataFrame] = {}
+        parent_ids: Dict[str, Sequence[Any]] = {}
+        referenced: Dict[str, set] = {}
+        for t in tables_def:
+            for fk in t.get("foreign_keys", []):
+                if isinstance(fk["references_column"], str):
+                    referenced.setdefault(fk["references_table"], set()).add(fk["references_column"])
+
+        with self.telemetry.stage("tables", tables=len(tables_def)):
+            with ThreadPoolExecutor(max_workers=max(1, len(tables_def))) as pool:
+                running = {}
+
+                def submit_ready():
+                    for name, deps in list(waiting_on.items()):
+                        if deps:
+                            continue
+                        del waiting_on[name]
+                        tbl = by_name[name]
+                        args = (tbl, self.row_counts[name], dict(parent_ids) if tbl.get("foreign_keys") else None, on_rows)
+                        entry = self.refresh_plan.get(name)
+                        if entry and entry["action"] != REGENERATE:
+                            fut = pool.submit(self._refresh_table, *args, entry, previous_tables[name])
+                        else:
+                            fut = pool.submit(self.generate_table_data, *args)
+                        running[fut] = name
+
+                submit_ready()
+                while running:
+                    done, _ = wait(running, timeout=self.TICK_S, return_when=FIRST_COMPLETED)
+                    if on_tick:
+                        on_tick()
+                    if self.should_stop is not None and self.should_stop():
+                        for fut in running:
+                            fut.cancel()  # queued tables never start; running ones stop at their next call
+                        self._check_stop()
+                    for fut in done:
+                        name = running.pop(fut)
+                        df = fut.result()
+                        generated[name] = df
+
+                        # Register the keys children reference, for local FK assignment
+                        for col in referenced.get(name, ()):
+                            if col in df.columns:
+                                parent_ids[f"{name}.{col}"] = df[col].dropna().unique()
+                        for deps in waiting_on.values():
+                            deps.discard(name)
+
+                        if on_table_done:
+                            on_table_done(name, df)
+                    submit_ready()
+
+        # Preserve schema order for display and export
+        return {t["name"]: generated[t["name"]] for t in tables_def}
+
+    def _refresh_table(
+        self,
+        table: Dict[str, Any],
+        num_rows: int,
+        parent_ids: Dict[str, Sequence[Any]] | None,
+        on_rows: RowsCallback | None,
+        entry: Dict[str, Any],
+        previous: pd.DataFrame,
+    ) -> pd.DataFrame:
+        """Bring a table from the previous run up to date (see ``schema_diff``)."""
+        action = entry["action"]
+        df = previous
+        if action == TRUNCATE:
+            df = previous.head(num_rows)
+        elif action == EXTEND:
+            extra = self.generate_table_data(table, num_rows - len(previous), parent_ids, on_rows, row_offset=len(previous))
+            df = self._append_rows(table, previous, extra)
+        relink = {c: keys for c, keys in self._assignable_fks(table, parent_ids).items() if c in entry["relink"]}
+        if relink:
+            df = self._assign_foreign_keys(table, df, relink)
+        self._record(table["name"], requested=num_rows, delivered=len(df), refresh=action)
+        self.row_report[table["name"]].setdefault("engine", "reused")
+        return df
+
+    def _append_rows(self, table: Dict[str, Any], previous: pd.DataFrame, extra: pd.DataFrame) -> pd.DataFrame:
+        """Append newly generated rows, keeping primary keys unique and continuous.
+
+        Integer keys are renumbered after the previous maximum, unless they
+        are also an FK; other keys that collide with existing ones are dropped.
+        """
+        pk = table.get("primary_key")
+        fk_cols = {fk["column"] for fk in table.get("foreign_keys", []) if isinstance(fk["column"], str)}
+        extra, _ = self.coercer.coerce_table(extra.reset_index(drop=True), table)
+        if isinstance(pk, str) and pk in extra.columns and pk in previous.columns and len(extra):
+            if (
+                pd.api.types.is_integer_dtype(previous[pk])
+                and schema_kind(table["columns"].get(pk)) == "integer"
+                and pk not in fk_cols
+            ):
+                start = int(previous[pk].max()) + 1 if len(previous) else 1
+                extra[pk] = pd.array(range(start, start + len(extra)), dtype=previous[pk].dtype)
+            else:
+                extra = extra[~extra[pk].isin(previous[pk])]
+        # category columns from the previous run would become object on concat anyway
+        previous = previous.astype({c: object for c in previous.columns if isinstance(previous[c].dtype, pd.CategoricalDtype)})
+        return pd.concat([previous, extra], ignore_index=True)
+
+    # ── Agent 3 ── validation + repair ────────────────────────────────────────
+    def validate_and_repair(
+        self,
+        tables: Dict[str, pd.DataFrame],
+        schema: Dict[str, Any],
+        only: Sequence[str] | None = None,
+    ) -> Dict[str, pd.DataFrame]:
+        """Coerce columns to their schema dtypes, then enforce PK uniqueness and
+        FK integrity in-process (no LLM call needed).
+
+        Typed keys make the FK checks compare integers rather than strings.
+        Per-column coercion failures and memory saved are kept on
+        ``self.coercion_report``; the integrity findings (duplicates dropped,
+        FK repairs, fan-out per relationship) on ``self.integrity_report``.
+
+        ``only`` limits both steps to the named tables (the others are already
+        validated); their report entries are carried over from the last run.
+        """
+        previous = (self.coercion_report, self.integrity_report) if only is not None else ({}, {})
+        with self.telemetry.stage("coerce"):
+            subset = tables if only is None else {n: df for n, df in tables.items() if n in only}
+            typed, self.coercion_report = self.coercer.run(subset, schema)
+            typed = {**tables, **typed}
+        with self.telemetry.stage("integrity"):
+            repaired, self.integrity_report = self.integrity.run(typed, schema, only=only)
+        for report, last in zip((self.coercion_report, self.integrity_report), previous):
+            kept = {n: e for n, e in last.get("tables", {}).items() if n in tables and n not in report["tables"]}
+            report["tables"] = {**kept, **report["tables"]}
+        self.telemetry.emit(
+            "repairs",
+            fk_repairs=self.integrity_report["fk_repairs"],
+            pk_duplicates_dropped=self.integrity_report["pk_duplicates_dropped"],
+            coercion_failures=self.coercion_report["failed_values"],
+        )
+        return repaired
+
+    def affected_tables(self) -> List[str] | None:
+        """Tables the last ``generate_tables`` changed, or None after a full run."""
+        if not self.refresh_plan:
+            return None
+        return [name for name, entry in self.refresh_plan.items() if entry["affected"]]
+
+    # ── Full pipeline ──────────────────────────────────────────────────────────
+    def synthesize(
+        self,
+        brief: str,
+        mode: str,
+        num_rows: int,
+        on_table_done: Callable[[str, pd.DataFrame], None] | None = None,
+        regenerate_schema: bool = False,
+        previous: Tuple[Dict[str, Any], Dict[str, pd.DataFrame]] | None = None,
+    ) -> Tuple[Dict[str, Any], Dict[str, pd.DataFrame]]:
+        """Run all three agents and return ``(schema, tables)``.
+
+        ``previous`` is an earlier ``(schema, tables)`` result to update
+        incrementally instead of starting from scratch.
+        """
+        self.telemetry.reset()
+        schema = self.generate_schema(brief, mode, num_rows, regenerate=regenerate_schema)
+        prev_schema, prev_tables = previous or (None, None)
+        tables = self.generate_tables(
+            schema["tables"], num_rows, on_table_done,
+            previous_schema=prev_schema, previous_tables=prev_tables,
+        )
+        return schema, self.validate_and_repair(tables, schema, only=self.affected_tables())
+
+    # ── helpers ────────────────────────────────────────────────────────────────
+    def _chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        model: str = "gpt-4o-mini",
+        on_delta: Callable[[str], None] | None = None,
+        response_format: Dict[str, Any] | None = None,
+        label: str = "",
+        fresh: bool = False,
+        cache_tokens: int | None = None,
+    ) -> Dict[str, Any]:
+        """Run one chat completion, served from the response cache when possible.
+
+        When ``on_delta`` is given the completion is streamed and each text
+        delta is passed to it as it arrives (a cached response arrives as one
+        delta). API requests go through ``self.caller``, which paces them
+        against the shared rate limits and retries transient failures.
+        Each call is recorded on ``self.telemetry`` under ``label``. ``fresh``
+        skips the cache lookup (outside replay-only mode) but still stores
+        the new response. ``cache_tokens`` stands in for ``max_tokens`` in the
+        cache key; a response served from the cache is marked ``cached``.
+        """
+        t0 = time.perf_counter()
+        key = None
+        if self.cache is not None:
+            key = self.cache.key(model, messages, temperature, cache_tokens or max_tokens)
+            # get() raises CacheMiss in replay-only mode, where fresh cannot apply
+            cached = None if fresh and not self.cache.replay_only else self.cache.get(key)
+            if cached is not None:
+                if on_delta:
+                    on_delta(cached["content"])
+                self.telemetry.emit("llm_call", label=label, model=model, cached=True,
+                                    wall_s=time.perf_counter() - t0, queue_wait_s=0.0,
+                                    prompt_tokens=0, completion_tokens=0, cost_usd=0.0)
+                return {**cached, "cached": True}
+
+        if not self.client:
+            raise RuntimeError("OpenAI client not configured")
+        self._check_stop()
+        extra = {"response_format": response_format} if response_format else {}
+        estimate = sum(len(m["content"]) for m in messages) // 4 + max_tokens
+        started = [t0]
+
+        def attempt():
+            started[0] = time.perf_counter()  # the last attempt's start ends the queue wait
+            return self._complete(model, messages, temperature, max_tokens, on_delta, extra)
+
+        payload = self.caller.call(attempt, tokens=estimate)
+        usage = payload["usage"]
+        if usage["prompt_tokens"] or usage["completion_tokens"]:
+            self.caller.refund_tokens(estimate - usage["prompt_tokens"] - usage["completion_tokens"])
+        self.telemetry.emit(
+            "llm_call", label=label, model=model, cached=False,
+            wall_s=time.perf_counter() - t0, queue_wait_s=started[0] - t0,
+            prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"],
+            cost_usd=estimate_cost(model, usage["prompt_tokens"], usage["completion_tokens"]),
+            finish_reason=payload["finish_reason"],
+        )
+
+        if key is not None:
+            self.cache.put(key, payload)
+        return payload
+
+    @staticmethod
+    def _strip_fences(text: str) -> str:
+        if "```json" in text:
+            text = text.split("```json")[1].split("```")[0]
+        elif "```" in text:
+            text = text.split("```")[1].split("```")[0]
+        return text.strip()
+
+    def _complete(
+        self,
+        model: str,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        on_delta: Callable[[str], None] | None,
+        extra: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """One API request (no cache, no retries) turned into a payload dict."""
+        if on_delta is None:
+            resp = self.client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                **extra,
+            )
+            choice = resp.choices[0]
+            return self._payload(choice.message.content, choice.finish_reason, getattr(resp, "usage", None))
+
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stream_options={"include_usage": True},
+            **extra,
+        )
+        parts: List[str] = []
+        finish_reason = usage = None
+        try:
+            for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+                    on_delta(choice.delta.content)
+                if choice.finish_reason:
+                    finish_reason = choice.finish_reason
+        except Exception as e:
+            if parts:
+                # rows already went to on_delta; a retry would deliver them twice
+                raise RuntimeError(f"Completion stream interrupted after {len(parts)} chunks: {e}") from e
+            raise
+        return self._payload("".join(parts), finish_reason, usage)
+
+    @staticmethod
+    def _payload(content: str | None, finish_reason: str | None, usage: Any) -> Dict[str, Any]:
+        return {
+            "content": content or "",
+            "finish_reason": finish_reason,
+            "usage": {
+                "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            },
+        }
+
+    @staticmethod
+    def _markdown_to_df(md: str) -> pd.DataFrame:
+        return markdown_to_df(md)
+
+    # ── Excel builder ──────────────────────────────────────────────────────────
+    @staticmethod
+    def build_excel(tables: Dict[str, pd.DataFrame], schema: Dict[str, Any], fast: bool | None = None) -> bytes:
+        # Large datasets go through the write-only streaming builder automatically
+        from excel_export import build_excel  # openpyxl is only needed once a download is built
+
+        return build_excel(tables, schema, fast=fast)
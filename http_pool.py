@@ -0,0 +1,119 @@
+"""Bounded, metered HTTP connection pools for the OpenAI clients.
+
+``clients.get_client`` builds one pool per API key and every session using
+that key shares it, so keep-alive connections and TLS sessions are reused
+across users instead of being opened per session. Limits come from the
+environment:
+
+* ``FAUXFOUNDRY_POOL_CONNECTIONS`` — open connections per key (default 32);
+  requests beyond it queue inside the pool
+* ``FAUXFOUNDRY_POOL_KEEPALIVE`` — idle connections kept warm (default 16)
+* ``FAUXFOUNDRY_POOL_KEEPALIVE_S`` — idle connection lifetime (default 30s)
+* ``FAUXFOUNDRY_HTTP2=1`` — negotiate HTTP/2 when the ``h2`` package is installed
+
+``MeteredTransport.stats()`` reports in-flight requests, queueing and open
+connections, which is what pool saturation looks like from the outside.
+"""
+import importlib
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator
+
+from openai import DefaultHttpxClient
+
+# The SDK's own HTTP library (httpx for openai 1.x, httpx2 for later releases);
+# a transport from the other one would be rejected by the SDK's client.
+httpx = importlib.import_module(DefaultHttpxClient.__mro__[1].__module__.split(".")[0])
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = int(os.environ.get("FAUXFOUNDRY_POOL_CONNECTIONS", 32))
+    max_keepalive: int = int(os.environ.get("FAUXFOUNDRY_POOL_KEEPALIVE", 16))
+    keepalive_expiry_s: float = float(os.environ.get("FAUXFOUNDRY_POOL_KEEPALIVE_S", 30))
+    http2: bool = _env_flag("FAUXFOUNDRY_HTTP2")
+
+    def limits(self) -> "httpx.Limits":
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=min(self.max_keepalive, self.max_connections),
+            keepalive_expiry=self.keepalive_expiry_s,
+        )
+
+
+class _CountedStream(httpx.SyncByteStream):
+    """Response body that reports back when it is closed (the connection is free again)."""
+
+    def __init__(self, stream: "httpx.SyncByteStream", done: Callable[[], None]):
+        self._stream = stream
+        self._done = done
+        self._closed = False
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._done()
+
+
+class MeteredTransport(httpx.HTTPTransport):
+    def __init__(self, config: PoolConfig):
+        self.config = config
+        self.http2 = config.http2 and http2_available()
+        super().__init__(limits=config.limits(), http2=self.http2)
+        self._lock = threading.Lock()
+        self._stats = {"requests": 0, "errors": 0, "in_flight": 0, "peak_in_flight": 0}
+
+    def handle_request(self, request: "httpx.Request") -> "httpx.Response":
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["in_flight"] += 1
+            self._stats["peak_in_flight"] = max(self._stats["peak_in_flight"], self._stats["in_flight"])
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            with self._lock:
+                self._stats["errors"] += 1
+            self._release()
+            raise
+        response.stream = _CountedStream(response.stream, self._release)
+        return response
+
+    def _release(self) -> None:
+        with self._lock:
+            self._stats["in_flight"] -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+        # the pool itself is httpcore's; read what it exposes without relying on it
+        connections = list(getattr(getattr(self, "_pool", None), "connections", []))
+        idle = sum(1 for c in connections if c.is_idle())
+        cap = self.config.max_connections
+        stats.update(
+            max_connections=cap,
+            connections=len(connections),
+            idle=idle,
+            queued=max(0, stats["in_flight"] - cap),
+            saturation=round(min(stats["in_flight"], cap) / cap, 3) if cap else 0.0,
+            http2=self.http2,
+        )
+        return stats
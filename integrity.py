@@ -0,0 +1,213 @@
+"""Vectorized referential-integrity checks and repair.
+
+Keys are compared through hashed pandas indexes (``Index.isin`` /
+``MultiIndex.isin``), so PK uniqueness, FK membership and fan-out checks are
+O(n) with no per-row Python loops. Single and composite keys are supported: a
+schema ``primary_key`` or FK ``column`` / ``references_column`` may be a string
+or a list of column names.
+
+Each FK is resolved once into integer parent positions, which also yields the
+children-per-parent counts via ``np.bincount``.
+
+``fan_out`` rules bound how many child rows each parent may have, keyed by
+``"Child.fk_column"``::
+
+    {"Orders.customer_id": {"min": 1, "max": 50}}
+
+or written as a spec string, as taken by the sidebar:
+``"Orders.customer_id=1-50, Reviews.product_id=-20"``. Violations are only
+counted for relationships that have a rule.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+_FAN_OUT_ITEM = re.compile(r"^\s*([\w\- ]+\.[\w+\- ]+?)\s*=\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+def parse_fan_out(spec: str) -> Dict[str, Dict[str, int]]:
+    """``"Orders.customer_id=1-50"`` -> ``{"Orders.customer_id": {"min": 1, "max": 50}}``.
+
+    Either bound may be left out (``=-50``, ``=1-``), not both.
+    """
+    rules: Dict[str, Dict[str, int]] = {}
+    for item in filter(str.strip, re.split(r"[,;\n]", spec or "")):
+        m = _FAN_OUT_ITEM.match(item)
+        if not m or not (m.group(2) or m.group(3)):
+            raise ValueError(f"Bad fan-out bound {item.strip()!r}; use Child.fk_column=MIN-MAX (either may be left out)")
+        label, lo, hi = m.groups()
+        rule = {k: int(v) for k, v in (("min", lo), ("max", hi)) if v}
+        if rule.get("min", 0) > rule.get("max", rule.get("min", 0)):
+            raise ValueError(f"Bad fan-out bound {item.strip()!r}; MIN is above MAX")
+        rules[label] = rule
+    return rules
+
+
+def _cols(spec: Any) -> List[str]:
+    if spec is None or spec == "":
+        return []
+    return [spec] if isinstance(spec, str) else list(spec)
+
+
+def _key_index(arrays: List[pd.Series]) -> pd.Index:
+    """Hashable key index over one or more aligned columns."""
+    if len(arrays) == 1:
+        return pd.Index(arrays[0])
+    return pd.MultiIndex.from_arrays(arrays)
+
+
+def _is_number(s: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s)
+
+
+def _as_kind_of(parent: pd.Series, child: pd.Series) -> pd.Series:
+    """Express parent keys in the child column's representation.
+
+    Generated tables often hold ``"7"`` on one side and ``7`` on the other.
+    Only the parent side (normally the smaller one) is converted, and the
+    conversion is vectorized.
+    """
+    if _is_number(parent) == _is_number(child) and (_is_number(child) or parent.dtype == child.dtype):
+        return parent
+    if _is_number(child):
+        return pd.to_numeric(parent, errors="coerce")
+    if pd.api.types.is_float_dtype(parent) and parent.dropna().mod(1).eq(0).all():
+        parent = parent.astype("Int64")  # 7.0 -> "7", not "7.0"
+    return parent.astype(str)
+
+
+def check_primary_key(df: pd.DataFrame, pk: Any) -> Dict[str, int]:
+    cols = [c for c in _cols(pk) if c in df.columns]
+    if not cols:
+        return {"duplicates": 0, "nulls": 0}
+    return {
+        "duplicates": int(df.duplicated(subset=cols).sum()),
+        "nulls": int(df[cols].isna().any(axis=1).sum()),
+    }
+
+
+def fk_codes(child: pd.DataFrame, cols: List[str], parent: pd.DataFrame, ref_cols: List[str]):
+    """Map every child row to the position of its parent key.
+
+    Returns ``(codes, parent_keys)`` where ``parent_keys`` is the de-duplicated
+    parent key index (in the child's representation) and ``codes`` is -1 for
+    child rows with no matching parent.
+    """
+    parent_keys = _key_index([_as_kind_of(parent[r], child[c]) for c, r in zip(cols, ref_cols)]).dropna().unique()
+    child_keys = _key_index([child[c] for c in cols])
+    return parent_keys.get_indexer(child_keys), parent_keys
+
+
+def invalid_fk_mask(child: pd.DataFrame, cols: List[str], parent: pd.DataFrame, ref_cols: List[str]) -> np.ndarray:
+    """Boolean mask of child rows whose FK tuple is not present in the parent."""
+    codes, _ = fk_codes(child, cols, parent, ref_cols)
+    return codes < 0
+
+
+def fan_out_summary(per_parent: np.ndarray) -> Dict[str, Any]:
+    if len(per_parent) == 0:
+        return {"min": 0, "max": 0, "mean": 0.0, "childless_parents": 0}
+    return {
+        "min": int(per_parent.min()),
+        "max": int(per_parent.max()),
+        "mean": float(per_parent.mean()),
+        "childless_parents": int((per_parent == 0).sum()),
+    }
+
+
+class IntegrityEngine:
+    def __init__(self, fan_out: Optional[Dict[str, Dict[str, int]]] = None, drop_duplicate_pks: bool = True):
+        self.fan_out = fan_out or {}
+        self.drop_duplicate_pks = drop_duplicate_pks
+
+    def run(
+        self,
+        tables: Dict[str, pd.DataFrame],
+        schema: Dict[str, Any],
+        only: Optional[Iterable[str]] = None,
+    ) -> Tuple[Dict[str, pd.DataFrame], Dict[str, Any]]:
+        """Validate and repair every table; returns ``(tables, report)``.
+
+        Frames are only copied when something in them is repaired. ``only``
+        restricts checks and repairs to those tables; the others still serve
+        as FK parents.
+        """
+        check = set(tables) if only is None else set(only) & set(tables)
+        repaired = dict(tables)
+        report: Dict[str, Any] = {
+            "tables": {}, "pk_duplicates_dropped": 0, "fk_repairs": 0,
+            "fan_out_rules": len(self.fan_out), "fan_out_violations": 0,
+        }
+
+        # PKs first so children are validated against de-duplicated parents
+        for tbl in schema["tables"]:
+            name = tbl["name"]
+            if name not in check:
+                continue
+            pk_cols = [c for c in _cols(tbl.get("primary_key")) if c in repaired[name].columns]
+            pk = check_primary_key(repaired[name], pk_cols)
+            entry = report["tables"].setdefault(name, {"rows": len(repaired[name]), "pk": pk, "fks": {}})
+            if pk["duplicates"] and self.drop_duplicate_pks:
+                repaired[name] = repaired[name].drop_duplicates(subset=pk_cols).reset_index(drop=True)
+                report["pk_duplicates_dropped"] += pk["duplicates"]
+                entry["rows"] = len(repaired[name])
+
+        for tbl in schema["tables"]:
+            name = tbl["name"]
+            if name not in check:
+                continue
+            df = repaired[name]
+            copied = False
+            for fk in tbl.get("foreign_keys", []):
+                cols = _cols(fk["column"])
+                ref_t = fk["references_table"]
+                ref_cols = _cols(fk["references_column"])
+                if ref_t not in repaired or not all(c in df.columns for c in cols):
+                    continue
+                parent = repaired[ref_t]
+                if not all(c in parent.columns for c in ref_cols) or parent.empty:
+                    continue
+
+                codes, parent_keys = fk_codes(df, cols, parent, ref_cols)
+                if len(parent_keys) == 0:
+                    continue
+                bad = codes < 0
+                n_bad = int(bad.sum())
+                if n_bad:
+                    if not copied:
+                        df, copied = df.copy(), True
+                    # Replace invalid FK values by cycling through valid parent keys
+                    fill = np.arange(n_bad) % len(parent_keys)
+                    codes[bad] = fill
+                    for i, c in enumerate(cols):
+                        keys = parent_keys if len(cols) == 1 else parent_keys.get_level_values(i)
+                        values = df[c].to_numpy(dtype=None if _is_number(df[c]) else object, copy=True)
+                        fill_values = keys.to_numpy()[fill]
+                        if values.dtype.kind in "iu" and fill_values.dtype.kind == "f":
+                            if np.all(np.mod(fill_values, 1) == 0):
+                                fill_values = fill_values.astype(values.dtype)
+                            else:
+                                values = values.astype(float)
+                        values[bad] = fill_values
+                        # keep compact nullable dtypes (Int32, ...) from the coercion stage
+                        df[c] = pd.array(values, dtype=df[c].dtype) if isinstance(df[c].dtype, pd.api.extensions.ExtensionDtype) and values.dtype.kind != "f" else values
+                    report["fk_repairs"] += n_bad
+
+                label = f"{name}.{'+'.join(cols)}"
+                per_parent = np.bincount(codes, minlength=len(parent_keys))
+                rule = self.fan_out.get(label)
+                violations = 0
+                if rule:
+                    lo, hi = rule.get("min", 0), rule.get("max", np.inf)
+                    violations = int(((per_parent < lo) | (per_parent > hi)).sum())
+                    report["fan_out_violations"] += violations
+                report["tables"][name]["fks"][label] = {
+                    "invalid": n_bad,
+                    "fan_out": fan_out_summary(per_parent),
+                    "fan_out_violations": violations,
+                }
+            repaired[name] = df
+        return repaired, report
@@ -0,0 +1,198 @@
+"""Background jobs for long synthesis runs.
+
+A ``JobRunner`` owns a bounded thread pool shared by the whole server process.
+Each submitted job gets an ID and belongs to an owner (one browser session).
+Jobs queue when every worker is busy. Callers poll ``Job.snapshot()`` for
+status and progress instead of blocking on the work, so a Streamlit rerun or
+page refresh no longer kills a run: the job keeps going and its result can be
+picked up later. Work can also publish partial results (for a live preview),
+keyed for example by table, that the poller reads from the snapshot.
+
+Finished jobs hold their results in memory, so they are not kept forever: on
+every submit and poll, jobs finished more than ``DEFAULT_JOB_TTL_S`` seconds
+ago are dropped, as are finished jobs past the ``keep_finished`` newest per
+owner or the ``max_finished`` newest on the whole server. A session that is
+abandoned mid-run therefore does not pin its tables for the server's life.
+
+Cancelling a queued job removes it from the queue. A running job is cancelled
+cooperatively: ``Job.cancelled`` becomes true, and the work is expected to
+check it (the generator does so before every API call).
+"""
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+DEFAULT_JOB_WORKERS = int(os.environ.get("FAUXFOUNDRY_JOB_WORKERS", 2))
+DEFAULT_JOB_TTL_S = float(os.environ.get("FAUXFOUNDRY_JOB_TTL_S", 3600))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class Job:
+    def __init__(self, owner: str, label: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.owner = owner
+        self.label = label
+        self.status = QUEUED
+        self.progress = 0.0
+        self.message = "Queued"
+        self.created = time.time()
+        self.started: float | None = None
+        self.finished: float | None = None
+        self.result: Any = None
+        self.partial: Dict[str, Any] = {}  # latest partial results, for a live preview
+        self.error: str | None = None
+        self._cancel = threading.Event()
+        self._future: Future | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def update(self, progress: float | None = None, message: str | None = None) -> None:
+        """Report progress (0..1) and/or a status line; called from the job's thread."""
+        with self._lock:
+            if progress is not None:
+                self.progress = max(0.0, min(1.0, progress))
+            if message is not None:
+                self.message = message
+
+    def show(self, key: str, value: Any) -> None:
+        """Publish ``value`` as the latest partial result for ``key``."""
+        with self._lock:
+            self.partial[key] = value
+
+    def clear_partial(self) -> None:
+        with self._lock:
+            self.partial = {}
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            end = self.finished or time.time()
+            return {
+                "id": self.id,
+                "label": self.label,
+                "status": self.status,
+                "progress": self.progress,
+                "message": self.message,
+                "error": self.error,
+                "partial": dict(self.partial),
+                "elapsed_s": end - self.started if self.started else 0.0,
+            }
+
+    def _set(self, **fields: Any) -> None:
+        with self._lock:
+            for k, v in fields.items():
+                setattr(self, k, v)
+
+
+class JobRunner:
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_JOB_WORKERS,
+        keep_finished: int = 20,
+        max_finished: int = 100,
+        ttl_s: float = DEFAULT_JOB_TTL_S,
+    ):
+        """At most ``max_workers`` jobs run at once. Each owner keeps its
+        ``keep_finished`` most recent finished jobs and the server its
+        ``max_finished`` most recent, for at most ``ttl_s`` seconds."""
+        self.max_workers = max_workers
+        self.keep_finished = keep_finished
+        self.max_finished = max_finished
+        self.ttl_s = ttl_s
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fauxfoundry-job")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, owner: str, label: str, work: Callable[[Job], Any]) -> Job:
+        """Queue ``work(job)``; its return value becomes ``job.result``."""
+        job = Job(owner, label)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        job._future = self._pool.submit(self._run, job, work)
+        return job
+
+    def _run(self, job: Job, work: Callable[[Job], Any]) -> None:
+        if job.cancelled:
+            job._set(status=CANCELLED, message="Cancelled", finished=time.time())
+            return
+        job._set(status=RUNNING, message="Starting…", started=time.time())
+        try:
+            result = work(job)
+        except Exception as e:
+            if job.cancelled:
+                job._set(status=CANCELLED, message="Cancelled", finished=time.time())
+            else:
+                job._set(status=FAILED, message="Failed", error=str(e), finished=time.time())
+            return
+        job._set(status=DONE, progress=1.0, message="Done", result=result, finished=time.time())
+
+    def cancel(self, job_id: str, owner: str | None = None) -> bool:
+        """Request cancellation; False if the job is unknown, someone else's or already over."""
+        job = self.get(job_id, owner)
+        if job is None or job.status in FINISHED:
+            return False
+        job._cancel.set()
+        if job._future is not None and job._future.cancel():  # still queued: never starts
+            job._set(status=CANCELLED, message="Cancelled", finished=time.time())
+        else:
+            job.update(message="Cancelling…")
+        return True
+
+    def get(self, job_id: str, owner: str | None = None) -> Job | None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (owner is not None and job.owner != owner):
+            return None
+        return job
+
+    def jobs_for(self, owner: str) -> List[Job]:
+        """The owner's jobs, newest first."""
+        with self._lock:
+            self._prune()
+            jobs = [j for j in self._jobs.values() if j.owner == owner]
+        return sorted(jobs, key=lambda j: -j.created)
+
+    def forget(self, job_id: str, owner: str | None = None) -> None:
+        """Drop a finished job (and its result) from the runner."""
+        job = self.get(job_id, owner)
+        if job is not None and job.status in FINISHED:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            self._prune()
+            jobs = list(self._jobs.values())
+        counts = {s: 0 for s in (QUEUED, RUNNING, DONE, FAILED, CANCELLED)}
+        for j in jobs:
+            counts[j.status] += 1
+        return {"workers": self.max_workers, **counts}
+
+    def _prune(self) -> None:
+        """Drop expired finished jobs and those past the per-owner and server caps."""
+        expiry = time.time() - self.ttl_s
+        finished = sorted(
+            (j for j in self._jobs.values() if j.status in FINISHED),
+            key=lambda j: -j.created,
+        )
+        per_owner: Dict[str, int] = {}
+        for i, job in enumerate(finished):
+            per_owner[job.owner] = per_owner.get(job.owner, 0) + 1
+            if (
+                i >= self.max_finished
+                or per_owner[job.owner] > self.keep_finished
+                or (job.finished or job.created) < expiry
+            ):
+                del self._jobs[job.id]
@@ -0,0 +1,163 @@
+"""Persistent, content-addressed cache for LLM chat completions.
+
+Each response is stored as one JSON file named after a SHA-256 of the request
+(model, messages, temperature, max_tokens). Files are touched on every hit so
+their mtime doubles as an LRU clock; eviction drops entries older than
+``max_age_s`` first, then the least recently used ones until the cache fits in
+``max_bytes``. Entry count and size are running totals, re-synced with the
+directory on every sweep, so ``stats()`` never walks the cache.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_CACHE_DIR = os.environ.get("FAUXFOUNDRY_CACHE_DIR", ".fauxfoundry_cache")
+
+
+class CacheMiss(RuntimeError):
+    """Raised in replay-only mode when a request has no cached response."""
+
+
+class ResponseCache:
+    EVICT_EVERY = 50  # puts between eviction sweeps
+
+    def __init__(
+        self,
+        root: str = DEFAULT_CACHE_DIR,
+        max_bytes: int = 256 * 1024 * 1024,
+        max_age_s: float = 30 * 24 * 3600,
+        replay_only: bool = False,
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.replay_only = replay_only
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._entry_count = 0
+        self._entry_bytes = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self.evict()
+
+    # ── keys ──────────────────────────────────────────────────────────────────
+    @staticmethod
+    def key(model: str, messages: List[Dict[str, str]], temperature: float, max_tokens: int) -> str:
+        blob = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(blob.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.json")
+
+    # ── lookup / store ────────────────────────────────────────────────────────
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as fh:
+                payload = json.load(fh)
+            os.utime(path)  # bump LRU position
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            if self.replay_only:
+                raise CacheMiss(f"No cached response for request {key[:12]}… (replay-only mode)")
+            return None
+        with self._lock:
+            self.hits += 1
+        return payload
+
+    def put(self, key: str, payload: Dict[str, Any]) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write-then-rename so concurrent readers never see a partial file
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(payload, fh, ensure_ascii=False)
+        size = os.path.getsize(tmp)
+        try:
+            replaced = os.path.getsize(path)
+        except OSError:
+            replaced = None
+        os.replace(tmp, path)
+
+        with self._lock:
+            self._entry_count += replaced is None
+            self._entry_bytes += size - (replaced or 0)
+            self._puts += 1
+            sweep = self._puts % self.EVICT_EVERY == 0
+        if sweep:
+            self.evict()
+
+    # ── maintenance ───────────────────────────────────────────────────────────
+    def _entries(self) -> List[tuple]:
+        entries = []
+        for dirpath, _, files in os.walk(self.root):
+            for f in files:
+                if not f.endswith(".json"):
+                    continue
+                p = os.path.join(dirpath, f)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+        return entries
+
+    def evict(self) -> int:
+        """Apply age and size limits. Returns the number of entries removed."""
+        with self._lock:
+            now = time.time()
+            removed = 0
+            keep = []
+            for mtime, size, p in self._entries():
+                if now - mtime > self.max_age_s:
+                    removed += self._remove(p)
+                else:
+                    keep.append((mtime, size, p))
+
+            total = sum(size for _, size, _ in keep)
+            count = len(keep)
+            for mtime, size, p in sorted(keep):
+                if total <= self.max_bytes:
+                    break
+                removed += self._remove(p)
+                total -= size
+                count -= 1
+            self._entry_count = count
+            self._entry_bytes = total
+            return removed
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+            return 1
+        except OSError:
+            return 0
+
+    def clear(self) -> int:
+        with self._lock:
+            n = sum(self._remove(p) for _, _, p in self._entries())
+            self.hits = self.misses = 0
+            self._entry_count = self._entry_bytes = 0
+            return n
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": self._entry_count,
+                "bytes": self._entry_bytes,
+            }
@@ -0,0 +1,245 @@
+"""Local, NumPy-vectorized row engine for the schema's structured column types.
+
+Everything except free-text ``string`` columns is synthesised in-process from a
+seedable ``numpy.random.Generator``, so row counts in the millions cost no
+tokens. Semantic text columns are filled by sampling a small pool of values
+supplied by the caller (normally a single LLM batch).
+"""
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from fk_assign import key_columns
+
+SUPPORTED_TYPES = ("string", "integer", "float", "boolean", "date", "email", "phone", "address", "url")
+
+# Types that need real-world semantics and are therefore left to the LLM.
+SEMANTIC_TYPES = ("string",)
+
+# Name-based defaults for common numeric columns; anything else uses the type default.
+_NAME_HINTS: Dict[str, Dict[str, Any]] = {
+    "age":      {"min": 18, "max": 90},
+    "year":     {"min": 1990, "max": 2025},
+    "quantity": {"min": 1, "max": 20},
+    "qty":      {"min": 1, "max": 20},
+    "rating":   {"min": 1, "max": 5},
+    "score":    {"min": 0, "max": 100},
+    "price":    {"min": 1.0, "max": 500.0, "decimals": 2},
+    "amount":   {"min": 1.0, "max": 5000.0, "decimals": 2},
+    "salary":   {"min": 25000.0, "max": 250000.0, "decimals": 2},
+    "discount": {"min": 0.0, "max": 0.5, "decimals": 2},
+}
+
+# Words of a column name: "UnitPrice", "unit_price" and "UNIT_PRICE" -> unit, price
+_NAME_WORD = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+
+_TYPE_DEFAULTS: Dict[str, Dict[str, Any]] = {
+    "integer": {"min": 0, "max": 1000},
+    "float":   {"min": 0.0, "max": 1000.0, "decimals": 2},
+    "boolean": {"p_true": 0.5},
+    "date":    {"start": "2018-01-01", "end": "2025-12-31", "format": "%Y-%m-%d"},
+    "email":   {"domains": ["example.com", "mail.test", "corp.example", "inbox.test"]},
+    "phone":   {"country_code": "+1"},
+    "url":     {"tlds": ["com", "io", "net", "org"]},
+}
+
+_FIRST = np.array([
+    "james", "mary", "john", "patricia", "robert", "jennifer", "michael", "linda", "william", "elizabeth",
+    "david", "barbara", "richard", "susan", "joseph", "jessica", "thomas", "sarah", "carlos", "aisha",
+    "wei", "yuki", "priya", "omar", "fatima", "liam", "emma", "noah", "olivia", "lucas",
+])
+_LAST = np.array([
+    "smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "rodriguez", "martinez",
+    "hernandez", "lopez", "gonzalez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin",
+    "lee", "perez", "thompson", "white", "harris", "chen", "patel", "kim", "nguyen", "khan",
+])
+_STREETS = np.array([
+    "Main", "Oak", "Pine", "Maple", "Cedar", "Elm", "Washington", "Lake", "Hill", "Park",
+    "Sunset", "River", "Church", "Highland", "Spring", "Ridge", "Meadow", "Forest", "Willow", "Lincoln",
+])
+_SUFFIXES = np.array(["St", "Ave", "Rd", "Blvd", "Ln", "Dr", "Way", "Ct"])
+_CITIES = np.array([
+    "Springfield", "Riverside", "Franklin", "Greenville", "Bristol", "Clinton", "Fairview", "Salem",
+    "Madison", "Georgetown", "Arlington", "Ashland", "Dover", "Oxford", "Jackson", "Burlington",
+])
+_WORDS = np.array([
+    "acme", "globex", "initech", "umbrella", "hooli", "vandelay", "stark", "wayne", "wonka", "tyrell",
+    "cyberdyne", "soylent", "aperture", "massive", "gringotts", "oscorp", "monarch", "pied", "piper", "nakatomi",
+])
+
+
+class LocalRowEngine:
+    COMPOSITE_KEY_RADIX = 10  # rows per value of the leading column(s) of a composite key
+
+    def __init__(
+        self,
+        seed: Optional[int] = None,
+        column_options: Optional[Dict[str, Dict[str, Any]]] = None,
+    ):
+        """``column_options`` maps ``"Table.column"`` or ``"column"`` to overrides
+        such as ``min``/``max``/``decimals``, ``start``/``end``/``format``,
+        ``p_true``, ``domains``, ``tlds`` or ``choices``."""
+        self.seed = seed
+        self.column_options = column_options or {}
+        # Without an explicit seed every run still gets one fixed root entropy,
+        # so per-table streams stay independent of scheduling order.
+        self._entropy = np.random.SeedSequence(seed).entropy
+
+    def rng_for(self, table_name: str, stream: int = 0) -> np.random.Generator:
+        """Independent, reproducible generator for one table (and stream)."""
+        ss = np.random.SeedSequence(self._entropy, spawn_key=(zlib.crc32(table_name.encode()), stream))
+        return np.random.default_rng(ss)
+
+    # ── planning ──────────────────────────────────────────────────────────────
+    @staticmethod
+    def semantic_columns(table: Dict[str, Any]) -> List[str]:
+        """Columns that should come from the LLM: free text that is not a key."""
+        keys = set(key_columns(table.get("primary_key")))
+        for fk in table.get("foreign_keys", []):
+            keys.update(key_columns(fk["column"]))
+        return [
+            col for col, ctype in table["columns"].items()
+            if str(ctype).lower() in SEMANTIC_TYPES and col not in keys
+        ]
+
+    def _options(self, table_name: str, col: str, ctype: str) -> Dict[str, Any]:
+        opts = dict(_TYPE_DEFAULTS.get(ctype, {}))
+        # whole words only, so DataUsage or Percentage never match "age"
+        words = [w.lower() for w in _NAME_WORD.findall(col)]
+        hint = next((_NAME_HINTS[w] for w in reversed(words) if w in _NAME_HINTS), None)
+        if hint and ctype in ("integer", "float"):
+            opts.update(hint)
+        opts.update(self.column_options.get(col, {}))
+        opts.update(self.column_options.get(f"{table_name}.{col}", {}))
+        return opts
+
+    # ── generation ────────────────────────────────────────────────────────────
+    def generate(
+        self,
+        table: Dict[str, Any],
+        num_rows: int,
+        text_pools: Optional[Dict[str, Sequence[Any]]] = None,
+        fk_values: Optional[Dict[str, Sequence[Any]]] = None,
+        pk_start: int = 1,
+        stream: int = 0,
+    ) -> pd.DataFrame:
+        """Build ``num_rows`` rows for ``table``.
+
+        ``text_pools`` supplies candidate values for semantic columns; columns
+        without a pool get a deterministic ``<column>_<n>`` placeholder.
+        ``fk_values`` maps FK columns to the parent keys they may reference.
+        A composite primary key gets distinct tuples (see ``composite_keys``).
+        """
+        text_pools = text_pools or {}
+        fk_values = fk_values or {}
+        rng = self.rng_for(table["name"], stream)
+        pk = [c for c in key_columns(table.get("primary_key")) if c in table["columns"]]
+        keys = self.composite_keys(table, pk, num_rows, pk_start) if len(pk) > 1 else {}
+        data: Dict[str, Any] = {}
+        for col, ctype in table["columns"].items():
+            ctype = str(ctype).lower()
+            if col in keys:
+                data[col] = keys[col]
+            elif pk == [col]:
+                data[col] = self.primary_keys(table["name"], ctype, num_rows, pk_start)
+            elif col in fk_values and len(fk_values[col]):
+                data[col] = self._sample(fk_values[col], num_rows, rng)
+            elif col in text_pools and len(text_pools[col]):
+                data[col] = self._sample(text_pools[col], num_rows, rng)
+            else:
+                data[col] = self.column(table["name"], col, ctype, num_rows, rng, pk_start)
+        return pd.DataFrame(data, columns=list(table["columns"].keys()))
+
+    def primary_keys(self, table_name: str, ctype: str, n: int, start: int = 1) -> np.ndarray:
+        return self._key_values(table_name, ctype, np.arange(start, start + n, dtype=np.int64))
+
+    def composite_keys(
+        self, table: Dict[str, Any], columns: List[str], n: int, start: int = 1
+    ) -> Dict[str, np.ndarray]:
+        """Distinct key tuples for rows ``start .. start+n-1``.
+
+        The row number is written in mixed radix: the last column counts
+        1..``COMPOSITE_KEY_RADIX`` within each value of the column before it
+        (line 1..10 of each order), and the first column is unbounded.
+        """
+        rest = np.arange(start - 1, start - 1 + n, dtype=np.int64)
+        out: Dict[str, np.ndarray] = {}
+        for col in reversed(columns[1:]):
+            rest, digit = np.divmod(rest, self.COMPOSITE_KEY_RADIX)
+            out[col] = self._key_values(table["name"], str(table["columns"][col]).lower(), digit + 1)
+        out[columns[0]] = self._key_values(table["name"], str(table["columns"][columns[0]]).lower(), rest + 1)
+        return out
+
+    @staticmethod
+    def _key_values(table_name: str, ctype: str, ids: np.ndarray) -> np.ndarray:
+        if ctype in ("integer", "float"):
+            return ids
+        prefix = "".join(ch for ch in table_name.upper() if ch.isalnum())[:3] or "ID"
+        return np.char.add(prefix, np.char.zfill(ids.astype(str), 6))
+
+    @staticmethod
+    def _sample(values: Sequence[Any], n: int, rng: np.random.Generator) -> np.ndarray:
+        pool = np.asarray(values, dtype=object)
+        return pool[rng.integers(0, len(pool), n)]
+
+    def column(
+        self,
+        table_name: str,
+        col: str,
+        ctype: str,
+        n: int,
+        rng: np.random.Generator,
+        start: int = 1,
+    ) -> np.ndarray:
+        opts = self._options(table_name, col, ctype)
+        if "choices" in opts:
+            choices = np.asarray(opts["choices"], dtype=object)
+            return choices[rng.integers(0, len(choices), n)]
+
+        if ctype == "integer":
+            return rng.integers(int(opts["min"]), int(opts["max"]) + 1, n)
+        if ctype == "float":
+            return np.round(rng.uniform(float(opts["min"]), float(opts["max"]), n), int(opts["decimals"]))
+        if ctype == "boolean":
+            return rng.random(n) < float(opts["p_true"])
+        if ctype == "date":
+            lo = np.datetime64(opts["start"], "D")
+            hi = np.datetime64(opts["end"], "D")
+            days = lo + rng.integers(0, int((hi - lo).astype(int)) + 1, n).astype("timedelta64[D]")
+            if opts["format"] == "%Y-%m-%d":
+                return np.datetime_as_string(days, unit="D")
+            return pd.DatetimeIndex(days).strftime(opts["format"]).to_numpy()
+        if ctype == "email":
+            first = _FIRST[rng.integers(0, len(_FIRST), n)]
+            last = _LAST[rng.integers(0, len(_LAST), n)]
+            domains = np.asarray(opts["domains"])
+            # Row number suffix keeps addresses unique without a set lookup
+            local = np.char.add(np.char.add(np.char.add(first, "."), last), self._row_numbers(n, start))
+            return np.char.add(np.char.add(local, "@"), domains[rng.integers(0, len(domains), n)])
+        if ctype == "phone":
+            area = rng.integers(200, 1000, n).astype(str)
+            mid = rng.integers(200, 1000, n).astype(str)
+            tail = np.char.zfill(rng.integers(0, 10000, n).astype(str), 4)
+            out = np.char.add(f"{opts['country_code']}-", area)
+            out = np.char.add(np.char.add(out, "-"), mid)
+            return np.char.add(np.char.add(out, "-"), tail)
+        if ctype == "address":
+            num = rng.integers(1, 10000, n).astype(str)
+            out = np.char.add(np.char.add(num, " "), _STREETS[rng.integers(0, len(_STREETS), n)])
+            out = np.char.add(np.char.add(out, " "), _SUFFIXES[rng.integers(0, len(_SUFFIXES), n)])
+            return np.char.add(np.char.add(out, ", "), _CITIES[rng.integers(0, len(_CITIES), n)])
+        if ctype == "url":
+            tlds = np.asarray(opts["tlds"])
+            host = np.char.add(_WORDS[rng.integers(0, len(_WORDS), n)], self._row_numbers(n, start))
+            out = np.char.add(np.char.add("https://www.", host), ".")
+            return np.char.add(out, tlds[rng.integers(0, len(tlds), n)])
+
+        # string / unknown types without an LLM pool
+        return np.char.add(f"{col}_", self._row_numbers(n, start))
+
+    @staticmethod
+    def _row_numbers(n: int, start: int = 1) -> np.ndarray:
+        return np.arange(start, start + n, dtype=np.int64).astype(str)
@@ -0,0 +1,207 @@
+"""Process-wide throttling, retries and circuit breaking for LLM calls.
+
+``ResilientCaller`` wraps each API request:
+
+* a ``RateLimiter`` (token buckets on requests/min and tokens/min) paces every
+  call in the process, whichever session or worker thread makes it;
+* retryable failures (429, 408/409, 5xx, timeouts, dropped connections) are
+  retried with full-jitter exponential backoff, honouring ``Retry-After``;
+* a ``CircuitBreaker`` opens after consecutive provider failures and fails
+  fast with ``CircuitOpenError`` until a probe call succeeds again.
+
+Limits default to ``FAUXFOUNDRY_RPM`` / ``FAUXFOUNDRY_TPM`` from the
+environment (500 requests and 200k tokens per minute otherwise).
+"""
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_RPM = float(os.environ.get("FAUXFOUNDRY_RPM", 500))
+DEFAULT_TPM = float(os.environ.get("FAUXFOUNDRY_TPM", 200_000))
+
+_RETRYABLE_STATUS = (408, 409, 429)
+_RETRYABLE_NAMES = ("APIConnectionError", "APITimeoutError")
+
+
+class CircuitOpenError(RuntimeError):
+    """The provider failed repeatedly; calls are refused until the cool-down ends."""
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: float | None = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self._level = self.capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` now and return how long to wait before using it.
+
+        The level may go negative: later callers queue behind the debt, so
+        waiting threads are served in arrival order.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._level = min(self.capacity, self._level + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._level -= amount
+            return max(0.0, -self._level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Return an over-reservation (e.g. estimated minus actual tokens)."""
+        with self._lock:
+            self._level = min(self.capacity, self._level + amount)
+
+
+class RateLimiter:
+    def __init__(self, requests_per_min: float = DEFAULT_RPM, tokens_per_min: float = DEFAULT_TPM):
+        self.requests = TokenBucket(requests_per_min)
+        self.tokens = TokenBucket(tokens_per_min)
+
+    def acquire(self, tokens: float) -> float:
+        """Block until one request of ``tokens`` tokens fits; returns seconds waited."""
+        wait = max(self.requests.reserve(1), self.tokens.reserve(tokens))
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = 5, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = "closed"  # closed -> open -> half_open -> closed / open
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go out now. While half-open only one probe is let through."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Transient provider errors, judged without importing the SDK."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in _RETRYABLE_STATUS or status >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    return any(cls.__name__ in _RETRYABLE_NAMES for cls in type(error).__mro__)
+
+
+def retry_after(error: BaseException) -> float | None:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ResilientCaller:
+    def __init__(
+        self,
+        limiter: RateLimiter | None = None,
+        breaker: CircuitBreaker | None = None,
+        max_retries: int = 5,
+        base_delay_s: float = 1.0,
+        max_delay_s: float = 30.0,
+    ):
+        self.limiter = limiter or RateLimiter()
+        self.breaker = breaker or CircuitBreaker()
+        self.max_retries = max_retries
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+        self._stats = {"calls": 0, "retries": 0, "throttled_s": 0.0, "failures": 0}
+        self._lock = threading.Lock()
+
+    def call(self, fn: Callable[[], T], tokens: float = 0) -> T:
+        """Run ``fn`` under the rate limits, retrying transient failures.
+
+        ``tokens`` is the expected prompt + completion size, charged against
+        the tokens/min bucket before the call is made.
+        """
+        for attempt in range(self.max_retries + 1):
+            if not self.breaker.allow():
+                raise CircuitOpenError(
+                    "LLM provider unavailable after repeated failures; "
+                    f"calls resume after a {self.breaker.reset_timeout_s:g}s cool-down"
+                )
+            waited = self.limiter.acquire(tokens)
+            self._count(calls=1, throttled_s=waited)
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record_success()  # the provider answered; the request was at fault
+                    raise
+                self.breaker.record_failure()
+                self._count(failures=1)
+                if attempt == self.max_retries:
+                    raise
+                self._count(retries=1)
+                time.sleep(self.backoff(attempt, e))
+            else:
+                self.breaker.record_success()
+                return result
+        raise AssertionError("unreachable")
+
+    def backoff(self, attempt: int, error: BaseException | None = None) -> float:
+        """Full-jitter exponential delay, or the server's ``Retry-After`` if longer."""
+        delay = random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** attempt))
+        hint = retry_after(error) if error is not None else None
+        return max(delay, min(hint, self.max_delay_s)) if hint else delay
+
+    def refund_tokens(self, tokens: float) -> None:
+        if tokens > 0:
+            self.limiter.tokens.refund(tokens)
+
+    def _count(self, **deltas: float) -> None:
+        with self._lock:
+            for k, v in deltas.items():
+                self._stats[k] += v
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "circuit": self.breaker.state}
+
+
+_SHARED: Dict[Tuple[float, float], ResilientCaller] = {}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_caller(requests_per_min: float = DEFAULT_RPM, tokens_per_min: float = DEFAULT_TPM) -> ResilientCaller:
+    """The process-wide caller for one pair of limits (one per API quota)."""
+    with _SHARED_LOCK:
+        key = (float(requests_per_min), float(tokens_per_min))
+        if key not in _SHARED:
+            _SHARED[key] = ResilientCaller(RateLimiter(requests_per_min, tokens_per_min))
+        return _SHARED[key]
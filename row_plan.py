@@ -0,0 +1,90 @@
+"""Per-table row counts.
+
+Every table gets its own count, resolved in FK order so a child's fan-out can
+build on its parent's size. The first of these that applies wins:
+
+1. an explicit override: ``{"Customers": 500}``
+2. a fan-out ratio, as rows per parent row: ``{"Orders": 20}`` (first FK
+   parent) or ``{"Orders.customer_id": 20}`` (that FK's parent)
+3. the table's own ``num_rows`` in the schema
+4. the base row count
+
+A table whose primary key is made up of FK columns (a 1:1 extension of its
+parent, or a link table) is then capped at the number of parent key
+combinations, since each row needs a distinct one.
+
+Overrides and ratios can also be written as one spec string, as taken by the
+sidebar and the CLI: ``"Customers=500, Orders=20x"``.
+"""
+import math
+import re
+from typing import Any, Dict, List, Tuple
+
+from fk_assign import key_columns
+
+_SPEC_ITEM = re.compile(r"^\s*([\w.\- ]+?)\s*=\s*(\d+(?:\.\d+)?)\s*(x?)\s*$", re.I)
+
+
+def parse_row_spec(spec: str) -> Tuple[Dict[str, int], Dict[str, float]]:
+    """``"Customers=500, Orders=20x"`` -> ``({"Customers": 500}, {"Orders": 20.0})``."""
+    overrides: Dict[str, int] = {}
+    ratios: Dict[str, float] = {}
+    for item in filter(str.strip, re.split(r"[,;\n]", spec or "")):
+        m = _SPEC_ITEM.match(item)
+        if not m:
+            raise ValueError(f"Bad table size {item.strip()!r}; use Table=N or Table=Nx (N rows per parent)")
+        name, value, per_parent = m.groups()
+        if "." in name and not per_parent:
+            # a Table.column name only means something as a per-parent ratio
+            raise ValueError(f"Bad table size {item.strip()!r}; a foreign-key ratio needs an x, e.g. {name}={value}x")
+        if per_parent:
+            ratios[name] = float(value)
+        else:
+            overrides[name] = int(float(value))
+    return overrides, ratios
+
+
+def _ratio_for(table: Dict[str, Any], ratios: Dict[str, float]) -> Tuple[float, str] | None:
+    """``(rows per parent row, parent table)`` for ``table``, if a ratio applies."""
+    for fk in table.get("foreign_keys", []):
+        label = f"{table['name']}.{fk['column']}".lower()
+        if label in ratios:
+            return ratios[label], fk["references_table"]
+    if table["name"].lower() in ratios and table.get("foreign_keys"):
+        return ratios[table["name"].lower()], table["foreign_keys"][0]["references_table"]
+    return None
+
+
+def plan_row_counts(
+    tables_def: List[Dict[str, Any]],
+    base_rows: int,
+    levels: List[List[str]],
+    overrides: Dict[str, int] | None = None,
+    ratios: Dict[str, float] | None = None,
+) -> Dict[str, int]:
+    """Row count per table; ``levels`` is the FK dependency order (parents first).
+
+    Table names in ``overrides`` and ``ratios`` match case-insensitively.
+    """
+    overrides = {k.lower(): v for k, v in (overrides or {}).items()}
+    ratios = {k.lower(): v for k, v in (ratios or {}).items()}
+    by_name = {t["name"]: t for t in tables_def}
+    counts: Dict[str, int] = {}
+    for level in levels:
+        for name in level:
+            table = by_name[name]
+            ratio = _ratio_for(table, ratios)
+            if name.lower() in overrides:
+                counts[name] = int(overrides[name.lower()])
+            elif ratio and ratio[1] in counts:
+                counts[name] = max(1, round(ratio[0] * counts[ratio[1]]))
+            elif isinstance(table.get("num_rows"), (int, float)) and table["num_rows"] > 0:
+                counts[name] = int(table["num_rows"])
+            else:
+                counts[name] = int(base_rows)
+            parents = {fk["column"]: fk["references_table"] for fk in table.get("foreign_keys", [])
+                       if isinstance(fk["column"], str)}
+            pk = key_columns(table.get("primary_key"))
+            if pk and all(parents.get(c) in counts for c in pk):
+                counts[name] = min(counts[name], math.prod(counts[parents[c]] for c in pk))
+    return counts
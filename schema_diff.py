@@ -0,0 +1,81 @@
+"""Diff a new schema against the previous run to decide what to regenerate.
+
+Each table of the new schema gets one action:
+
+* ``regenerate`` — new table, or its columns, types, primary key or foreign
+  keys changed (or there is no previous data for it)
+* ``extend``     — same shape, more rows requested: only the extra rows are
+  generated and appended, with primary keys continuing after the old ones
+* ``truncate``   — same shape, fewer rows requested: the first rows are kept
+* ``keep``       — same shape and row count: reused as is
+
+A table that is kept, extended or truncated may still point at a parent that
+changed underneath it. FK columns referencing a regenerated parent are
+reassigned from the new parent keys (``relink``); rows referencing parent
+rows that a truncation removed are left to the integrity repair, which then
+runs on that table only.
+"""
+import json
+from typing import Any, Dict, List
+
+import pandas as pd
+
+REGENERATE = "regenerate"
+EXTEND = "extend"
+TRUNCATE = "truncate"
+KEEP = "keep"
+
+
+def table_shape(table: Dict[str, Any]) -> str:
+    """Canonical form of everything that decides a table's contents except its size."""
+    fks = sorted(
+        (json.dumps(fk.get("column")), fk.get("references_table"), json.dumps(fk.get("references_column")))
+        for fk in table.get("foreign_keys", [])
+    )
+    return json.dumps(
+        {
+            "columns": {c: str(t).lower() for c, t in table.get("columns", {}).items()},
+            "primary_key": table.get("primary_key"),
+            "foreign_keys": fks,
+        },
+        sort_keys=True,
+    )
+
+
+def plan_refresh(
+    previous_def: List[Dict[str, Any]],
+    previous_tables: Dict[str, pd.DataFrame],
+    tables_def: List[Dict[str, Any]],
+    row_counts: Dict[str, int],
+) -> Dict[str, Dict[str, Any]]:
+    """``{table: {"action": ..., "relink": [fk columns], "affected": bool}}``.
+
+    ``affected`` marks tables whose data changes in any way, so coercion and
+    integrity checks can skip the rest.
+    """
+    old_shapes = {t["name"]: table_shape(t) for t in previous_def}
+    plan: Dict[str, Dict[str, Any]] = {}
+    for t in tables_def:
+        name = t["name"]
+        prev = previous_tables.get(name)
+        if prev is None or old_shapes.get(name) != table_shape(t):
+            action = REGENERATE
+        elif row_counts[name] > len(prev):
+            action = EXTEND
+        elif row_counts[name] < len(prev):
+            action = TRUNCATE
+        else:
+            action = KEEP
+        plan[name] = {"action": action, "relink": [], "affected": action != KEEP}
+
+    for t in tables_def:
+        entry = plan[t["name"]]
+        if entry["action"] == REGENERATE:
+            continue
+        for fk in t.get("foreign_keys", []):
+            parent = plan.get(fk["references_table"], {}).get("action")
+            if parent == REGENERATE and isinstance(fk["column"], str):
+                entry["relink"].append(fk["column"])
+            if parent in (REGENERATE, TRUNCATE):
+                entry["affected"] = True
+    return plan
@@ -0,0 +1,262 @@
+"""Reuse store for Agent 1 schemas, matched on the normalized brief.
+
+A brief is normalized (Unicode NFKC, case-folded, whitespace collapsed) and
+stored with its mode and a MinHash signature of its word shingles. A lookup
+returns the stored schema when the normalized brief matches exactly, or when
+an entry in the same mode is a near duplicate (estimated Jaccard similarity
+of at least ``threshold``). Candidates come from an LSH band index, so a
+lookup does not scan the whole store.
+
+Row counts are masked out before shingling, so "500 customers" and "2000
+customers" count as the same brief. Numbers that describe the structure
+("3 tables", "12 columns") are kept and must match exactly. When the row
+counts differ, per-table ``num_rows`` taken literally from the old brief are
+remapped to the new numbers by position. If a count cannot be remapped (for
+example, one derived from a ratio), or the stored schema does not have the
+number of tables the brief asks for, the match is rejected and the schema is
+generated again. The base row count is not part of the match; the caller sets
+it on the returned schema.
+
+Each entry is one JSON file under ``root``. The store is loaded into memory
+on start-up.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+import unicodedata
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_SCHEMA_DIR = os.environ.get("FAUXFOUNDRY_SCHEMA_DIR", ".fauxfoundry_schemas")
+
+_WORD = re.compile(r"\w+")
+_NUMBER = re.compile(r"\d+(?:[.,]\d+)*")
+# a number sizing the schema itself rather than a table ("3 related tables")
+_STRUCTURAL = re.compile(
+    r"\b(\d+(?:[.,]\d+)*)\s+(?:\w+\s+)?(tables?|columns?|fields?|attributes?|entit(?:y|ies)|relationships?)\b"
+)
+_PRIME = (1 << 31) - 1  # Mersenne prime; keeps a * x + b inside uint64
+
+
+def _structure(normalized: str) -> List[Tuple[str, str]]:
+    """``[(number, noun)]`` for every number that sizes the schema."""
+    return [(m.group(1), m.group(2).rstrip("s")) for m in _STRUCTURAL.finditer(normalized)]
+
+
+def _table_count(normalized: str) -> Optional[int]:
+    counts = [n for n, noun in _structure(normalized) if noun == "table"]
+    return int(float(counts[0].replace(",", ""))) if len(counts) == 1 else None
+
+
+def _mask(normalized: str) -> str:
+    keep = {m.start(1) for m in _STRUCTURAL.finditer(normalized)}
+    return _NUMBER.sub(lambda m: m.group() if m.start() in keep else "#", normalized)
+
+
+def _numbers(normalized: str) -> List[float]:
+    """The brief's row counts: every number that does not size the schema."""
+    keep = {m.start(1) for m in _STRUCTURAL.finditer(normalized)}
+    return [float(m.group().replace(",", "")) for m in _NUMBER.finditer(normalized) if m.start() not in keep]
+
+
+def remap_row_counts(
+    schema: Dict[str, Any], old: List[float], new: List[float], tables: Optional[int] = None
+) -> bool:
+    """Rewrite per-table ``num_rows`` stated in the old brief to the new brief's
+    numbers, in place. False when a count is not one of the old numbers, or
+    when the brief asks for ``tables`` tables and the schema has a different
+    number."""
+    if tables is not None and len(schema.get("tables", [])) != tables:
+        return False
+    if old == new:
+        return True
+    if len(old) != len(new):
+        return False
+    for table in schema.get("tables", []):
+        if "num_rows" not in table:
+            continue
+        try:
+            i = old.index(float(table["num_rows"]))
+        except (TypeError, ValueError):
+            return False
+        table["num_rows"] = int(new[i])
+    return True
+
+
+def normalize_brief(brief: str) -> str:
+    text = unicodedata.normalize("NFKC", brief).casefold()
+    return " ".join(text.split())
+
+
+def shingles(text: str, size: int = 3) -> List[str]:
+    words = _WORD.findall(_mask(text))
+    if len(words) <= size:
+        return [" ".join(words)] if words else [""]
+    return [" ".join(words[i:i + size]) for i in range(len(words) - size + 1)]
+
+
+class SchemaStore:
+    def __init__(
+        self,
+        root: str = DEFAULT_SCHEMA_DIR,
+        threshold: float = 0.9,
+        num_perm: int = 64,
+        bands: int = 16,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.root = root
+        self.threshold = threshold
+        self.bands = bands
+        self._rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._index: Dict[Tuple[int, bytes], set] = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+        self._load()
+
+    # ── signatures ────────────────────────────────────────────────────────────
+    @staticmethod
+    def key(brief: str, mode: str) -> str:
+        return hashlib.sha256(f"{mode}\n{normalize_brief(brief)}".encode("utf-8")).hexdigest()
+
+    def signature(self, normalized: str) -> np.ndarray:
+        hashed = np.array(
+            [zlib.crc32(s.encode("utf-8")) for s in shingles(normalized)], dtype=np.uint64
+        ) % _PRIME
+        return ((np.outer(hashed, self._a) + self._b) % _PRIME).min(axis=0)
+
+    def _bands(self, sig: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [(i, sig[i * self._rows:(i + 1) * self._rows].tobytes()) for i in range(self.bands)]
+
+    # ── lookup / store ────────────────────────────────────────────────────────
+    def _match(self, brief: str, mode: str) -> List[Tuple[str, float]]:
+        """Entries that would serve ``brief``: ``[(key, similarity)]``, best first."""
+        exact = self.key(brief, mode)
+        normalized = normalize_brief(brief)
+        sig = self.signature(normalized)
+        structure = _structure(normalized)
+        with self._lock:
+            found = [(exact, 1.0)] if exact in self._entries else []
+            candidates = set().union(*(self._index.get(b, set()) for b in self._bands(sig)))
+            for key in candidates - {exact}:
+                entry = self._entries[key]
+                if entry["mode"] != mode or _structure(entry["brief"]) != structure:
+                    continue
+                similarity = float(np.mean(entry["sig"] == sig))
+                if similarity >= self.threshold:
+                    found.append((key, similarity))
+        return sorted(found, key=lambda m: -m[1])
+
+    def lookup(self, brief: str, mode: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """``(schema, similarity)`` of the best usable match, or None.
+
+        The schema is a fresh copy with per-table row counts remapped to the
+        brief's numbers; similarity is 1.0 for an exact match.
+        """
+        normalized = normalize_brief(brief)
+        numbers, tables = _numbers(normalized), _table_count(normalized)
+        for key, similarity in self._match(brief, mode):
+            with self._lock:
+                entry = self._entries.get(key)
+            if entry is None:
+                continue
+            schema = json.loads(json.dumps(entry["schema"]))
+            if not remap_row_counts(schema, _numbers(entry["brief"]), numbers, tables):
+                continue
+            with self._lock:
+                if similarity == 1.0:
+                    self.hits += 1
+                else:
+                    self.near_hits += 1
+            return schema, similarity
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, brief: str, mode: str, schema: Dict[str, Any]) -> None:
+        """Store ``schema`` for ``brief``. Entries the brief matched are replaced."""
+        self.invalidate(brief, mode)
+        normalized = normalize_brief(brief)
+        key = self.key(brief, mode)
+        record = {
+            "key": key,
+            "mode": mode,
+            "brief": normalized,
+            "created": time.time(),
+            "schema": schema,
+        }
+        path = os.path.join(self.root, f"{key}.json")
+        fd, tmp = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(record, fh, ensure_ascii=False)
+        os.replace(tmp, path)
+        self._add(record)
+
+    def invalidate(self, brief: str, mode: str) -> int:
+        """Drop every entry that would serve ``brief``. Returns the number removed."""
+        return self._remove([key for key, _ in self._match(brief, mode)])
+
+    def clear(self) -> int:
+        with self._lock:
+            keys = list(self._entries)
+        n = self._remove(keys)
+        with self._lock:
+            self.hits = self.near_hits = self.misses = 0
+        return n
+
+    # ── maintenance ───────────────────────────────────────────────────────────
+    def _add(self, record: Dict[str, Any]) -> None:
+        entry = {**record, "sig": self.signature(record["brief"])}
+        with self._lock:
+            self._entries[record["key"]] = entry
+            for band in self._bands(entry["sig"]):
+                self._index.setdefault(band, set()).add(record["key"])
+
+    def _remove(self, keys: List[str]) -> int:
+        removed = 0
+        with self._lock:
+            for key in keys:
+                entry = self._entries.pop(key, None)
+                if entry is None:
+                    continue
+                for band in self._bands(entry["sig"]):
+                    self._index.get(band, set()).discard(key)
+                try:
+                    os.remove(os.path.join(self.root, f"{key}.json"))
+                except OSError:
+                    pass
+                removed += 1
+        return removed
+
+    def _load(self) -> None:
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.root, name), encoding="utf-8") as fh:
+                    self._add(json.load(fh))
+            except (OSError, ValueError, KeyError):
+                continue
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,325 @@
+"""Multi-process sharded generation for the local engine.
+
+A table's row range is cut into shards of ``shard_rows`` rows. The shard
+starting at row ``start`` is built in a worker process with
+``pk_start=start + 1`` and random stream ``start``. Each shard therefore has
+its own deterministic seed and a disjoint primary-key range. The output
+depends on the shard size only; the number of workers and which worker ran
+which shard make no difference.
+
+There are two entry points:
+
+* ``generate_frame`` — the table's generated columns as one DataFrame, for
+  in-memory runs. FK columns are filled afterwards by the caller as usual.
+  Tables over ``DEFAULT_SHARD_ROWS`` always follow the shard plan, in this
+  process when there is one worker, so results do not change with the
+  worker count.
+* ``stream_table`` — each shard fills its own FK columns from parent keys
+  memory-mapped from disk and writes its own part files. The parts are then
+  merged into one file per format, in shard order. With ``shard_rows`` equal
+  to ``streaming``'s ``chunk_rows``, the CSV files match a single-process
+  streamed run byte for byte (Parquet files hold the same rows).
+
+After the shards finish, ``verify_unique_keys`` checks that each shard's
+primary keys are unique and that the shards' key ranges do not overlap.
+Together these prove global uniqueness without gathering all keys in one
+process.
+
+Worker pools use the ``spawn`` start method, so they are safe to create from
+threads (Streamlit sessions, background jobs). ``shared_pool`` keeps one pool
+per worker count for the whole process.
+"""
+import multiprocessing
+import os
+import shutil
+import threading
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_SHARD_WORKERS = int(os.environ.get("FAUXFOUNDRY_SHARD_WORKERS", 1))
+DEFAULT_SHARD_ROWS = int(os.environ.get("FAUXFOUNDRY_SHARD_ROWS", 100_000))
+
+_pools: Dict[int, ProcessPoolExecutor] = {}
+_lock = threading.Lock()
+
+
+def shared_pool(workers: int = DEFAULT_SHARD_WORKERS) -> ProcessPoolExecutor:
+    """The process-wide worker pool for ``workers`` processes, created on first use."""
+    workers = max(1, int(workers))
+    with _lock:
+        if workers not in _pools:
+            _pools[workers] = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        return _pools[workers]
+
+
+def _discard(pool: ProcessPoolExecutor) -> None:
+    """Forget a pool whose worker died, so the next run starts a fresh one."""
+    with _lock:
+        for workers, known in list(_pools.items()):
+            if known is pool:
+                del _pools[workers]
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def plan_shards(rows: int, shard_rows: int, offset: int = 0) -> List[Tuple[int, int]]:
+    """``[(first row, row count)]`` covering rows ``offset .. offset + rows - 1``."""
+    shard_rows = max(1, int(shard_rows))
+    return [(start, min(shard_rows, offset + rows - start)) for start in range(offset, offset + rows, shard_rows)]
+
+
+# ── keys ──────────────────────────────────────────────────────────────────────
+def _key_order(value: Any) -> Any:
+    """Sort key under which the local engine's keys rise with their row number
+    (``CUS999999`` < ``CUS1000000``)."""
+    return (len(value), value) if isinstance(value, str) else value
+
+
+def key_bounds(keys: pd.Series) -> Dict[str, Any]:
+    """``{"unique", "lo", "hi"}`` for one shard's primary keys."""
+    keys = keys.dropna()
+    if keys.empty:
+        return {"unique": True, "lo": None, "hi": None}
+    if pd.api.types.is_numeric_dtype(keys):
+        lo, hi = keys.min(), keys.max()
+    else:
+        text = keys.astype(str)
+        length = text.str.len()
+        lo, hi = text[length == length.min()].min(), text[length == length.max()].max()
+    return {"unique": bool(keys.is_unique), "lo": _plain(lo), "hi": _plain(hi)}
+
+
+def _plain(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def verify_unique_keys(table_name: str, bounds: List[Dict[str, Any]]) -> None:
+    """Raise ``RuntimeError`` unless every shard's keys are unique and no two
+    shards' key ranges overlap."""
+    if any(not b["unique"] for b in bounds):
+        raise RuntimeError(f"{table_name}: a shard produced duplicate primary keys")
+    ranges = sorted(((b["lo"], b["hi"]) for b in bounds if b["lo"] is not None), key=lambda r: _key_order(r[0]))
+    for (_, prev_hi), (lo, _) in zip(ranges, ranges[1:]):
+        if _key_order(lo) <= _key_order(prev_hi):
+            raise RuntimeError(f"{table_name}: shard primary-key ranges overlap ({prev_hi!r} >= {lo!r})")
+
+
+def _key_array(keys: Sequence[Any]) -> np.ndarray:
+    """Parent keys as a plain (memory-mappable) NumPy array."""
+    s = pd.Series(keys)
+    if pd.api.types.is_integer_dtype(s) and not s.isna().any():
+        return s.to_numpy(dtype="int64")
+    if pd.api.types.is_numeric_dtype(s):
+        return s.to_numpy()
+    return s.astype(str).to_numpy(dtype=str)
+
+
+# ── worker side ───────────────────────────────────────────────────────────────
+def _build_shard(task: Dict[str, Any]) -> pd.DataFrame:
+    table, body, start, n = task["table"], task["body"], task["start"], task["rows"]
+    if body["columns"]:
+        df = task["engine"].generate(body, n, text_pools=task["pools"], pk_start=start + 1, stream=start)
+    else:
+        df = pd.DataFrame(index=pd.RangeIndex(n))
+    fks = task.get("fk_paths") or {}
+    if fks:
+        keys = {col: np.load(path, mmap_mode="r") for col, path in fks.items()}
+        df = task["assigner"].fill(table, df, keys, start, start, task["total"])
+    return df
+
+
+def _pk_bounds(table: Dict[str, Any], df: pd.DataFrame) -> Dict[str, Any] | None:
+    pk = table.get("primary_key")
+    return key_bounds(df[pk]) if isinstance(pk, str) and pk in df.columns else None
+
+
+def _frame_shard(task: Dict[str, Any]) -> Tuple[pd.DataFrame, Dict[str, Any] | None]:
+    df = _build_shard(task)
+    return df, _pk_bounds(task["body"], df)
+
+
+def _write_shard(task: Dict[str, Any]) -> Dict[str, Any]:
+    from streaming import TableSink
+
+    df = _build_shard(task)
+    sink = TableSink(
+        task["parts_dir"], task["table"], task["formats"], task["compression"], stem=task["stem"], header=task["first"],
+    )
+    try:
+        sink.write(df)
+    finally:
+        paths = sink.close()
+    keys = {}
+    for col in task["keep"]:
+        keys[col] = os.path.join(task["parts_dir"], f"{task['stem']}.{col}.npy")
+        np.save(keys[col], _key_array(df[col].dropna().unique()))
+    return {
+        "rows": len(df),
+        "paths": paths,
+        "keys": keys,
+        "bounds": _pk_bounds(task["body"], df),  # keys filled from a parent are unique by construction
+        "sample": df.head(task["sample_rows"]),
+    }
+
+
+# ── caller side ───────────────────────────────────────────────────────────────
+def run_tasks(
+    pool: ProcessPoolExecutor,
+    fn: Callable[[Dict[str, Any]], Any],
+    tasks: List[Dict[str, Any]],
+    check_stop: Callable[[], None] | None = None,
+    on_done: Callable[[int, Any], None] | None = None,
+    tick_s: float = 0.25,
+) -> List[Any]:
+    """Run ``fn`` over ``tasks`` on ``pool``; results in task order.
+
+    ``on_done(index, result)`` runs in the calling thread as shards finish.
+    ``check_stop`` is polled while shards run; when it raises, shards not yet
+    started are cancelled and the exception propagates.
+    """
+    futures: Dict[Future, int] = {pool.submit(fn, task): i for i, task in enumerate(tasks)}
+    results: List[Any] = [None] * len(tasks)
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=tick_s, return_when=FIRST_COMPLETED)
+            for fut in done:
+                results[futures[fut]] = fut.result()
+                if on_done:
+                    on_done(futures[fut], results[futures[fut]])
+            if pending and check_stop is not None:
+                check_stop()
+    except BrokenProcessPool:
+        _discard(pool)
+        raise
+    finally:
+        for fut in pending:
+            fut.cancel()
+    return results
+
+
+def generate_frame(
+    pool: ProcessPoolExecutor | None,
+    table: Dict[str, Any],
+    num_rows: int,
+    engine,
+    text_pools: Dict[str, List[Any]],
+    row_offset: int = 0,
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+    check_stop: Callable[[], None] | None = None,
+) -> pd.DataFrame:
+    """``engine.generate`` for ``table``, split into shards across ``pool``.
+
+    Without a pool the shards run one after another in this process, giving
+    the same rows.
+    """
+    tasks = [
+        {"table": table, "body": table, "engine": engine, "pools": text_pools, "start": start, "rows": n}
+        for start, n in plan_shards(num_rows, shard_rows, row_offset)
+    ]
+    if pool is None:
+        results = []
+        for task in tasks:
+            if check_stop is not None:
+                check_stop()
+            results.append(_frame_shard(task))
+    else:
+        results = run_tasks(pool, _frame_shard, tasks, check_stop)
+    verify_unique_keys(table["name"], [b for _, b in results if b is not None])
+    return pd.concat([df for df, _ in results], ignore_index=True)
+
+
+def stream_table(
+    pool: ProcessPoolExecutor,
+    table: Dict[str, Any],
+    body: Dict[str, Any],
+    rows: int,
+    engine,
+    assigner,
+    text_pools: Dict[str, List[Any]],
+    fk_keys: Dict[str, Sequence[Any]],
+    out_dir: str,
+    stem: str,
+    formats: Sequence[str],
+    keep: Sequence[str],
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+    sample_rows: int = 200,
+    compression: str = "zstd",
+    check_stop: Callable[[], None] | None = None,
+    on_progress: Callable[[int], None] | None = None,
+) -> Dict[str, Any]:
+    """Write ``table`` to ``out_dir`` from shards run on ``pool``.
+
+    Returns ``{"rows", "paths", "keys": {col: unique values}, "sample"}``;
+    ``on_progress(rows_done)`` runs as shards finish.
+    """
+    parts_dir = os.path.join(out_dir, f".{stem}.parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    try:
+        fk_paths = {}
+        for col, keys in fk_keys.items():
+            fk_paths[col] = os.path.join(parts_dir, f"parent.{col}.npy")
+            np.save(fk_paths[col], _key_array(keys))
+        shards = plan_shards(rows, shard_rows)
+        tasks = [
+            {
+                "table": table, "body": body, "engine": engine, "assigner": assigner, "pools": text_pools,
+                "fk_paths": fk_paths, "start": start, "rows": n, "total": rows, "first": i == 0,
+                "parts_dir": parts_dir, "stem": f"{stem}-{i:05d}", "formats": list(formats),
+                "keep": list(keep), "sample_rows": sample_rows, "compression": compression,
+            }
+            for i, (start, n) in enumerate(shards)
+        ]
+        done = {"rows": 0}
+
+        def on_done(_: int, result: Dict[str, Any]):
+            done["rows"] += result["rows"]
+            if on_progress:
+                on_progress(done["rows"])
+
+        results = run_tasks(pool, _write_shard, tasks, check_stop, on_done)
+        verify_unique_keys(table["name"], [r["bounds"] for r in results if r["bounds"] is not None])
+        paths = {
+            fmt: merge_parts([r["paths"][fmt] for r in results], os.path.join(out_dir, f"{stem}.{fmt}"), fmt, compression)
+            for fmt in formats
+        }
+        keys = {
+            col: pd.unique(np.concatenate([np.load(r["keys"][col]) for r in results])) if results else np.array([])
+            for col in keep
+        }
+        sample = pd.concat([r["sample"] for r in results], ignore_index=True).head(sample_rows) if results else None
+        return {"rows": sum(r["rows"] for r in results), "paths": paths, "keys": keys, "sample": sample}
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+
+def merge_parts(parts: List[str], out_path: str, fmt: str, compression: str = "zstd") -> str:
+    """Concatenate shard part files, in order, into ``out_path``.
+
+    CSV parts are joined byte for byte (only the first has a header); Parquet
+    parts are copied one record batch at a time.
+    """
+    if fmt == "csv":
+        with open(out_path, "wb") as out:
+            for part in parts:
+                with open(part, "rb") as fh:
+                    shutil.copyfileobj(fh, out, 1 << 20)
+        return out_path
+    import parquet_export
+
+    _, pq = parquet_export._require_pyarrow()
+    writer = None
+    try:
+        for part in parts:
+            pf = pq.ParquetFile(part)
+            if writer is None:
+                writer = pq.ParquetWriter(out_path, pf.schema_arrow, compression=compression)
+            for batch in pf.iter_batches():
+                writer.write_batch(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return out_path
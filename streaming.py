@@ -0,0 +1,321 @@
+"""Out-of-core generation: tables go to disk in row chunks instead of memory.
+
+Tables are built parents first. Each table larger than one chunk is
+synthesised by the local engine ``chunk_rows`` at a time; its FK columns are
+assigned from the parent keys and each chunk is then appended to the table's
+CSV file and/or Parquet file and dropped. Memory therefore stays bounded by
+one chunk plus the key columns that children reference (for example, 10M
+integer parent keys take 80 MB), not by the dataset.
+
+Chunks continue one table-wide sequence: primary keys run on from the
+previous chunk, every chunk has its own random stream, and FK distributions
+(zipf, fixed, cover) span the whole table (see ``ForeignKeyAssigner.assign``).
+Local-engine keys are unique by construction, so no global duplicate pass is
+needed. Tables small enough for the LLM (``LLM_MAX_ROWS``, with no local
+engine attached) are generated in memory as usual, with duplicate PKs
+dropped, and then written in one go.
+
+With ``shard_workers`` > 1 on the generator, the chunks of a local-engine
+table are built and written by a process pool instead (see ``sharding``).
+
+Not covered by the streamed path: composite FKs and self-references are not
+repaired, and there is no integrity report. Load the files and run
+``IntegrityEngine`` if those are needed.
+
+``manifest.json`` lists each table's row count, files, keys and column types.
+A head sample of each table is returned for previews.
+"""
+import json
+import os
+import re
+import time
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import sharding
+from row_plan import plan_row_counts
+
+DEFAULT_STREAM_DIR = os.environ.get("FAUXFOUNDRY_STREAM_DIR", os.path.join("static", "fauxfoundry_runs"))
+DEFAULT_CHUNK_ROWS = int(os.environ.get("FAUXFOUNDRY_CHUNK_ROWS", 100_000))
+SAMPLE_ROWS = 200
+STREAM_FORMATS = ("csv", "parquet")
+
+# on_progress(table_name, rows_written, table_rows) — called after every chunk
+ProgressCallback = Callable[[str, int, int], None]
+
+
+def file_stem(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name).strip("_").lower() or "table"
+
+
+class TableSink:
+    """Append-only CSV and/or Parquet output for one table."""
+
+    def __init__(
+        self,
+        out_dir: str,
+        table: Dict[str, Any],
+        formats: Sequence[str],
+        compression: str = "zstd",
+        stem: str | None = None,
+        header: bool = True,
+    ):
+        """``stem`` names the files (default: from the table name); ``header``
+        False leaves the CSV header out, for parts appended to another file."""
+        unknown = set(formats) - set(STREAM_FORMATS)
+        if unknown or not formats:
+            raise ValueError(f"Stream formats must be among {STREAM_FORMATS}, got {list(formats)}")
+        self.table = table
+        self.compression = compression
+        self.header = header
+        stem = stem or file_stem(table["name"])
+        self.paths = {fmt: os.path.join(out_dir, f"{stem}.{fmt}") for fmt in formats}
+        self.rows = 0
+        self._csv = None
+        self._parquet = None
+        if "parquet" in self.paths:
+            import parquet_export
+
+            parquet_export._require_pyarrow()  # fail before any rows are generated
+        if "csv" in self.paths:
+            self._csv = open(self.paths["csv"], "w", encoding="utf-8", newline="")
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self._csv is not None:
+            df.to_csv(self._csv, header=self.header and self.rows == 0, index=False)
+        if "parquet" in self.paths:
+            import parquet_export
+
+            chunk = parquet_export.to_arrow_table(df, self.table)
+            if self._parquet is None:
+                _, pq = parquet_export._require_pyarrow()
+                # types come from the schema, so every chunk has the first one's
+                self._parquet = pq.ParquetWriter(self.paths["parquet"], chunk.schema, compression=self.compression)
+            self._parquet.write_table(chunk)
+        self.rows += len(df)
+
+    def close(self) -> Dict[str, str]:
+        if self._csv is not None:
+            self._csv.close()
+        if self._parquet is not None:
+            self._parquet.close()
+        elif "parquet" in self.paths and self.rows == 0:
+            import parquet_export
+
+            pa, pq = parquet_export._require_pyarrow()
+            types = self.table.get("columns", {})
+            schema = pa.schema([(c, parquet_export.arrow_type(t)) for c, t in types.items()])
+            pq.write_table(schema.empty_table(), self.paths["parquet"], compression=self.compression)
+        return self.paths
+
+
+def _referenced_columns(tables_def: List[Dict[str, Any]]) -> Dict[str, set]:
+    referenced: Dict[str, set] = {}
+    for t in tables_def:
+        for fk in t.get("foreign_keys", []):
+            if isinstance(fk["references_column"], str):
+                referenced.setdefault(fk["references_table"], set()).add(fk["references_column"])
+    return referenced
+
+
+def stream_tables(
+    gen,
+    tables_def: List[Dict[str, Any]],
+    num_rows: int,
+    out_dir: str,
+    formats: Sequence[str] = ("csv",),
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    sample_rows: int = SAMPLE_ROWS,
+    on_progress: ProgressCallback | None = None,
+    workers: int | None = None,
+) -> Tuple[List[Dict[str, Any]], Dict[str, pd.DataFrame]]:
+    """Generate every table of ``tables_def`` into ``out_dir``.
+
+    ``gen`` is a ``SyntheticDataGenerator``; its engines, FK assigner, row
+    plan and ``should_stop`` apply as in ``generate_tables``. Returns
+    ``(manifest table entries, {table: head sample})`` in schema order.
+
+    With ``workers`` > 1 (default: ``gen.shard_workers``), local-engine tables
+    over one chunk are built by a process pool, one chunk per shard (see
+    ``sharding``); the files are the same as with one process.
+    """
+    workers = gen.shard_workers if workers is None else workers
+    os.makedirs(out_dir, exist_ok=True)
+    chunk_rows = max(1, int(chunk_rows))
+    levels = gen.dependency_levels(tables_def)
+    gen.row_counts = plan_row_counts(tables_def, num_rows, levels, gen.row_overrides, gen.fan_out_ratios)
+    gen.row_report = {}
+    gen.refresh_plan = {}
+    by_name = {t["name"]: t for t in tables_def}
+    referenced = _referenced_columns(tables_def)
+    parent_ids: Dict[str, Sequence[Any]] = {}
+    entries: Dict[str, Dict[str, Any]] = {}
+    samples: Dict[str, pd.DataFrame] = {}
+
+    with gen.telemetry.stage("tables", tables=len(tables_def), streamed=True):
+        for name in (n for level in levels for n in level):
+            gen._check_stop()
+            table = by_name[name]
+            rows = gen.row_counts[name]
+            keep = [c for c in referenced.get(name, ()) if c in table["columns"]]
+            engine = gen.local_engine
+            if engine is None and rows > gen.LLM_MAX_ROWS:
+                engine = gen.bulk_engine
+            progress = (lambda done, name=name, rows=rows: on_progress(name, done, rows)) if on_progress else None
+            if engine is not None and workers > 1 and rows > chunk_rows:
+                out = _write_sharded(gen, table, rows, parent_ids, engine, out_dir, formats, chunk_rows, keep,
+                                     sample_rows, workers, progress)
+            else:
+                out = _write_table(gen, table, rows, parent_ids, engine, out_dir, formats, chunk_rows, keep,
+                                   sample_rows, progress)
+            for col, values in out["keys"].items():
+                parent_ids[f"{name}.{col}"] = values
+            samples[name] = out["sample"] if out["sample"] is not None else pd.DataFrame(columns=list(table["columns"]))
+            paths = out["paths"]
+            gen._record(name, requested=rows, delivered=out["rows"], engine="local" if engine else "llm")
+            entries[name] = {
+                "name": name,
+                "rows": out["rows"],
+                "files": {fmt: os.path.basename(p) for fmt, p in paths.items()},
+                "bytes": {fmt: os.path.getsize(p) for fmt, p in paths.items()},
+                "primary_key": table.get("primary_key"),
+                "foreign_keys": table.get("foreign_keys", []),
+                "columns": dict(table["columns"]),
+            }
+
+    order = [t["name"] for t in tables_def]
+    return [entries[n] for n in order], {n: samples[n] for n in order}
+
+
+def _write_table(
+    gen,
+    table: Dict[str, Any],
+    rows: int,
+    parent_ids: Dict[str, Sequence[Any]],
+    engine,
+    out_dir: str,
+    formats: Sequence[str],
+    chunk_rows: int,
+    keep: Sequence[str],
+    sample_rows: int,
+    on_progress: Callable[[int], None] | None,
+) -> Dict[str, Any]:
+    """One table, chunk by chunk in this process: ``{"rows", "paths", "keys", "sample"}``."""
+    sink = TableSink(out_dir, table, formats)
+    parts: Dict[str, List[np.ndarray]] = {c: [] for c in keep}
+    head: List[pd.DataFrame] = []
+    try:
+        for chunk in _chunks(gen, table, rows, parent_ids, engine, chunk_rows, keep):
+            sink.write(chunk)
+            for col in keep:
+                parts[col].append(chunk[col].to_numpy())
+            taken = sum(len(h) for h in head)
+            if taken < sample_rows:
+                head.append(chunk.head(sample_rows - taken))
+            if on_progress:
+                on_progress(sink.rows)
+    finally:
+        paths = sink.close()
+    keys = {
+        col: (pd.Series(np.concatenate(p)) if p else pd.Series([], dtype=object)).dropna().unique()
+        for col, p in parts.items()
+    }
+    return {"rows": sink.rows, "paths": paths, "keys": keys, "sample": pd.concat(head, ignore_index=True) if head else None}
+
+
+def _write_sharded(
+    gen,
+    table: Dict[str, Any],
+    rows: int,
+    parent_ids: Dict[str, Sequence[Any]],
+    engine,
+    out_dir: str,
+    formats: Sequence[str],
+    chunk_rows: int,
+    keep: Sequence[str],
+    sample_rows: int,
+    workers: int,
+    on_progress: Callable[[int], None] | None,
+) -> Dict[str, Any]:
+    """``_write_table`` with the chunks built and written by ``workers`` processes."""
+    fk_keys = gen._assignable_fks(table, parent_ids)
+    body = gen._without_columns(table, fk_keys) if fk_keys else table
+    with gen.telemetry.stage("table", table=table["name"], engine="local", streamed=True, workers=workers) as ev:
+        pools = gen._text_pools(body, rows, engine) if body["columns"] else {}
+        out = sharding.stream_table(
+            sharding.shared_pool(workers), table, body, rows, engine, gen.fk_assigner, pools, fk_keys,
+            out_dir, file_stem(table["name"]), formats, keep, chunk_rows, sample_rows,
+            check_stop=gen._check_stop, on_progress=on_progress,
+        )
+        ev["rows"] = out["rows"]
+    return out
+
+
+def _chunks(
+    gen,
+    table: Dict[str, Any],
+    rows: int,
+    parent_ids: Dict[str, Sequence[Any]],
+    engine,
+    chunk_rows: int,
+    referenced: Sequence[str],
+):
+    """Typed row chunks for one table, FK columns filled."""
+    if engine is None:
+        # small LLM table: one in-memory batch, de-duplicated and typed as validate_and_repair would
+        df = gen.generate_table_data(table, rows, parent_ids)
+        repaired, _ = gen.integrity.run({table["name"]: df}, {"tables": [table]})
+        typed, _ = gen.coercer.coerce_table(repaired[table["name"]], table, referenced)
+        yield typed
+        return
+    fk_keys = gen._assignable_fks(table, parent_ids)
+    body = gen._without_columns(table, fk_keys) if fk_keys else table
+    with gen.telemetry.stage("table", table=table["name"], engine="local", streamed=True) as ev:
+        pools = gen._text_pools(body, rows, engine) if body["columns"] else {}
+        ev["rows"] = 0
+        for start in range(0, rows, chunk_rows):
+            gen._check_stop()
+            n = min(chunk_rows, rows - start)
+            if body["columns"]:
+                chunk = engine.generate(body, n, text_pools=pools, pk_start=start + 1, stream=start)
+            else:
+                chunk = pd.DataFrame(index=pd.RangeIndex(n))
+            if fk_keys:
+                chunk = gen._assign_foreign_keys(table, chunk, fk_keys, stream=start, start=start, total=rows)
+            ev["rows"] += n
+            yield chunk
+
+
+def stream_synthesis(
+    gen,
+    brief: str,
+    mode: str,
+    num_rows: int,
+    out_dir: str,
+    formats: Sequence[str] = ("csv",),
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    regenerate_schema: bool = False,
+    on_progress: ProgressCallback | None = None,
+) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, pd.DataFrame]]:
+    """Schema plus streamed tables; returns ``(schema, manifest, samples)``.
+
+    Writes ``schema.json``, the table files and ``manifest.json`` to ``out_dir``.
+    """
+    gen.telemetry.reset()
+    schema = gen.generate_schema(brief, mode, num_rows, regenerate=regenerate_schema)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "schema.json"), "w", encoding="utf-8") as fh:
+        json.dump(schema, fh, indent=2)
+    entries, samples = stream_tables(gen, schema["tables"], num_rows, out_dir, formats, chunk_rows, on_progress=on_progress)
+    manifest = {
+        "formats": list(formats),
+        "created": time.time(),
+        "dataset_description": schema.get("dataset_description", ""),
+        "chunk_rows": chunk_rows,
+        "tables": entries,
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as fh:
+        json.dump(manifest, fh, indent=2, default=str)
+    return schema, manifest, samples
@@ -0,0 +1,237 @@
+"""Incremental parsers for the table formats the model is asked to emit.
+
+``MarkdownTableParser`` is fed text as it streams in and hands back every row
+as soon as its line is complete, so previews can start before the completion
+finishes. Cells are split positionally: an empty cell stays an empty string
+instead of being dropped, which keeps values under the right header. Short
+rows are padded; a row with more cells than the header (an unescaped pipe in
+a value shifts every cell after it) is rejected.
+
+The compact formats (headerless CSV and JSON array-of-arrays) spend far fewer
+output tokens per row. Their parsers share the same ``feed``/``close``/
+``to_frame`` interface and validate every row against the schema's columns.
+"""
+import csv
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+OUTPUT_FORMATS = ("markdown", "csv", "json")
+
+_SEPARATOR = re.compile(r"^\s*\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+_UNESCAPED_PIPE = re.compile(r"(?<!\\)\|")
+
+
+def split_row(line: str) -> List[str]:
+    """Split one markdown table line into stripped cells, keeping empty ones."""
+    line = line.strip()
+    if line.startswith("|"):
+        line = line[1:]
+    if line.endswith("|") and not line.endswith("\\|"):
+        line = line[:-1]
+    if "\\|" in line:
+        return [c.strip().replace("\\|", "|") for c in _UNESCAPED_PIPE.split(line)]
+    return [c.strip() for c in line.split("|")]
+
+
+class MarkdownTableParser:
+    def __init__(self, columns: Optional[List[str]] = None):
+        """``columns`` fixes the expected header; otherwise the first table line is used."""
+        self.header: Optional[List[str]] = list(columns) if columns else None
+        self._expect_header = columns is None
+        self.rows: List[List[str]] = []
+        self.rejected = 0
+        self._buf = ""
+
+    def feed(self, chunk: str) -> List[List[str]]:
+        """Consume a chunk of text and return the rows it completed."""
+        self._buf += chunk
+        if "\n" not in self._buf:
+            return []
+        *lines, self._buf = self._buf.split("\n")
+        return self._consume(lines)
+
+    def close(self, truncated: bool = False) -> List[List[str]]:
+        """Flush a trailing line that had no newline after it.
+
+        When the completion was cut off (``truncated``) that line is an
+        unfinished row and is dropped instead.
+        """
+        tail, self._buf = self._buf, ""
+        return self._consume([tail]) if tail.strip() and not truncated else []
+
+    def _consume(self, lines: List[str]) -> List[List[str]]:
+        new_rows = []
+        for line in lines:
+            if "|" not in line or _SEPARATOR.match(line):
+                continue
+            cells = split_row(line)
+            if self._expect_header:
+                self.header = cells
+                self._expect_header = False
+                continue
+            if cells == self.header:  # header repeated by the model
+                continue
+            n = len(self.header)
+            if len(cells) > n:
+                self.rejected += 1
+                continue
+            new_rows.append(cells + [""] * (n - len(cells)))
+        self.rows.extend(new_rows)
+        return new_rows
+
+    def to_frame(self) -> pd.DataFrame:
+        if not self.header or not self.rows:
+            raise ValueError("Model returned no usable table rows.")
+        return pd.DataFrame(self.rows, columns=self.header)
+
+
+class CsvRowParser:
+    """Headerless CSV in a fixed column order; rows of the wrong width are rejected."""
+
+    def __init__(self, columns: List[str]):
+        self.header = list(columns)
+        self.rows: List[List[str]] = []
+        self.rejected = 0
+        self._buf = ""
+
+    def feed(self, chunk: str) -> List[List[str]]:
+        self._buf += chunk
+        if "\n" not in self._buf:
+            return []
+        *lines, self._buf = self._buf.split("\n")
+        return self._consume(lines)
+
+    def close(self, truncated: bool = False) -> List[List[str]]:
+        tail, self._buf = self._buf, ""
+        return self._consume([tail]) if tail.strip() and not truncated else []
+
+    def _consume(self, lines: List[str]) -> List[List[str]]:
+        new_rows = []
+        for cells in csv.reader(l for l in lines if l.strip() and not l.startswith("```")):
+            cells = [c.strip() for c in cells]
+            if cells == self.header:  # model added a header anyway
+                continue
+            if len(cells) != len(self.header):
+                self.rejected += 1
+                continue
+            new_rows.append(cells)
+        self.rows.extend(new_rows)
+        return new_rows
+
+    def to_frame(self) -> pd.DataFrame:
+        if not self.rows:
+            raise ValueError("Model returned no usable CSV rows.")
+        return pd.DataFrame(self.rows, columns=self.header)
+
+
+class JsonRowParser:
+    """``{"rows": [[...], ...]}`` (or a bare array) validated against the columns.
+
+    JSON is only well-formed once the completion ends, so rows are released by
+    ``close`` rather than ``feed``. A truncated document is salvaged up to its
+    last complete row.
+    """
+
+    def __init__(self, columns: List[str]):
+        self.header = list(columns)
+        self.rows: List[List[str]] = []
+        self.rejected = 0
+        self._parts: List[str] = []
+
+    def feed(self, chunk: str) -> List[List[str]]:
+        self._parts.append(chunk)
+        return []
+
+    def close(self, truncated: bool = False) -> List[List[str]]:
+        text = "".join(self._parts).strip()
+        self._parts = []
+        if text.startswith("```"):
+            text = text.split("\n", 1)[-1].rsplit("```", 1)[0]
+        try:
+            doc = json.loads(text)
+        except ValueError as e:
+            if not truncated:
+                raise ValueError(f"Model returned invalid JSON rows: {e}") from e
+            doc = self._complete_records(text)
+        records = doc.get("rows", []) if isinstance(doc, dict) else doc
+
+        n = len(self.header)
+        new_rows = []
+        for rec in records if isinstance(records, list) else []:
+            if isinstance(rec, dict):
+                rec = [rec.get(c) for c in self.header]
+            if not isinstance(rec, list) or len(rec) != n:
+                self.rejected += 1
+                continue
+            new_rows.append(["" if v is None else str(v) for v in rec])
+        self.rows.extend(new_rows)
+        return new_rows
+
+    @staticmethod
+    def _complete_records(text: str) -> List[Any]:
+        """Every complete element of the (cut-off) row array in ``text``."""
+        start = text.find("[", text.find('"rows"') + 1 if '"rows"' in text else 0)
+        if start < 0:
+            return []
+        decoder = json.JSONDecoder()
+        records, pos = [], start + 1
+        while True:
+            while pos < len(text) and text[pos] in " \t\r\n,":
+                pos += 1
+            try:
+                rec, pos = decoder.raw_decode(text, pos)
+            except ValueError:
+                return records
+            records.append(rec)
+
+    def to_frame(self) -> pd.DataFrame:
+        if not self.rows:
+            raise ValueError("Model returned no usable JSON rows.")
+        return pd.DataFrame(self.rows, columns=self.header)
+
+
+def make_parser(output_format: str, columns: Optional[List[str]] = None):
+    if output_format == "csv":
+        return CsvRowParser(columns)
+    if output_format == "json":
+        return JsonRowParser(columns)
+    return MarkdownTableParser()
+
+
+def format_instructions(output_format: str, columns: List[str]) -> str:
+    """The output-format requirement line for a data-generation prompt."""
+    order = ", ".join(columns)
+    if output_format == "csv":
+        return (
+            f"Return headerless CSV: one row per line, values in this exact column order: {order}. "
+            "Quote values that contain commas. No header, no code fences, nothing else."
+        )
+    if output_format == "json":
+        return (
+            'Return a JSON object {"rows": [[...], ...]} where each inner array holds one row\'s '
+            f"values in this exact column order: {order}. No other keys, nothing else."
+        )
+    return "Return a markdown table (pipe-delimited) with a header row. Nothing else."
+
+
+def response_format(output_format: str) -> Optional[Dict[str, Any]]:
+    """``response_format`` argument for the chat completion, if the format needs one."""
+    return {"type": "json_object"} if output_format == "json" else None
+
+
+def compact_to_df(text: str, columns: List[str], output_format: str) -> pd.DataFrame:
+    """Parse a complete CSV or JSON completion in one go."""
+    parser = make_parser(output_format, columns)
+    parser.feed(text.strip() + "\n")
+    parser.close()
+    return parser.to_frame()
+
+
+def markdown_to_df(md: str) -> pd.DataFrame:
+    """Parse a complete markdown table in one pass."""
+    parser = MarkdownTableParser()
+    parser.feed(md.strip() + "\n")
+    return parser.to_frame()
@@ -0,0 +1,154 @@
+"""Per-stage and per-call performance telemetry for one synthesis run.
+
+The generator records flat events as it works:
+
+* ``stage``  — wall time of a pipeline stage (schema, table, coerce, integrity)
+* ``llm_call`` — one chat completion: wall time, queue wait (rate limiting and
+  retries), prompt/completion tokens, estimated cost, cache hit
+* ``parse`` — rows delivered and rejected by the parser for one data call;
+  ``failed`` when the call yielded no usable rows at all (``error`` says why)
+* ``repairs`` — what ``validate_and_repair`` changed
+
+``summary()`` aggregates them for display; ``to_jsonl()`` and
+``to_prometheus()`` export them.
+"""
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List
+
+# USD per 1M tokens (input, output)
+PRICES_PER_M = {
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4o": (2.50, 10.00),
+}
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
+    price_in, price_out = PRICES_PER_M.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1e6
+
+
+def _label(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Telemetry:
+    def __init__(self):
+        self.events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.events = []
+
+    def emit(self, kind: str, **fields: Any) -> None:
+        event = {"kind": kind, "ts": time.time(), **fields}
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """Time a block; the yielded dict can carry extra fields (e.g. ``rows``)."""
+        extra: Dict[str, Any] = dict(fields)
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            yield extra
+            ok = True
+        finally:
+            self.emit("stage", stage=name, wall_s=time.perf_counter() - t0, ok=ok, **extra)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.events)
+
+    # ── aggregation ───────────────────────────────────────────────────────────
+    def summary(self) -> Dict[str, Any]:
+        events = self.snapshot()
+        stages: Dict[str, Dict[str, Any]] = {}
+        tables: Dict[str, Dict[str, Any]] = {}
+        calls = {"calls": 0, "cached": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                 "cost_usd": 0.0, "wall_s": 0.0, "queue_wait_s": 0.0}
+        parse = {"rows": 0, "rejected": 0, "truncated": 0, "failed": 0}
+        repairs: Dict[str, int] = {}
+        for e in events:
+            kind = e["kind"]
+            if kind == "stage":
+                s = stages.setdefault(e["stage"], {"count": 0, "wall_s": 0.0})
+                s["count"] += 1
+                s["wall_s"] += e["wall_s"]
+                if e["stage"] == "table":
+                    tables[e["table"]] = {
+                        "rows": e.get("rows", 0),
+                        "wall_s": e["wall_s"],
+                        "rows_per_s": e.get("rows", 0) / e["wall_s"] if e["wall_s"] else 0.0,
+                        "engine": e.get("engine"),
+                    }
+            elif kind == "llm_call":
+                calls["calls"] += 1
+                calls["cached"] += int(e.get("cached", False))
+                for k in ("prompt_tokens", "completion_tokens", "cost_usd", "wall_s", "queue_wait_s"):
+                    calls[k] += e.get(k, 0)
+            elif kind == "parse":
+                parse["rows"] += e.get("rows", 0)
+                parse["rejected"] += e.get("rejected", 0)
+                parse["truncated"] += int(e.get("truncated", False))
+                parse["failed"] += int(e.get("failed", False))
+            elif kind == "repairs":
+                for k, v in e.items():
+                    if k not in ("kind", "ts"):
+                        repairs[k] = repairs.get(k, 0) + v
+        rows = sum(t["rows"] for t in tables.values())
+        table_wall = stages.get("tables", {}).get("wall_s", 0.0)
+        return {
+            "stages": stages,
+            "tables": tables,
+            "llm": calls,
+            "parse": parse,
+            "repairs": repairs,
+            "rows": rows,
+            "rows_per_s": rows / table_wall if table_wall else 0.0,
+        }
+
+    # ── export ────────────────────────────────────────────────────────────────
+    def to_jsonl(self) -> str:
+        return "".join(json.dumps(e, default=str) + "\n" for e in self.snapshot())
+
+    def to_prometheus(self, prefix: str = "fauxfoundry") -> str:
+        """Prometheus text exposition of ``summary()`` for the last run."""
+        s = self.summary()
+        lines: List[str] = []
+
+        def metric(name: str, help_text: str, kind: str, samples: List[tuple]):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{_label(v)}"' for k, v in labels.items())
+                lines.append(f"{prefix}_{name}{{{label_str}}} {value}" if label_str else f"{prefix}_{name} {value}")
+
+        metric("stage_seconds", "Wall time per pipeline stage.", "gauge",
+               [({"stage": k}, round(v["wall_s"], 6)) for k, v in s["stages"].items()])
+        metric("table_rows", "Rows delivered per table.", "gauge",
+               [({"table": k}, v["rows"]) for k, v in s["tables"].items()])
+        metric("table_rows_per_second", "Generation throughput per table.", "gauge",
+               [({"table": k}, round(v["rows_per_s"], 3)) for k, v in s["tables"].items()])
+        llm = s["llm"]
+        metric("llm_calls_total", "Chat completions, by cache hit.", "counter",
+               [({"cached": "true"}, llm["cached"]), ({"cached": "false"}, llm["calls"] - llm["cached"])])
+        metric("llm_tokens_total", "Tokens used by chat completions.", "counter",
+               [({"type": "prompt"}, llm["prompt_tokens"]), ({"type": "completion"}, llm["completion_tokens"])])
+        metric("llm_cost_usd_total", "Estimated API cost.", "counter", [({}, round(llm["cost_usd"], 6))])
+        metric("llm_call_seconds_total", "Summed wall time of chat completions.", "counter",
+               [({}, round(llm["wall_s"], 6))])
+        metric("llm_queue_wait_seconds_total", "Time calls spent throttled or backing off.", "counter",
+               [({}, round(llm["queue_wait_s"], 6))])
+        metric("parse_rejected_rows_total", "Rows the parsers rejected.", "counter", [({}, s["parse"]["rejected"])])
+        metric("parse_failures_total", "Data calls that yielded no usable rows.", "counter",
+               [({}, s["parse"]["failed"])])
+        metric("truncated_calls_total", "Completions cut off by the token limit.", "counter",
+               [({}, s["parse"]["truncated"])])
+        metric("repairs_total", "Changes made by validate_and_repair.", "counter",
+               [({"type": k}, v) for k, v in s["repairs"].items()])
+        return "\n".join(lines) + "\n"
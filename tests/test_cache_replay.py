@@ -0,0 +1,60 @@
+"""A brief recorded into the response cache replays without reaching the API."""
+import os
+import sys
+
+import pandas as pd
+from openai import OpenAI
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+sys.path[:0] = [ROOT, os.path.join(ROOT, "benchmarks")]
+
+from fk_assign import ForeignKeyAssigner  # noqa: E402
+from generator import MODE_RELATIONAL, SyntheticDataGenerator  # noqa: E402
+from llm_cache import ResponseCache  # noqa: E402
+from resilience import RateLimiter, ResilientCaller  # noqa: E402
+from stub_llm_server import StubLLMServer  # noqa: E402
+
+BRIEF = "an online shop with customers and orders"
+ROWS = 250  # several batches per table, so usage is observed mid-run
+
+
+def _generator(cache: ResponseCache) -> SyntheticDataGenerator:
+    return SyntheticDataGenerator(
+        cache=cache,
+        fk_assigner=ForeignKeyAssigner(seed=7),  # FK columns are drawn locally, not cached
+        caller=ResilientCaller(RateLimiter(1e9, 1e12)),
+    )
+
+
+def _learned(gen: SyntheticDataGenerator, table) -> bool:
+    planner = gen.planner
+    return planner.estimate_row_tokens(table, gen.output_format) != planner.estimate_row_tokens(
+        table, gen.output_format, learned=False
+    )
+
+
+def test_recorded_brief_replays(tmp_path):
+    server = StubLLMServer(tables=3).start()
+    try:
+        recorder = _generator(ResponseCache(str(tmp_path)))
+        recorder.client = OpenAI(api_key="stub", base_url=server.base_url, max_retries=0)
+        schema, tables = recorder.synthesize(BRIEF, MODE_RELATIONAL, ROWS)
+        # real responses still teach the planner, cache or not
+        assert any(_learned(recorder, t) for t in schema["tables"])
+
+        # the same generator again: usage it has observed must not resize calls
+        recorder.cache.hits = recorder.cache.misses = 0
+        recorder.synthesize(BRIEF, MODE_RELATIONAL, ROWS)
+        assert recorder.cache.misses == 0
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # a fresh process, offline: no client, and a miss raises CacheMiss
+    replayer = _generator(ResponseCache(str(tmp_path), replay_only=True))
+    replay_schema, replay_tables = replayer.synthesize(BRIEF, MODE_RELATIONAL, ROWS)
+    assert replay_schema == schema
+    assert replayer.cache.misses == 0
+    assert not any(_learned(replayer, t) for t in replay_schema["tables"])  # replays teach nothing
+    for name, df in tables.items():
+        pd.testing.assert_frame_equal(replay_tables[name], df)
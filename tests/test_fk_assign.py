@@ -0,0 +1,121 @@
+"""Foreign-key distributions, and FK columns that are also the primary key."""
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from fk_assign import ForeignKeyAssigner  # noqa: E402
+from generator import SyntheticDataGenerator  # noqa: E402
+from local_engine import LocalRowEngine  # noqa: E402
+
+PARENTS = np.arange(1, 101)
+
+
+def _counts(values):
+    return np.bincount(np.asarray(values) - 1, minlength=len(PARENTS))
+
+
+def test_uniform_draws_only_parent_keys():
+    values = ForeignKeyAssigner(seed=1).assign("Orders.customer_id", PARENTS, 5000)
+    assert len(values) == 5000
+    assert set(values) <= set(PARENTS)
+
+
+def test_fixed_gives_every_parent_the_same_count():
+    fk = ForeignKeyAssigner(seed=1, default={"kind": "fixed", "per_parent": 3})
+    assert (_counts(fk.assign("Orders.customer_id", PARENTS, 300)) == 3).all()
+
+
+def test_cover_references_every_parent():
+    fk = ForeignKeyAssigner(seed=1, default="cover")
+    assert (_counts(fk.assign("Orders.customer_id", PARENTS, 150)) >= 1).all()
+
+
+def test_zipf_is_skewed():
+    fk = ForeignKeyAssigner(seed=1, default={"kind": "zipf", "s": 1.5})
+    counts = _counts(fk.assign("Orders.customer_id", PARENTS, 10_000))
+    assert counts.max() > 10 * counts.mean()
+
+
+def _in_chunks(fk, n, chunk):
+    return np.concatenate([
+        fk.assign("Orders.customer_id", PARENTS, min(chunk, n - s), stream=s, start=s, total=n)
+        for s in range(0, n, chunk)
+    ])
+
+
+def test_fixed_chunks_add_up_to_one_call():
+    fk = ForeignKeyAssigner(seed=1, default="fixed")
+    whole = fk.assign("Orders.customer_id", PARENTS, 400)
+    assert (_counts(_in_chunks(fk, 400, 30)) == _counts(whole)).all()
+
+
+def test_cover_chunks_still_cover_every_parent():
+    fk = ForeignKeyAssigner(seed=1, default="cover")
+    assert (_counts(_in_chunks(fk, 400, 30)) >= 1).all()
+
+
+def test_assign_unique_never_repeats_and_stops_at_capacity():
+    fk = ForeignKeyAssigner(seed=1)
+    parts = [fk.assign_unique("Usage.CustomerID", [PARENTS], 40, start=s, total=120)[0] for s in (0, 40, 80)]
+    values = np.concatenate(parts)
+    assert len(values) == len(PARENTS)  # the last chunk is cut short
+    assert len(set(values)) == len(PARENTS)
+
+
+def _generate(tables, rows):
+    gen = SyntheticDataGenerator(local_engine=LocalRowEngine(seed=3), fk_assigner=ForeignKeyAssigner(seed=3))
+    schema = {"tables": tables}
+    return gen, gen.validate_and_repair(gen.generate_tables(tables, rows), schema)
+
+
+CUSTOMERS = {
+    "name": "Customers", "primary_key": "CustomerID", "foreign_keys": [],
+    "columns": {"CustomerID": "integer", "Name": "string"},
+}
+
+
+def test_one_to_one_child_keeps_every_row():
+    usage = {
+        "name": "Usage", "primary_key": "CustomerID",
+        "foreign_keys": [{"column": "CustomerID", "references_table": "Customers", "references_column": "CustomerID"}],
+        "columns": {"CustomerID": "integer", "DataUsage": "float"},
+    }
+    gen, tables = _generate([CUSTOMERS, usage], 1000)
+    assert len(tables["Usage"]) == 1000
+    assert tables["Usage"]["CustomerID"].is_unique
+    assert set(tables["Usage"]["CustomerID"]) == set(tables["Customers"]["CustomerID"])
+    assert gen.integrity_report["pk_duplicates_dropped"] == 0
+
+
+def test_one_to_one_child_is_capped_at_parent_count():
+    usage = {
+        "name": "Usage", "primary_key": "CustomerID", "num_rows": 1500,
+        "foreign_keys": [{"column": "CustomerID", "references_table": "Customers", "references_column": "CustomerID"}],
+        "columns": {"CustomerID": "integer", "DataUsage": "float"},
+    }
+    gen, tables = _generate([CUSTOMERS, usage], 200)
+    assert gen.row_counts["Usage"] == 200
+    assert len(tables["Usage"]) == 200
+
+
+def test_link_table_gets_distinct_pairs():
+    products = {
+        "name": "Products", "primary_key": "ProductID", "num_rows": 5, "foreign_keys": [],
+        "columns": {"ProductID": "integer", "Price": "float"},
+    }
+    favourites = {
+        "name": "Favourites", "primary_key": ["CustomerID", "ProductID"], "num_rows": 400,
+        "foreign_keys": [
+            {"column": "CustomerID", "references_table": "Customers", "references_column": "CustomerID"},
+            {"column": "ProductID", "references_table": "Products", "references_column": "ProductID"},
+        ],
+        "columns": {"CustomerID": "integer", "ProductID": "integer", "Rating": "integer"},
+    }
+    gen, tables = _generate([CUSTOMERS, products, favourites], 50)
+    pairs = tables["Favourites"][["CustomerID", "ProductID"]]
+    assert len(pairs) == 250  # 50 customers x 5 products
+    assert not pairs.duplicated().any()
+    assert gen.integrity_report["pk_duplicates_dropped"] == 0
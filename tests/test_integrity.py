@@ -0,0 +1,87 @@
+"""Integrity engine: PK de-duplication, FK repair and fan-out bounds."""
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from integrity import IntegrityEngine, parse_fan_out  # noqa: E402
+
+SCHEMA = {"tables": [
+    {"name": "Customers", "primary_key": "id", "foreign_keys": [], "columns": {"id": "integer"}},
+    {
+        "name": "Orders", "primary_key": "oid",
+        "foreign_keys": [{"column": "cid", "references_table": "Customers", "references_column": "id"}],
+        "columns": {"oid": "integer", "cid": "integer"},
+    },
+]}
+
+
+def _tables():
+    return {
+        "Customers": pd.DataFrame({"id": [1, 2, 3, 3]}),
+        "Orders": pd.DataFrame({"oid": [1, 2, 3, 4, 5], "cid": [1, 1, 2, 9, 1]}),
+    }
+
+
+def test_duplicate_primary_keys_are_dropped():
+    tables, report = IntegrityEngine().run(_tables(), SCHEMA)
+    assert list(tables["Customers"]["id"]) == [1, 2, 3]
+    assert report["pk_duplicates_dropped"] == 1
+
+
+def test_invalid_foreign_keys_point_at_real_parents():
+    tables, report = IntegrityEngine().run(_tables(), SCHEMA)
+    assert tables["Orders"]["cid"].isin(tables["Customers"]["id"]).all()
+    assert report["fk_repairs"] == 1
+    assert report["tables"]["Orders"]["fks"]["Orders.cid"]["invalid"] == 1
+
+
+def test_composite_keys():
+    schema = {"tables": [
+        {"name": "P", "primary_key": ["a", "b"], "foreign_keys": [], "columns": {"a": "integer", "b": "integer"}},
+        {
+            "name": "C", "primary_key": "id",
+            "foreign_keys": [{"column": ["ca", "cb"], "references_table": "P", "references_column": ["a", "b"]}],
+            "columns": {"id": "integer", "ca": "integer", "cb": "integer"},
+        },
+    ]}
+    tables = {
+        "P": pd.DataFrame({"a": [1, 1, 2, 2], "b": [1, 2, 1, 1]}),
+        "C": pd.DataFrame({"id": [1, 2, 3], "ca": [1, 2, 1], "cb": [2, 1, 5]}),
+    }
+    fixed, report = IntegrityEngine().run(tables, schema)
+    assert report["pk_duplicates_dropped"] == 1
+    assert report["fk_repairs"] == 1
+    parent = set(zip(fixed["P"]["a"], fixed["P"]["b"]))
+    assert set(zip(fixed["C"]["ca"], fixed["C"]["cb"])) <= parent
+
+
+def test_fan_out_is_only_judged_against_rules():
+    _, report = IntegrityEngine().run(_tables(), SCHEMA)
+    assert report["fan_out_rules"] == 0
+    assert report["fan_out_violations"] == 0
+
+    # the orphan goes to customer 1, which then has 4 orders; customer 3 has none
+    _, report = IntegrityEngine(fan_out={"Orders.cid": {"min": 1, "max": 2}}).run(_tables(), SCHEMA)
+    assert report["fan_out_rules"] == 1
+    assert report["fan_out_violations"] == 2
+    assert report["tables"]["Orders"]["fks"]["Orders.cid"]["fan_out_violations"] == 2
+
+
+def test_only_checks_the_named_tables():
+    tables, report = IntegrityEngine().run(_tables(), SCHEMA, only=["Orders"])
+    assert len(tables["Customers"]) == 4  # left alone
+    assert set(report["tables"]) == {"Orders"}
+
+
+def test_parse_fan_out():
+    assert parse_fan_out("Orders.cid=1-50; Reviews.pid=-20") == {
+        "Orders.cid": {"min": 1, "max": 50}, "Reviews.pid": {"max": 20},
+    }
+    assert parse_fan_out("") == {}
+    for bad in ("Orders=1-5", "Orders.cid=5", "Orders.cid=9-2"):
+        with pytest.raises(ValueError, match="Bad fan-out bound"):
+            parse_fan_out(bad)
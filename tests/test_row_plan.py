@@ -0,0 +1,23 @@
+"""Row-count specs: absolute sizes, per-parent ratios and bad tokens."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from row_plan import parse_row_spec  # noqa: E402
+
+
+def test_sizes_and_ratios():
+    assert parse_row_spec("Customers=500, Orders=20x; Orders.customer_id=2.5x") == (
+        {"Customers": 500}, {"Orders": 20.0, "Orders.customer_id": 2.5},
+    )
+    assert parse_row_spec("") == ({}, {})
+
+
+@pytest.mark.parametrize("bad", ["Orders.customer_id=500", "Orders=lots"])
+def test_bad_tokens_are_named(bad):
+    with pytest.raises(ValueError, match="Bad table size") as e:
+        parse_row_spec(f"Customers=10, {bad}")
+    assert bad in str(e.value)
@@ -0,0 +1,99 @@
+"""Output-token planning for data and schema calls.
+
+``TokenPlanner`` estimates what one row of a table costs from its column types
+and the output format, sizes each call's batch and ``max_tokens`` from that,
+and refines the estimate from the ``usage`` the API reports for completed
+calls. Callers that cache responses pass ``learned=False`` wherever the size
+ends up in the cache key (the batch size in the prompt, the cache key's
+``max_tokens``) so a request repeats byte-for-byte across runs. A call that
+still stops with ``finish_reason == "length"`` is treated as
+truncated: its unfinished last row is dropped and the caller asks again for the
+rows that are missing.
+"""
+import math
+import threading
+from typing import Any, Dict
+
+# Typical output tokens for one value of each schema type (o200k-style encoding)
+TYPE_TOKENS: Dict[str, int] = {
+    "integer": 3,
+    "float": 4,
+    "boolean": 2,
+    "date": 5,
+    "email": 9,
+    "phone": 7,
+    "address": 12,
+    "url": 10,
+    "string": 8,
+}
+
+# Delimiters and quoting around each cell, and fixed cost per row
+CELL_OVERHEAD = {"markdown": 2, "csv": 1, "json": 3}
+ROW_OVERHEAD = {"markdown": 2, "csv": 1, "json": 3}
+
+
+class TokenPlanner:
+    def __init__(
+        self,
+        max_output_tokens: int = 3500,
+        max_batch_rows: int = 100,
+        headroom: float = 1.25,
+        schema_tokens: int = 1200,
+        max_schema_tokens: int = 8000,
+    ):
+        """``headroom`` multiplies every estimate so ordinary variance does not
+        hit the limit; ``schema_tokens`` is the floor for schema calls."""
+        self.max_output_tokens = max_output_tokens
+        self.max_batch_rows = max_batch_rows
+        self.headroom = headroom
+        self.schema_tokens = schema_tokens
+        self.max_schema_tokens = max_schema_tokens
+        self._observed: Dict[str, float] = {}  # "table:format" -> tokens per row
+        self._lock = threading.Lock()
+
+    # ── estimates ─────────────────────────────────────────────────────────────
+    def estimate_row_tokens(self, table: Dict[str, Any], output_format: str, learned: bool = True) -> float:
+        """Expected completion tokens per row, learned from usage once available."""
+        with self._lock:
+            seen = self._observed.get(f"{table.get('name')}:{output_format}") if learned else None
+        if seen is not None:
+            return seen
+        cell = CELL_OVERHEAD.get(output_format, 2)
+        cost = sum(TYPE_TOKENS.get(str(t).lower(), TYPE_TOKENS["string"]) + cell for t in table.get("columns", {}).values())
+        return max(1, cost) + ROW_OVERHEAD.get(output_format, 2)
+
+    def _fixed_tokens(self, table: Dict[str, Any], output_format: str) -> int:
+        # header + separator line for markdown, the JSON wrapper otherwise
+        n_cols = max(len(table.get("columns", {})), 1)
+        return 2 * n_cols * 4 + 10 if output_format == "markdown" else 10
+
+    def rows_per_call(self, table: Dict[str, Any], output_format: str, learned: bool = True) -> int:
+        """How many rows of this table fit comfortably in one completion."""
+        per_row = self.estimate_row_tokens(table, output_format, learned) * self.headroom
+        budget = self.max_output_tokens - self._fixed_tokens(table, output_format)
+        return max(1, min(self.max_batch_rows, int(budget // per_row)))
+
+    def max_tokens_for(
+        self, table: Dict[str, Any], num_rows: int, output_format: str, learned: bool = True
+    ) -> int:
+        """``max_tokens`` for a call asking for ``num_rows`` rows."""
+        per_row = self.estimate_row_tokens(table, output_format, learned) * self.headroom
+        need = math.ceil(num_rows * per_row) + self._fixed_tokens(table, output_format)
+        return min(self.max_output_tokens, need)
+
+    def schema_max_tokens(self, brief: str, attempt: int = 0) -> int:
+        """Schema JSON grows with the brief; each retry after truncation doubles it."""
+        base = max(self.schema_tokens, len(brief) // 2)
+        return min(self.max_schema_tokens, base * (2 ** attempt))
+
+    # ── feedback ──────────────────────────────────────────────────────────────
+    def observe(self, table: Dict[str, Any], output_format: str, rows: int, completion_tokens: int | None) -> None:
+        """Fold the measured cost of a completed call into the estimate."""
+        if not rows or not completion_tokens:
+            return
+        fixed = self._fixed_tokens(table, output_format)
+        per_row = max(1.0, (completion_tokens - fixed) / rows)
+        key = f"{table.get('name')}:{output_format}"
+        with self._lock:
+            prev = self._observed.get(key)
+            self._observed[key] = per_row if prev is None else 0.5 * prev + 0.5 * per_row